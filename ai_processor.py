@@ -1,15 +1,198 @@
+import asyncio
+import hashlib
+import json
 import os
+import threading
+import time
 from dotenv import load_dotenv
-from openai import OpenAI
+
+import llm_cache
+import metrics
+import profiling
+from llm_backends import backend_model, create_backend
+from rate_limiter import AdaptiveRateLimiter
 
 load_dotenv(override=True)
 
-API_KEY = os.getenv("OPENAI_API_KEY")
-if not API_KEY:
-    raise RuntimeError("OPENAI_API_KEY bulunamadı (.env kontrol).")
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openai")  # openai | fake
+MODEL = backend_model(LLM_BACKEND, os.getenv("OPENAI_MODEL", "gpt-4o-mini"))
+LLM_EST_COMPLETION_TOKENS = int(os.getenv("LLM_EST_COMPLETION_TOKENS", "1500"))
+
+# Backend (OpenAI/httpx client) ve limiter ilk kullanımda, process başına kurulur:
+# import hızlı kalır, OPENAI_API_KEY yalnızca LLM çağrısında gerekir ve
+# preload + fork eden sunucularda httpx bağlantıları process'ler arasında paylaşılmaz.
+_state = None
+_state_pid = None
+_state_lock = threading.Lock()
+
+
+def _process_state():
+    global _state, _state_pid
+    pid = os.getpid()
+    if _state is None or _state_pid != pid:
+        with _state_lock:
+            if _state is None or _state_pid != pid:
+                limiter = AdaptiveRateLimiter(
+                    rpm=float(os.getenv("LLM_RPM", "500")),
+                    tpm=float(os.getenv("LLM_TPM", "200000")),
+                    max_concurrency=int(os.getenv("LLM_MAX_CONCURRENCY", "8")),
+                    max_retries=int(os.getenv("LLM_MAX_RETRIES", "5")),
+                )
+                _state = (create_backend(LLM_BACKEND, os.getenv("OPENAI_MODEL", "gpt-4o-mini")), limiter)
+                _state_pid = pid
+    return _state
+
+
+def get_backend():
+    return _process_state()[0]
+
+
+def get_limiter() -> AdaptiveRateLimiter:
+    return _process_state()[1]
+
+
+def limiter_stats() -> dict:
+    # limiter henüz kurulmadıysa kurmaz (backend kurulumu OPENAI_API_KEY ister)
+    state = _state if _state_pid == os.getpid() else None
+    return state[1].stats() if state else {}
+
+
+def reset_after_fork():
+    """
+    Fork sonrası çağrılabilir (gunicorn post_fork); bir sonraki çağrı yeni client kurar.
+    Ebeveynin client'ı kapatılmaz: soketler ebeveynle paylaşımlı.
+    """
+    global _state, _state_pid
+    _state = None
+    _state_pid = None
+
+
+def _estimate_tokens(messages) -> int:
+    # kaba tahmin: ~4 karakter / token
+    return sum(len(m["content"]) for m in messages) // 4 + LLM_EST_COMPLETION_TOKENS
+
+
+def _chat_create(messages, temperature: float, action_key: str = None):
+    """
+    Tüm LLM çağrıları buradan, ortak limiter üzerinden geçer.
+    Returns: (text, usage | None) — usage'a latency_ms da eklenir
+    """
+    backend, limiter = _process_state()
+    est = _estimate_tokens(messages)
+    started = time.perf_counter()
+    try:
+        text, usage = limiter.call(
+            lambda: backend.complete(messages, temperature, action_key=action_key),
+            est_tokens=est,
+            classify=backend.classify_error,
+        )
+    except Exception:
+        metrics.observe_llm_call(MODEL, action_key, "complete", "error", time.perf_counter() - started)
+        raise
+    finally:
+        profiling.add("llm", time.perf_counter() - started)
+    return text, _record_complete(limiter, est, action_key, started, usage)
+
+
+def _record_complete(limiter, est: int, action_key: str, started: float, usage: dict = None) -> dict:
+    elapsed = time.perf_counter() - started
+    metrics.observe_llm_call(MODEL, action_key, "complete", "ok", elapsed, usage=usage)
+    if usage:
+        limiter.record_usage(est, usage["total_tokens"])
+    return dict(usage or {}, latency_ms=int(elapsed * 1000))
+
+
+def _chat_stream(messages, temperature: float, action_key: str = None, usage: dict = None):
+    # limiter slotu stream bitene kadar tutulur; gerçek kullanım bucket'a stream sonunda işlenir
+    backend, limiter = _process_state()
+    usage = {} if usage is None else usage
+    stream = limiter.stream(
+        lambda: backend.open_stream(messages, temperature, action_key=action_key, usage=usage),
+        est_tokens=_estimate_tokens(messages),
+        classify=backend.classify_error,
+        usage=usage,
+    )
+    return _timed_stream(stream, time.perf_counter(), action_key, usage)
+
+
+def _timed_stream(stream, started: float, action_key: str, usage: dict = None):
+    # TTFT ve toplam süre; usage verildiyse ttft_ms / latency_ms eklenir
+    ttft = None
+    outcome = "aborted"  # istemci stream'i yarıda bırakırsa (GeneratorExit)
+    try:
+        for delta in stream:
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            yield delta
+        outcome = "ok"
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        _record_stream(started, action_key, outcome, ttft, usage)
+
+
+def _record_stream(started: float, action_key: str, outcome: str, ttft: float = None, usage: dict = None):
+    elapsed = time.perf_counter() - started
+    profiling.add("llm", elapsed)
+    metrics.observe_llm_call(MODEL, action_key, "stream", outcome, elapsed, ttft=ttft,
+                             usage=usage if outcome == "ok" else None)
+    if usage is not None:
+        usage["latency_ms"] = int(elapsed * 1000)
+        if ttft is not None:
+            usage["ttft_ms"] = int(ttft * 1000)
+
+
+# =========================
+# asyncio (asgi.py)
+# =========================
+# Aynı backend/limiter/metrikler; bekleme ve I/O event loop'u bloklamaz.
+# llm_cache (MySQL kalıcı katmanı olabilir) thread'de çağrılır.
+async def _achat_create(messages, temperature: float, action_key: str = None):
+    backend, limiter = _process_state()
+    est = _estimate_tokens(messages)
+    started = time.perf_counter()
+    try:
+        text, usage = await limiter.acall(
+            lambda: backend.acomplete(messages, temperature, action_key=action_key),
+            est_tokens=est,
+            classify=backend.classify_error,
+        )
+    except Exception:
+        metrics.observe_llm_call(MODEL, action_key, "complete", "error", time.perf_counter() - started)
+        raise
+    finally:
+        profiling.add("llm", time.perf_counter() - started)
+    return text, _record_complete(limiter, est, action_key, started, usage)
+
+
+async def _achat_stream(messages, temperature: float, action_key: str = None, usage: dict = None):
+    backend, limiter = _process_state()
+    usage = {} if usage is None else usage
+    stream = limiter.astream(
+        lambda: backend.aopen_stream(messages, temperature, action_key=action_key, usage=usage),
+        est_tokens=_estimate_tokens(messages),
+        classify=backend.classify_error,
+        usage=usage,
+    )
+    return _atimed_stream(stream, time.perf_counter(), action_key, usage)
+
+
+async def _atimed_stream(stream, started: float, action_key: str, usage: dict = None):
+    ttft = None
+    outcome = "aborted"  # istemci bağlantıyı kapatırsa (CancelledError / aclose)
+    try:
+        async for delta in stream:
+            if ttft is None:
+                ttft = time.perf_counter() - started
+            yield delta
+        outcome = "ok"
+    except Exception:
+        outcome = "error"
+        raise
+    finally:
+        _record_stream(started, action_key, outcome, ttft, usage)
 
-MODEL = os.getenv("OPENAI_MODEL", "gpt-4o-mini")
-client = OpenAI(api_key=API_KEY)
 
 SYSTEM_INSTRUCTIONS = """
 Sen bir veritabanı tasarımı asistanısın.
@@ -19,22 +202,122 @@ Gereksiz açıklama yapma, direkt sonucu ver.
 """.strip()
 
 
-def _project_context(p: dict) -> str:
-    return f"""
-PROJE BAŞLIĞI: {p['title']}
-DOMAIN: {p['domain']}
-PRIMARY ENTITY: {p['primary_entity']}
-CONSTRAINT / RULE: {p['constraints_text']}
-ADVANCED FEATURE: {p['advanced_feature']}
-SECURITY / ACCESS CONTROL: {p['security_access']}
-REPORTING REQUIREMENT: {p['reporting_requirement']}
-COMMON TASKS: {p['common_tasks']}
-""".strip()
+PROJECT_FIELDS = [
+    ("title", "PROJE BAŞLIĞI"),
+    ("domain", "DOMAIN"),
+    ("primary_entity", "PRIMARY ENTITY"),
+    ("constraints_text", "CONSTRAINT / RULE"),
+    ("advanced_feature", "ADVANCED FEATURE"),
+    ("security_access", "SECURITY / ACCESS CONTROL"),
+    ("reporting_requirement", "REPORTING REQUIREMENT"),
+    ("common_tasks", "COMMON TASKS"),
+]
+
+# Her action'ın prompt'una giren proje alanları ve önceki action çıktıları.
+# Prompt yalnızca bunlardan kurulur (bkz. build_project_prompt); böylece bir alan
+# değişince yalnızca ona bağlı action'ların fingerprint'i değişir.
+ACTION_DEPENDENCIES = {
+    "business_rules": {
+        "fields": ["title", "domain", "primary_entity", "constraints_text", "security_access"],
+        "outputs": [],
+    },
+    "er_tables": {
+        "fields": ["title", "domain", "primary_entity", "constraints_text", "advanced_feature", "common_tasks"],
+        "outputs": [],
+    },
+    "missing_rules": {
+        "fields": ["title", "domain", "primary_entity", "constraints_text", "advanced_feature",
+                   "security_access", "common_tasks"],
+        "outputs": [],
+    },
+    "normalization": {
+        "fields": ["title", "domain", "primary_entity", "constraints_text", "common_tasks"],
+        "outputs": [],
+    },
+    "er_plantuml": {
+        "fields": ["title", "domain", "primary_entity"],
+        "outputs": ["er_tables"],
+    },
+    "sql_script": {
+        "fields": ["title", "domain", "primary_entity", "constraints_text", "advanced_feature", "security_access"],
+        "outputs": ["er_tables"],
+    },
+    "report": {
+        "fields": ["title", "domain", "primary_entity", "reporting_requirement"],
+        "outputs": ["er_tables"],
+    },
+}
+
+# Tüm action'ların kullandığı alanlar: prompt'un ortak başına (_prompt_prefix) girer
+COMMON_FIELDS = [key for key, _ in PROJECT_FIELDS
+                 if all(key in deps["fields"] for deps in ACTION_DEPENDENCIES.values())]
+
+OUTPUT_LABELS = {
+    "er_tables": "ER TABLOLARI (mevcut çıktı)",
+}
 
 
+def action_output_deps(action_key: str) -> list:
+    return ACTION_DEPENDENCIES.get(action_key, {}).get("outputs", [])
+
+
+def _project_context(p: dict, fields) -> str:
+    wanted = set(fields)
+    return "\n".join(f"{label}: {p[key]}" for key, label in PROJECT_FIELDS if key in wanted).strip()
+
+
+# Tüm bölümler için ortak kurallar ve her action'ın talimatı system mesajında durur
+# (PROJECT_SYSTEM_PROMPT): proje ve action'dan bağımsız, uzun ve sabit bir prefix.
+GENERAL_GUIDELINES = """
+=== GENEL KURALLAR (tüm bölümler) ===
+Hedef veritabanı: MySQL 8 (InnoDB, utf8mb4).
+
+Adlandırma:
+- Tablo adları tekil, snake_case ve İngilizce olsun (user, subscription, order_item).
+- Her tablonun birincil anahtarı id : INT AUTO_INCREMENT olsun; bileşik anahtar yalnızca saf ara tablolarda.
+- Yabancı anahtar kolonları <referans_tablo>_id biçiminde olsun (user_id, product_id).
+- M:N ilişkiler ara tabloyla kurulur; ara tablonun adı iki tablonun adından oluşur (user_role).
+
+Veri tipleri:
+- Para: DECIMAL(12,2); adet / sayaç: INT; evet-hayır: BOOLEAN.
+- Tarih: DATE; tarih-saat: DATETIME; kayıt zamanı: created_at DATETIME DEFAULT CURRENT_TIMESTAMP.
+- Kısa metin: gerçekçi uzunlukta VARCHAR(n); uzun metin: TEXT.
+- Sabit değer kümeleri: az ve değişmeyen değerler için ENUM, yönetilen değerler için lookup tablosu.
+
+Kısıtlar:
+- Zorunlu alanlar NOT NULL; iş anahtarları (e-posta, kod, numara) UNIQUE olsun.
+- Değer aralıkları CHECK ile yazılsın (MySQL 8.0.16 ve sonrası CHECK kısıtlarını uygular).
+- FK silme davranışı açıkça seçilsin: bağımlı kayıtlar için ON DELETE CASCADE, geçmiş / rapor verisi için RESTRICT.
+- Tek satırda denetlenemeyen kurallar (sayım sınırı, tarih çakışması, durum geçişi) trigger ya da
+  stored procedure ile uygulanır.
+
+Tutarlılık:
+- Proje bilgisinde geçen varlık, kural ve rol adlarını aynen kullan; yeni ad uydurma.
+- PRIMARY ENTITY modelin merkezinde olsun; diğer tablolar ona doğrudan ya da dolaylı bağlansın.
+- CONSTRAINT / RULE alanındaki her kural en az bir kısıt, trigger ya da iş kuralıyla karşılansın.
+- SECURITY / ACCESS CONTROL alanında roller varsa rol / izin tabloları ve GRANT örnekleri bu rollere göre kurulsun.
+- Önceki bir çıktı verildiyse (örn. ER TABLOLARI) tablo ve kolon adlarını ondan al; onunla çelişme.
+
+Tablo biçimi:
+- Tablo istenen yerde Markdown tablo kullan: ilk satır başlık, ikinci satır |---| ayırıcı,
+  her satır | ile başlayıp | ile biter.
+- Hücre içinde | gerekiyorsa \\| yaz; hücre boş kalmasın, bilgi yoksa - yaz.
+- Tablonun dışına metin yalnızca bölüm talimatı izin veriyorsa yazılır.
+
+Kod biçimi:
+- SQL ve PlantUML kodu dil etiketli kod bloğunda verilir (```sql, ```plantuml).
+- SQL ifadeleri ; ile biter; tablolar FK sırasına göre (önce referans verilen tablo) oluşturulur.
+
+Kullanıcı mesajı sırasıyla şunları içerir: proje bilgileri, varsa bölüme özel proje bilgileri,
+varsa önceki çıktılar ve GÖREV satırında üretilecek bölümün adı. Yalnızca o bölümün
+talimatını uygula.
+""".strip()
+
+# Action'a özel talimatlar: PROJECT_SYSTEM_PROMPT'ta bölüm adıyla yer alır;
+# kullanıcı mesajının GÖREV kısmı yalnızca bölüm adını verir (bkz. build_project_prompt)
 PROMPT_TEMPLATES = {
 "business_rules": """
-Aşağıdaki proje bilgilerine göre Business Rules üret ve SADECE tablo olarak ver.
+Verilen proje bilgilerine göre Business Rules üret ve SADECE tablo olarak ver.
 
 ZORUNLU FORMAT:
 - Kolonlar SIRASIYLA şu olacak:
@@ -44,50 +327,34 @@ ZORUNLU FORMAT:
 - ER Etkisi: ilişki/kısıt etkisini yaz (örn: Kullanıcı (1)-Abonelik (N), UNIQUE, CHECK, M:N ara tablo vb.)
 - Uygulama İpucu: MySQL’de nasıl uygulanır (UNIQUE, FK, CHECK, trigger, view vs.)
 - Ekstra açıklama, başlık, madde işareti ASLA yazma. Sadece tablo.
-
-=== PROJE ===
-{ctx}
-=== ÇIKTI ===
 """,
 
     "er_tables": """
-Aşağıdaki proje bilgilerine göre ER Tablosu Oluştur.
+Verilen proje bilgilerine göre ER Tablosu Oluştur.
 - Önce entity listesi
 - Sonra her tablo için: PK, önemli alanlar, FK
 - İlişkileri (1-N, N-N) belirt
 - En az 7-12 tablo hedefle (domain’e göre)
 -Sadece Tablo
 -Ekstra açıklama, başlık, madde işareti ASLA yazma. Sadece tablo.
-
-=== PROJE ===
-{ctx}
-=== ÇIKTI ===
 """,
     "missing_rules": """
-Aşağıdaki proje bilgilerine göre eksik/atlanan kuralları (missing rules) tespit et.
+Verilen proje bilgilerine göre eksik/atlanan kuralları (missing rules) tespit et.
 - En az 10 madde öner
 - Maddeleri 3 başlık altında grupla: Data Integrity, Process/Workflow, Security/Access
 - Her madde “kural + kısa gerekçe” şeklinde olsun
-
-=== PROJE ===
-{ctx}
-=== ÇIKTI ===
 """,
     "normalization": """
-Aşağıdaki proje için 0NF→1NF→2NF→3NF normalizasyon çıktısı üret ve Sadece TABLO olarak ver.
+Verilen proje için 0NF→1NF→2NF→3NF normalizasyon çıktısı üret ve Sadece TABLO olarak ver.
 -Sadece Tablo üret
 - Başlangıçta örnek ham tablo(lar) varsay
 - 1NF/2NF/3NF’de oluşan tabloları tek tek yaz
 - Her adımda “neden”i 1-2 satırla açıkla
 - En sonda “Final 3NF Şema”yı tablo tablo özetle
 - sadece tablo üret
-
-=== PROJE ===
-{ctx}
-=== ÇIKTI ===
 """,
 "er_plantuml": """
-Aşağıdaki proje bilgilerine göre PlantUML ER diyagramı üret.
+Verilen proje bilgilerine göre PlantUML ER diyagramı üret.
 
 ZORUNLU KURALLAR:
 - Çıktı SADECE PlantUML kod bloğu olsun: ```plantuml ... ```
@@ -97,93 +364,301 @@ ZORUNLU KURALLAR:
 - İlişkilerde virgül kullanma.
 - entity tanımı şu formatta olacak:
 
-entity TableName {{
+entity TableName {
   *id : INT <<PK>>
   user_id : INT <<FK>>
   name : VARCHAR
-}}
+}
 
 - İlişki formatı örnek:
-User ||--o{{ Subscription : has
-Content }}o--o{{ Platform : available_on
-
-=== PROJE ===
-{ctx}
-=== ÇIKTI ===
+User ||--o{ Subscription : has
+Content }o--o{ Platform : available_on
 """,
 
     "sql_script": """
-Aşağıdaki proje için MySQL SQL script üret.
+Verilen proje için MySQL SQL script üret.
 - CREATE TABLE’lar (PK/FK/UNIQUE mümkünse CHECK)
 - Örnek INSERT (her tabloya 2-3 kayıt)
 - En az 1 trigger veya 1 stored procedure (constraint/rule’a uygun)
 - Role-based access için örnek kullanıcı/GRANT
-
-=== PROJE ===
-{ctx}
-=== ÇIKTI ===
 """,
     "report": """
-Aşağıdaki proje için raporlama sorguları üret.
+Verilen proje için raporlama sorguları üret.
 - reporting requirement’a uygun 5 rapor sorgusu
 - En az 1 tanesi JOIN + GROUP BY içersin
 - En az 1 tanesi VIEW mantığıyla olsun (MySQL VIEW)
-
-=== PROJE ===
-{ctx}
-=== ÇIKTI ===
 """,
 }
 
 
-def run_project_action(project_row: dict, action_key: str, temperature: float = 0.2):
+PROJECT_SYSTEM_PROMPT = "\n\n".join(
+    [SYSTEM_INSTRUCTIONS, GENERAL_GUIDELINES, "=== BÖLÜM TALİMATLARI ==="]
+    + [f"--- {key} ---\n{text.strip()}" for key, text in PROMPT_TEMPLATES.items()]
+)
+
+
+def chat_messages(prompt_text: str, system: str = PROJECT_SYSTEM_PROMPT) -> list:
+    return [
+        {"role": "system", "content": system},
+        {"role": "user", "content": prompt_text},
+    ]
+
+
+def _prompt_prefix(project_row: dict) -> str:
+    # system (PROJECT_SYSTEM_PROMPT) tüm çağrılarda, bu kısım aynı projenin tüm action'larında
+    # byte-byte aynı: provider'ın prompt prefix cache'i ikisini birlikte karşılar
+    return "=== PROJE ===\n" + _project_context(project_row, COMMON_FIELDS)
+
+
+def build_project_prompt(project_row: dict, action_key: str, upstream: dict = None) -> str:
     """
-    Returns: (prompt_text, output_text, model_used)
+    [ortak prefix: ortak proje alanları] + [action'a özel alanlar] + [önceki çıktılar] + [görev]
+    Yalnızca ACTION_DEPENDENCIES'te bildirilen alanlar ve çıktılar prompt'a girer.
+    upstream: {action_key: output_text} — ACTION_DEPENDENCIES[...]["outputs"] için önceki çıktılar
     """
     if action_key not in PROMPT_TEMPLATES:
         raise ValueError(f"Bilinmeyen action_key: {action_key}")
 
-    ctx = _project_context(project_row)
-    prompt_text = PROMPT_TEMPLATES[action_key].format(ctx=ctx)
+    deps = ACTION_DEPENDENCIES[action_key]
+    parts = [_prompt_prefix(project_row)]
+    own = [f for f in deps["fields"] if f not in COMMON_FIELDS]
+    if own:
+        parts.append("=== BÖLÜME ÖZEL PROJE BİLGİLERİ ===\n" + _project_context(project_row, own))
+    for key in deps["outputs"]:
+        text = (upstream or {}).get(key)
+        if text:
+            parts.append(f"=== {OUTPUT_LABELS.get(key, key.upper())} ===\n{text.strip()}")
+    parts.append(f"=== GÖREV ===\nBölüm: {action_key}")
+    parts.append("=== ÇIKTI ===")
+    return "\n\n".join(parts)
+
+
+def input_fingerprint(project_row: dict, action_key: str, upstream: dict = None, temperature: float = 0.2) -> str:
+    """
+    Bir çıktının girdilerinin parmak izi: model + system + temperature + kurulan prompt.
+    project_ai_outputs.input_fingerprint'e yazılır; aynıysa çıktı yeniden kullanılabilir.
+    """
+    payload = {
+        "model": MODEL,
+        "system": PROJECT_SYSTEM_PROMPT,
+        "temperature": float(temperature),
+        "prompt": build_project_prompt(project_row, action_key, upstream),
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def run_project_action(
+    project_row: dict,
+    action_key: str,
+    temperature: float = 0.2,
+    force: bool = False,
+    upstream: dict = None,
+):
+    """
+    Returns: (prompt_text, output_text, model_used, usage)
+    usage: {"prompt_tokens", "completion_tokens", "total_tokens", "cached_tokens", "latency_ms"};
+    cache'ten gelirse None
+    force=True: cache'i atla, OpenAI'dan yeniden üret (sonuç yine cache'e yazılır)
+    """
+    prompt_text = build_project_prompt(project_row, action_key, upstream)
+
+    key = llm_cache.cache_key(MODEL, PROJECT_SYSTEM_PROMPT, prompt_text, temperature)
+    if force:
+        llm_cache.note_bypass()
+    else:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            return prompt_text, cached, MODEL, None
+
+    text, usage = _chat_create(
+        chat_messages(prompt_text),
+        temperature=temperature,
+        action_key=action_key,
+    )
+
+    out = text.strip()
+    if not out:
+        raise RuntimeError("OpenAI boş çıktı döndürdü.")
 
-    resp = client.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": SYSTEM_INSTRUCTIONS},
-            {"role": "user", "content": prompt_text},
-        ],
+    llm_cache.put(key, MODEL, out)
+    return prompt_text, out, MODEL, usage
+
+
+def stream_project_action(
+    project_row: dict,
+    action_key: str,
+    temperature: float = 0.2,
+    force: bool = False,
+    upstream: dict = None,
+    usage: dict = None,
+):
+    """
+    run_project_action'ın streaming hali: çıktı parçalarını geldikçe yield eder.
+    Prompt için build_project_prompt, model için MODEL kullanılır.
+    Cache'te varsa tüm çıktı tek parça olarak döner.
+    usage dict verilirse stream bitince provider'ın token sayıları, latency_ms ve ttft_ms ile doldurulur.
+    """
+    prompt_text = build_project_prompt(project_row, action_key, upstream)
+
+    key = llm_cache.cache_key(MODEL, PROJECT_SYSTEM_PROMPT, prompt_text, temperature)
+    if force:
+        llm_cache.note_bypass()
+    else:
+        cached = llm_cache.get(key)
+        if cached is not None:
+            yield cached
+            return
+
+    stream = _chat_stream(
+        chat_messages(prompt_text),
         temperature=temperature,
+        action_key=action_key,
+        usage=usage,
     )
 
-    out = (resp.choices[0].message.content or "").strip()
+    parts = []
+    for delta in stream:
+        parts.append(delta)
+        yield delta
+
+    out = "".join(parts).strip()
     if not out:
         raise RuntimeError("OpenAI boş çıktı döndürdü.")
-    return prompt_text, out, MODEL
+    llm_cache.put(key, MODEL, out)
+
+
+async def arun_project_action(
+    project_row: dict,
+    action_key: str,
+    temperature: float = 0.2,
+    force: bool = False,
+    upstream: dict = None,
+):
+    """
+    run_project_action'ın asyncio hali (aynı dönüş değeri, aynı cache).
+    """
+    prompt_text = build_project_prompt(project_row, action_key, upstream)
+
+    key = llm_cache.cache_key(MODEL, PROJECT_SYSTEM_PROMPT, prompt_text, temperature)
+    if force:
+        llm_cache.note_bypass()
+    else:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            return prompt_text, cached, MODEL, None
+
+    text, usage = await _achat_create(
+        chat_messages(prompt_text),
+        temperature=temperature,
+        action_key=action_key,
+    )
+
+    out = text.strip()
+    if not out:
+        raise RuntimeError("OpenAI boş çıktı döndürdü.")
+
+    await asyncio.to_thread(llm_cache.put, key, MODEL, out)
+    return prompt_text, out, MODEL, usage
+
+
+async def astream_project_action(
+    project_row: dict,
+    action_key: str,
+    temperature: float = 0.2,
+    force: bool = False,
+    upstream: dict = None,
+    usage: dict = None,
+):
+    """
+    stream_project_action'ın asyncio hali (async generator).
+    """
+    prompt_text = build_project_prompt(project_row, action_key, upstream)
+
+    key = llm_cache.cache_key(MODEL, PROJECT_SYSTEM_PROMPT, prompt_text, temperature)
+    if force:
+        llm_cache.note_bypass()
+    else:
+        cached = await asyncio.to_thread(llm_cache.get, key)
+        if cached is not None:
+            yield cached
+            return
+
+    stream = await _achat_stream(
+        chat_messages(prompt_text),
+        temperature=temperature,
+        action_key=action_key,
+        usage=usage,
+    )
+
+    parts = []
+    async for delta in stream:
+        parts.append(delta)
+        yield delta
+
+    out = "".join(parts).strip()
+    if not out:
+        raise RuntimeError("OpenAI boş çıktı döndürdü.")
+    await asyncio.to_thread(llm_cache.put, key, MODEL, out)
+
+
+DOCUMENT_INSTRUCTIONS = (
+    "Aşağıdaki dokümanı proje yönergesine göre tamamla.\n"
+    "Çıktıyı düzenli başlıklar ve maddelerle ver."
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # _estimate_tokens ile aynı kaba tahmin: ~4 karakter / token
+    return len(text) // 4 + 1
+
+
+def _document_call(prompt: str) -> str:
+    output, _usage = _chat_create(chat_messages(prompt, SYSTEM_INSTRUCTIONS), temperature=0.2, action_key="document")
+    if not output or not output.strip():
+        raise RuntimeError("OpenAI boş çıktı döndürdü.")
+    return output.strip()
+
 
 def process_text_with_ai(input_text: str) -> str:
     if not input_text.strip():
         raise ValueError("AI'ye gönderilecek metin boş.")
 
-    prompt = (
-        "Aşağıdaki dokümanı proje yönergesine göre tamamla.\n"
-        "Çıktıyı düzenli başlıklar ve maddelerle ver.\n\n"
+    return _document_call(
+        f"{DOCUMENT_INSTRUCTIONS}\n\n"
         "=== DOKÜMAN ===\n"
         f"{input_text}\n"
         "=== SON ==="
     )
 
-    response = client.chat.completions.create(
-        model=MODEL,
-        messages=[
-            {"role": "system", "content": SYSTEM_INSTRUCTIONS},
-            {"role": "user", "content": prompt},
-        ],
-        temperature=0.2,
-    )
 
-    output = response.choices[0].message.content
-    if not output or not output.strip():
-        raise RuntimeError("OpenAI boş çıktı döndürdü.")
+def extract_document_notes(chunk_text: str, index: int) -> str:
+    """
+    Map adımı: büyük dokümanın bir parçasından sonraki birleştirme için notlar çıkarır.
+    """
+    return _document_call(
+        f"Aşağıdaki metin büyük bir dokümanın {index}. parçasıdır.\n"
+        "Bu parçadaki proje bilgilerini (varlıklar, alanlar, kurallar, kısıtlar, raporlama ve "
+        "erişim gereksinimleri) eksiksiz ve kısa maddeler halinde çıkar. Yorum ekleme.\n\n"
+        f"=== PARÇA {index} ===\n"
+        f"{chunk_text}\n"
+        "=== SON ==="
+    )
 
-    return output.strip()
 
+def merge_document_notes(notes, final: bool) -> str:
+    """
+    Reduce adımı: parça notlarını birleştirir. final=True son çıktıyı üretir
+    (process_text_with_ai ile aynı talimat), aksi halde ara birleştirme yapar.
+    """
+    body = "\n\n".join(f"=== NOTLAR {i} ===\n{n}" for i, n in enumerate(notes, 1))
+    if final:
+        head = (
+            "Aşağıda bir dokümandan parça parça çıkarılmış notlar var; hepsi aynı dokümana ait.\n"
+            f"{DOCUMENT_INSTRUCTIONS}"
+        )
+    else:
+        head = (
+            "Aşağıda bir dokümandan parça parça çıkarılmış notlar var.\n"
+            "Tekrarları ayıklayarak tek bir not listesinde birleştir; bilgi kaybetme."
+        )
+    return _document_call(f"{head}\n\n{body}\n=== SON ===")
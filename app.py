@@ -1,16 +1,26 @@
+import json
 import os
 import pathlib
-import re
-import zlib
-from datetime import datetime
+import uuid
 
 from dotenv import load_dotenv
-from flask import Flask, render_template, request, redirect, url_for, flash, send_file
+from flask import (Flask, render_template, request, redirect, url_for, flash, send_file, jsonify,
+                   Response, abort, stream_with_context)
 from werkzeug.utils import secure_filename
-from docx import Document
 
 import db
-from ai_processor import process_text_with_ai, run_project_action
+import llm_cache
+import metrics
+import plantuml_render
+import prefetch
+import profiling
+import singleflight
+from ai_processor import (MODEL, build_project_prompt, input_fingerprint, limiter_stats, process_text_with_ai,
+                          run_project_action, stream_project_action)
+from generation import ALL_ACTIONS, export_project_docx, load_upstream
+from documents import DOCUMENT_STEPS
+from jobs import enqueue_document_processing, enqueue_project_generation
+from plantuml_utils import sanitize_plantuml, extract_plantuml_code, plantuml_image_url
 
 load_dotenv(override=True)
 
@@ -22,10 +32,21 @@ OUTPUT_DIR.mkdir(exist_ok=True)
 
 ALLOWED_EXT = {".docx", ".txt"}
 MAX_CONTENT_LENGTH = 20 * 1024 * 1024  # 20MB
+PROJECTS_PAGE_SIZE = int(os.getenv("PROJECTS_PAGE_SIZE", "50"))
+
+# İndirmeleri web sunucusuna devret: none | sendfile (Apache/lighttpd X-Sendfile) | accel (nginx)
+DOWNLOAD_OFFLOAD = os.getenv("DOWNLOAD_OFFLOAD", "none")
+# accel: nginx'te OUTPUT_DIR'e bakan `internal` location, örn.
+#   location /_outputs/ { internal; alias /app/outputs/; }
+DOWNLOAD_ACCEL_PREFIX = os.getenv("DOWNLOAD_ACCEL_PREFIX", "/_outputs/")
+
+DOCX_MIME = "application/vnd.openxmlformats-officedocument.wordprocessingml.document"
 
 app = Flask(__name__)
 app.secret_key = os.getenv("SECRET_KEY", "dev-secret")
 app.config["MAX_CONTENT_LENGTH"] = MAX_CONTENT_LENGTH
+app.config["USE_X_SENDFILE"] = DOWNLOAD_OFFLOAD == "sendfile"
+profiling.init_app(app)  # Server-Timing, yavaş istek logu, PROFILE_ENDPOINTS
 
 
 def allowed_file(filename: str) -> bool:
@@ -33,84 +54,37 @@ def allowed_file(filename: str) -> bool:
     return ext in ALLOWED_EXT
 
 
-# --------------------------
-# PLANTUML SERVER
-# --------------------------
-PLANTUML_SERVER = os.getenv("PLANTUML_SERVER", "https://www.plantuml.com/plantuml")
-
-
-def _plantuml_encode64(data: bytes) -> str:
-    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_"
-    res = []
-    i = 0
-    while i < len(data):
-        b1 = data[i]; i += 1
-        b2 = data[i] if i < len(data) else 0; i += 1
-        b3 = data[i] if i < len(data) else 0; i += 1
-
-        c1 = b1 >> 2
-        c2 = ((b1 & 0x3) << 4) | (b2 >> 4)
-        c3 = ((b2 & 0xF) << 2) | (b3 >> 6)
-        c4 = b3 & 0x3F
-
-        res.append(alphabet[c1 & 0x3F])
-        res.append(alphabet[c2 & 0x3F])
-        res.append(alphabet[c3 & 0x3F])
-        res.append(alphabet[c4 & 0x3F])
-
-    return "".join(res)
-
-
-def _encode_plantuml_deflate(plantuml_text: str) -> str:
-    data = plantuml_text.encode("utf-8")
-    compressed = zlib.compress(data)[2:-4]  # zlib header/footer at
-    return _plantuml_encode64(compressed)
-
-
-def plantuml_image_url(plantuml_code: str, fmt: str = "png") -> str:
-    encoded = _encode_plantuml_deflate(plantuml_code)
-    return f"{PLANTUML_SERVER}/{fmt}/{encoded}"
-
-
-# -------------------------
-# PlantUML temizleme
-# -------------------------
-def sanitize_plantuml(text: str) -> str:
-    try:
-        if not text:
-            return "```plantuml\n@startuml\n@enduml\n```"
-
-        m = re.search(r"```plantuml\s*(.*?)```", text, flags=re.DOTALL | re.IGNORECASE)
-        code = (m.group(1) if m else text).strip()
-
-        cleaned_lines = []
-        for ln in code.splitlines():
-            ln2 = ln.rstrip()
-            if ln2.endswith(","):
-                ln2 = ln2[:-1].rstrip()
-            cleaned_lines.append(ln2)
-
-        code = "\n".join(cleaned_lines).strip()
-
-        low = code.lower()
-        if "@startuml" not in low:
-            code = "@startuml\n" + code
-        if "@enduml" not in low:
-            code = code + "\n@enduml"
+def send_download(path, download_name: str = None, etag: str = None):
+    """
+    OUTPUT_DIR altındaki dosyayı ETag/Last-Modified ile gönderir; If-None-Match /
+    If-Modified-Since eşleşirse 304. DOWNLOAD_OFFLOAD ile gövdeyi web sunucusu yollar.
+    """
+    path = pathlib.Path(path).resolve()
+    download_name = download_name or path.name
+
+    if DOWNLOAD_OFFLOAD == "accel":
+        st = path.stat()
+        resp = Response(mimetype=DOCX_MIME if path.suffix == ".docx" else None)
+        resp.headers["X-Accel-Redirect"] = DOWNLOAD_ACCEL_PREFIX + path.relative_to(OUTPUT_DIR).as_posix()
+        resp.headers.set("Content-Disposition", "attachment", filename=download_name)
+        resp.set_etag(etag or f"{st.st_mtime_ns:x}-{st.st_size:x}")
+        resp.last_modified = int(st.st_mtime)
+        resp = resp.make_conditional(request)
+    else:
+        # sendfile modunda send_file X-Sendfile başlığını kendisi koyar
+        resp = send_file(path, as_attachment=True, download_name=download_name, etag=etag or True)
 
-        return "```plantuml\n" + code.strip() + "\n```"
-    except Exception:
-        return "```plantuml\n" + (text or "").strip() + "\n```"
+    # tarayıcı saklayabilir ama her seferinde doğrulamalı (dosya yeniden üretilebilir)
+    resp.cache_control.private = True
+    resp.cache_control.no_cache = True
+    return resp
 
 
-def extract_plantuml_code(output_text: str) -> str:
-    """
-    sanitize_plantuml sonrası ```plantuml ... ``` bloğunun içini döndürür
-    """
-    m = re.search(r"```plantuml\s*(.*?)```", output_text, flags=re.DOTALL | re.IGNORECASE)
-    if m:
-        return m.group(1).strip()
-    return output_text.strip()
+def diagram_url(out_id: int, output_text: str, fmt: str = "svg") -> str:
+    # yerel renderer varsa kendi endpoint'imiz, yoksa public PlantUML server
+    if plantuml_render.enabled():
+        return url_for("diagram", output_id=out_id, fmt=fmt)
+    return plantuml_image_url(extract_plantuml_code(output_text), fmt=fmt)
 
 
 # =========================
@@ -118,21 +92,53 @@ def extract_plantuml_code(output_text: str) -> str:
 # =========================
 @app.get("/")
 def index():
-    rows = db.list_projects(200)
-    return render_template("index.html", rows=rows)
+    limit = max(1, min(request.args.get("limit", PROJECTS_PAGE_SIZE, type=int), 200))
+    domain = (request.args.get("domain") or "").strip() or None
+    page = db.list_projects_page(
+        limit=limit,
+        before_id=request.args.get("before", type=int),
+        after_id=request.args.get("after", type=int),
+        domain=domain,
+    )
+    return render_template("index.html", rows=page["rows"], page=page, domain=domain or "", limit=limit)
 
 
 # =========================
 # 2) DOWLAMD MODÜLÜ ENDPOINTS
 # =========================
 
+@app.post("/upload")
+def upload():
+    """
+    .docx / .txt yükler; işleme arka planda (jobs.py, documents.process_document) yapılır.
+    """
+    f = request.files.get("file")
+    if not f or not f.filename:
+        flash("Dosya seçilmedi.", "error")
+        return redirect(url_for("index"))
+    if not allowed_file(f.filename):
+        flash("Desteklenmeyen dosya türü. (.docx, .txt)", "error")
+        return redirect(url_for("index"))
+
+    name = secure_filename(f.filename) or f"upload{pathlib.Path(f.filename).suffix.lower()}"
+    input_path = UPLOAD_DIR / f"{uuid.uuid4().hex}_{name}"
+    f.save(str(input_path))
+
+    file_id = db.insert_file(original_name=f.filename, mime_type=f.mimetype or "", input_path=str(input_path))
+    enqueue_document_processing(file_id)
+    flash(f"Dosya yüklendi (ID={file_id}); işleniyor.", "ok")
+    return redirect(url_for("job_page", file_id=file_id))
+
+
 @app.get("/download/<int:file_id>")
 def download(file_id: int):
     row = db.get_file(file_id)
     if not row or row["status"] != "DONE" or not row.get("output_path"):
         flash("Bu dosya henüz indirilebilir değil.", "error")
+        if row and row["status"] in ("UPLOADED", "PROCESSING") and db.get_generation_job_by_file(file_id):
+            return redirect(url_for("job_page", file_id=file_id))
         return redirect(url_for("index"))
-    return send_file(row["output_path"], as_attachment=True)
+    return send_download(row["output_path"])
 
 
 # =========================
@@ -168,6 +174,11 @@ def projects_create():
             return redirect(url_for("index"))
         raise
 
+    try:
+        prefetch.schedule(project_id)  # PREFETCH=1: action'lar arka planda önceden üretilir
+    except Exception:
+        app.logger.warning("prefetch schedule failed for project=%s", project_id, exc_info=True)
+
     flash(f"Project oluşturuldu (ID={project_id}).", "ok")
     return redirect(url_for("project_detail", project_id=project_id))
 
@@ -175,109 +186,6 @@ def projects_create():
 # =========================
 # 4) CREATE + ALL GENERATE DOCX
 # =========================
-ALL_ACTIONS = [
-    ("business_rules", "Business Rules"),
-    ("er_tables", "ER Tables"),
-    ("missing_rules", "Missing Rules"),
-    ("normalization", "Normalization (0NF → 3NF)"),
-    ("er_plantuml", "ER Diagram (PlantUML)"),
-    ("sql_script", "SQL Script"),
-    ("report", "Report Queries"),
-]
-
-
-def _is_md_table(text: str) -> bool:
-    if not text:
-        return False
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    if len(lines) < 3:
-        return False
-
-    if not lines[0].startswith("|") or lines[0].count("|") < 3:
-        return False
-
-    sep = lines[1]
-    if not sep.startswith("|") or sep.count("|") < 3:
-        return False
-
-    allowed = set("|:- ")
-    if any(ch not in allowed and ch != "-" for ch in sep):
-        return False
-    if "-" not in sep:
-        return False
-
-    if not lines[2].startswith("|"):
-        return False
-
-    return True
-
-
-def _parse_md_table(text: str):
-    lines = [ln.strip() for ln in text.splitlines() if ln.strip()]
-    table_lines = []
-    for ln in lines:
-        if ln.startswith("|"):
-            table_lines.append(ln)
-        elif table_lines:
-            break
-
-    if len(table_lines) < 3:
-        return None
-
-    def split_row(ln: str):
-        core = ln.strip().strip("|")
-        return [c.strip() for c in core.split("|")]
-
-    header = split_row(table_lines[0])
-    rows = [split_row(ln) for ln in table_lines[2:] if ln.startswith("|")]
-
-    col_count = len(header)
-    fixed_rows = []
-    for r in rows:
-        if len(r) < col_count:
-            r = r + [""] * (col_count - len(r))
-        elif len(r) > col_count:
-            r = r[:col_count]
-        fixed_rows.append(r)
-
-    return header, fixed_rows
-
-
-def _docx_add_md_table(doc: Document, title: str, md_table_text: str) -> bool:
-    parsed = _parse_md_table(md_table_text)
-    if not parsed:
-        return False
-
-    header, rows = parsed
-
-    doc.add_heading(title, level=2)
-    table = doc.add_table(rows=1, cols=len(header))
-    table.style = "Table Grid"
-
-    hdr_cells = table.rows[0].cells
-    for i, h in enumerate(header):
-        hdr_cells[i].text = h
-
-    for r in rows:
-        row_cells = table.add_row().cells
-        for i, val in enumerate(r):
-            row_cells[i].text = val
-
-    doc.add_paragraph("")
-    return True
-
-
-def _docx_add_block(doc: Document, title: str, content: str, allow_table: bool = True):
-    if allow_table and _is_md_table(content):
-        if _docx_add_md_table(doc, title, content):
-            return
-
-    doc.add_heading(title, level=2)
-    for line in (content or "").splitlines():
-        doc.add_paragraph(line)
-    doc.add_paragraph("")
-
-
 @app.post("/projects/create_and_generate")
 def projects_create_and_generate():
     data = {
@@ -308,57 +216,40 @@ def projects_create_and_generate():
             return redirect(url_for("index"))
         raise
 
-    p = db.get_project(project_id)
-
-    doc = Document()
-    doc.add_heading(p["title"], level=1)
-    doc.add_paragraph(f"Domain: {p['domain']}")
-    doc.add_paragraph(f"Primary Entity: {p['primary_entity']}")
-    doc.add_paragraph("")
+    # üretim worker'da (jobs.py) yapılır; tarayıcı durum sayfasından takip eder
+    file_id = enqueue_project_generation(project_id)
 
-    failures = []
+    flash(f"Project oluşturuldu (ID={project_id}). Tüm çıktılar arka planda üretiliyor.", "ok")
+    return redirect(url_for("job_page", file_id=file_id))
 
-    for action_key, section_title in ALL_ACTIONS:
-        try:
-            prompt_text, output_text, model_used = run_project_action(p, action_key, temperature=0.2)
-
-        
-            if action_key == "er_plantuml":
-                output_text = sanitize_plantuml(output_text)
-                _docx_add_block(doc, section_title, output_text, allow_table=False)
-            else:
-                _docx_add_block(doc, section_title, output_text, allow_table=True)
 
-            db.insert_project_output(
-                project_id=project_id,
-                action_key=action_key,
-                prompt_text=prompt_text,
-                output_text=output_text,
-                model=model_used,
-                temperature=0.2,
-            )
+@app.get("/jobs/<int:file_id>")
+def job_page(file_id: int):
+    job = db.get_generation_job_by_file(file_id)
+    if not job:
+        flash("İş bulunamadı.", "error")
+        return redirect(url_for("index"))
+    if job["kind"] == "document":
+        return render_template("job_status.html", job=job, p=None, actions=DOCUMENT_STEPS)
+    p = db.get_project(job["project_id"])
+    return render_template("job_status.html", job=job, p=p, actions=ALL_ACTIONS)
 
-        except Exception as e:
-            failures.append(f"{action_key}: {e}")
-            _docx_add_block(doc, f"{section_title} (HATA)", str(e), allow_table=False)
 
-    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
-    out_path = OUTPUT_DIR / f"project_{project_id}_all_{ts}.docx"
-    doc.save(str(out_path))
+@app.get("/jobs/<int:file_id>/status")
+def job_status(file_id: int):
+    job = db.get_generation_job_by_file(file_id)
+    if not job:
+        return jsonify({"error": "not found"}), 404
 
-    file_id = db.insert_file(
-        original_name=f"PROJECT_{project_id}_ALL_OUTPUTS.docx",
-        mime_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
-        input_path="",
-    )
-    db.set_status(file_id, "DONE", error_message=None, output_path=str(out_path))
-
-    if failures:
-        flash("Hepsi üretildi ama bazı bölümlerde hata oldu: " + " | ".join(failures), "error")
-    else:
-        flash("Hepsi üretildi. DOCX hazır!", "ok")
-
-    return redirect(url_for("download", file_id=file_id))
+    return jsonify({
+        "file_id": job["file_id"],
+        "kind": job["kind"],
+        "project_id": job["project_id"],
+        "status": job["status"],
+        "error": job["error_message"],
+        "progress": job["progress"],
+        "download_url": url_for("download", file_id=file_id) if job["status"] == "DONE" else None,
+    })
 
 
 # =========================
@@ -371,17 +262,74 @@ def project_detail(project_id: int):
         flash("Project bulunamadı.", "error")
         return redirect(url_for("index"))
 
-    latest = {
-        "business_rules": db.get_latest_project_output(project_id, "business_rules"),
-        "er_tables": db.get_latest_project_output(project_id, "er_tables"),
-        "missing_rules": db.get_latest_project_output(project_id, "missing_rules"),
-        "normalization": db.get_latest_project_output(project_id, "normalization"),
-        "er_plantuml": db.get_latest_project_output(project_id, "er_plantuml"),
-        "sql_script": db.get_latest_project_output(project_id, "sql_script"),
-        "report": db.get_latest_project_output(project_id, "report"),
+    latest = db.get_latest_project_outputs(project_id, [key for key, _ in ALL_ACTIONS])
+    prefetch.touch(project_id)
+
+    return render_template("project_detail.html", p=p, latest=latest, prefetch=prefetch.job_summary(project_id))
+
+
+@app.post("/project/<int:project_id>/prefetch/cancel")
+def project_prefetch_cancel(project_id: int):
+    if prefetch.cancel(project_id):
+        flash("Arka plan ön üretimi durduruldu.", "ok")
+    return redirect(url_for("project_detail", project_id=project_id))
+
+
+@app.get("/project/<int:project_id>/export")
+def project_export(project_id: int):
+    """
+    Son kayıtlı çıktılardan DOCX (LLM çağrısı yok); aynı çıktı seti için disk cache'ten.
+    """
+    p = db.get_project(project_id)
+    if not p:
+        flash("Project bulunamadı.", "error")
+        return redirect(url_for("index"))
+
+    path, key = export_project_docx(p)
+    return send_download(path, download_name=f"project_{project_id}.docx", etag=key)
+
+
+@app.post("/project/<int:project_id>/edit")
+def project_edit(project_id: int):
+    p = db.get_project(project_id)
+    if not p:
+        flash("Project bulunamadı.", "error")
+        return redirect(url_for("index"))
+
+    data = {
+        "domain": (request.form.get("domain") or "").strip(),
+        "primary_entity": (request.form.get("primary_entity") or "").strip(),
+        "constraints_text": (request.form.get("constraints_text") or "").strip(),
+        "advanced_feature": (request.form.get("advanced_feature") or "").strip(),
+        "security_access": (request.form.get("security_access") or "").strip(),
+        "reporting_requirement": (request.form.get("reporting_requirement") or "").strip(),
+        "common_tasks": (request.form.get("common_tasks") or "").strip(),
     }
+    if not data["domain"] or not data["primary_entity"]:
+        flash("Domain ve Primary Entity zorunlu.", "error")
+        return redirect(url_for("project_detail", project_id=project_id))
 
-    return render_template("project_detail.html", p=p, latest=latest)
+    db.update_project(project_id, data)
+
+    if request.form.get("regenerate") == "1":
+        return project_regenerate(project_id)
+
+    flash("Project güncellendi.", "ok")
+    return redirect(url_for("project_detail", project_id=project_id))
+
+
+@app.post("/project/<int:project_id>/regenerate")
+def project_regenerate(project_id: int):
+    """
+    Girdisi değişen action'ları yeniden üretir, diğerlerini yeniden kullanır; DOCX üretir.
+    """
+    if not db.get_project(project_id):
+        flash("Project bulunamadı.", "error")
+        return redirect(url_for("index"))
+
+    file_id = enqueue_project_generation(project_id)
+    flash("Değişen bölümler arka planda yeniden üretiliyor.", "ok")
+    return redirect(url_for("job_page", file_id=file_id))
 
 
 # =========================
@@ -393,34 +341,62 @@ def project_run(project_id: int, action_key: str):
     if not p:
         flash("Project bulunamadı.", "error")
         return redirect(url_for("index"))
-    
 
-    try:
-        prompt_text, output_text, model_used = run_project_action(p, action_key, temperature=0.2)
+    force = request.values.get("force") == "1"  # "Yeniden üret": LLM cache'i atla
 
-        img_url = None
-        if action_key == "er_plantuml":
-            output_text = sanitize_plantuml(output_text)
-            code = extract_plantuml_code(output_text)
-            img_url = plantuml_image_url(code, fmt="svg")
+    try:
+        # ön üretim bu action'ı bitirdiyse / şu an üretiyorsa ikinci çağrı yapılmaz
+        ready = None if force else prefetch.ready_output(p, action_key)
+        if ready:
+            row, _ = ready
+            output_text = row["output_text"]
+            return render_template(
+                "index_yeni.html",
+                p=p,
+                action_key=action_key,
+                output_text=output_text,
+                prompt_text=db.get_project_output_prompt(row["id"]),
+                model=row["model"],
+                out_id=row["id"],
+                img_url=diagram_url(row["id"], output_text) if action_key == "er_plantuml" else None,
+            )
 
-        out_id = db.insert_project_output(
-            project_id=project_id,
-            action_key=action_key,
-            prompt_text=prompt_text,
-            output_text=output_text,
-            model=model_used,
-            temperature=0.2,
-        )
+        upstream = load_upstream(project_id, action_key)
+        # aynı anda gelen aynı istekler (çift tıklama, birkaç kullanıcı) tek LLM çağrısını paylaşır
+        with singleflight.flight(singleflight.generation_key(p, action_key, upstream, force)) as f:
+            if f.result is None:
+                prompt_text, output_text, model_used, usage = run_project_action(
+                    p, action_key, temperature=0.2, force=force, upstream=upstream
+                )
+
+                if action_key == "er_plantuml":
+                    with profiling.phase("plantuml"):
+                        output_text = sanitize_plantuml(output_text)
+
+                out_id = db.insert_project_output(
+                    project_id=project_id,
+                    action_key=action_key,
+                    prompt_text=prompt_text,
+                    output_text=output_text,
+                    model=model_used,
+                    temperature=0.2,
+                    input_fingerprint=input_fingerprint(p, action_key, upstream, 0.2),
+                    **db.usage_columns(usage),
+                )
+                f.result = {"out_id": out_id, "output_text": output_text, "prompt_text": prompt_text,
+                            "model": model_used}
+
+        r = f.result
+        img_url = diagram_url(r["out_id"], r["output_text"]) if action_key == "er_plantuml" else None
 
         return render_template(
             "index_yeni.html",
             p=p,
             action_key=action_key,
-            output_text=output_text,
-            prompt_text=prompt_text,
-            model=model_used,
-            out_id=out_id,
+            output_text=r["output_text"],
+            prompt_text=r["prompt_text"],
+            model=r["model"],
+            out_id=r["out_id"],
             img_url=img_url,   
         )
 
@@ -433,5 +409,168 @@ def project_run(project_id: int, action_key: str):
         )
 
 
+# =========================
+# 7) RUN ACTION (STREAMING / SSE)
+# =========================
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# LLM çağrısı (ücretli) ve DB yazısı yalnızca POST ile: crawler / link önizleme / tarayıcı
+# prefetch'i GET ile üretim tetikleyemez. Sayfa stream'i fetch(POST) ile okur.
+@app.post("/project/<int:project_id>/live/<action_key>")
+def project_live(project_id: int, action_key: str):
+    p = db.get_project(project_id)
+    if not p:
+        flash("Project bulunamadı.", "error")
+        return redirect(url_for("index"))
+
+    prefetch.touch(project_id)
+    stream_url = url_for(
+        "project_stream",
+        project_id=project_id,
+        action_key=action_key,
+        force=request.values.get("force") or None,
+    )
+    return render_template("index_yeni.html", p=p, action_key=action_key, stream_url=stream_url)
+
+
+@app.post("/project/<int:project_id>/stream/<action_key>")
+def project_stream(project_id: int, action_key: str):
+    p = db.get_project(project_id)
+    if not p:
+        return jsonify({"error": "Project bulunamadı."}), 404
+
+    force = request.args.get("force") == "1"
+
+    def events():
+        try:
+            ready = None if force else prefetch.ready_output(p, action_key)
+            if ready:
+                row, _ = ready
+                yield _sse("token", row["output_text"])
+                yield _sse("done", {
+                    "out_id": row["id"],
+                    "output_text": row["output_text"],
+                    "prompt_text": db.get_project_output_prompt(row["id"]),
+                    "model": row["model"],
+                    "img_url": diagram_url(row["id"], row["output_text"]) if action_key == "er_plantuml" else None,
+                })
+                return
+
+            upstream = load_upstream(project_id, action_key)
+            with singleflight.flight(singleflight.generation_key(p, action_key, upstream, force)) as f:
+                if f.result is None:
+                    prompt_text = build_project_prompt(p, action_key, upstream)
+                    parts = []
+                    usage = {}
+                    for delta in stream_project_action(
+                        p, action_key, temperature=0.2, force=force, upstream=upstream, usage=usage
+                    ):
+                        parts.append(delta)
+                        yield _sse("token", delta)
+
+                    output_text = "".join(parts).strip()
+                    if action_key == "er_plantuml":
+                        with profiling.phase("plantuml"):
+                            output_text = sanitize_plantuml(output_text)
+
+                    out_id = db.insert_project_output(
+                        project_id=project_id,
+                        action_key=action_key,
+                        prompt_text=prompt_text,
+                        output_text=output_text,
+                        model=MODEL,
+                        temperature=0.2,
+                        input_fingerprint=input_fingerprint(p, action_key, upstream, 0.2),
+                        **db.usage_columns(usage),
+                    )
+                    f.result = {"out_id": out_id, "output_text": output_text, "prompt_text": prompt_text,
+                                "model": MODEL}
+                else:
+                    # başka bir istek üretti: tamamı tek parça
+                    yield _sse("token", f.result["output_text"])
+
+            r = f.result
+            img_url = diagram_url(r["out_id"], r["output_text"]) if action_key == "er_plantuml" else None
+
+            yield _sse("done", {
+                "out_id": r["out_id"],
+                "output_text": r["output_text"],
+                "prompt_text": r["prompt_text"],
+                "model": r["model"],
+                "img_url": img_url,
+            })
+        except Exception as e:
+            yield _sse("error", str(e))
+
+    return Response(
+        stream_with_context(events()),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+# =========================
+# 8) PLANTUML DIAGRAM (yerel render + disk cache)
+# =========================
+@app.get("/diagram/<int:output_id>.<fmt>")
+def diagram(output_id: int, fmt: str):
+    if fmt not in plantuml_render.FORMATS:
+        abort(404)
+
+    row = db.get_project_output(output_id)
+    if not row or row["action_key"] != "er_plantuml":
+        abort(404)
+
+    code = extract_plantuml_code(row["output_text"])
+    if not plantuml_render.enabled():
+        return redirect(plantuml_image_url(code, fmt=fmt))
+
+    try:
+        path = plantuml_render.render_cached(code, fmt)
+    except Exception:
+        app.logger.warning("plantuml render failed for output=%s", output_id, exc_info=True)
+        return redirect(plantuml_image_url(code, fmt=fmt))
+
+    # output satırları değişmez: içerik hash'i ETag, tarayıcıda süresiz cache
+    resp = send_file(path, mimetype=plantuml_render.FORMATS[fmt], etag=path.stem, max_age=31536000)
+    resp.cache_control.public = True
+    resp.cache_control.immutable = True
+    return resp
+
+
+# =========================
+# METRICS (Prometheus)
+# =========================
+metrics.stats_collector(
+    "db_pool", db.pool_stats,
+    counters=("acquired", "created", "recycled", "timeouts", "health_check_failures", "waits",
+              "wait_seconds_total", "discarded"),
+)
+metrics.stats_collector(
+    "db_cache", db.cache_stats,
+    counters=("hits", "misses", "evictions", "invalidations", "expired", "sync_received", "sync_errors"),
+)
+metrics.stats_collector(
+    "llm_cache", llm_cache.stats,
+    counters=("hits_memory", "hits_persistent", "misses", "bypassed", "stores", "errors", "memory_evictions"),
+)
+metrics.stats_collector(
+    "singleflight", singleflight.stats,
+    counters=("leaders", "shared_local", "shared_remote", "failed", "abandoned", "wait_timeouts", "lease_errors"),
+)
+metrics.stats_collector(
+    "llm_limiter", limiter_stats,
+    counters=("calls", "rate_limited", "retries", "failures", "throttle_wait_seconds"),
+)
+
+
+@app.get("/metrics")
+def metrics_endpoint():
+    return Response(metrics.render(), mimetype="text/plain; version=0.0.4")
+
+
 if __name__ == "__main__":
+    db.check_cache_sync()
     app.run(debug=True)
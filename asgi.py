@@ -0,0 +1,264 @@
+"""
+Async (ASGI) giriş noktası:
+
+    pip install -r requirements-async.txt
+    hypercorn asgi:app --bind 0.0.0.0:8000 --workers 2
+
+LLM çağrısı süresince bekleyen route'lar (project_run, project_stream) Quart ile
+async çalışır: LLM isteği AsyncOpenAI, DB erişimi aiomysql (db_async) ile yapılır,
+bekleyen üretim bir thread tutmaz. Aynı anda gelen aynı istekler (singleflight.aflight)
+Flask route'larıyla ve diğer process'lerle tek üretimi paylaşır. Diğer tüm route'lar app.py'deki Flask
+uygulamasına (a2wsgi, ASGI_WSGI_THREADS thread) aynen gider; sync giriş noktası
+(wsgi.py + gunicorn) değişmeden kullanılabilir.
+
+Bir process'teki eşzamanlı LLM çağrısı üst sınırı LLM_MAX_CONCURRENCY (limiter),
+DB bağlantısı üst sınırı DB_POOL_SIZE'dır.
+"""
+import asyncio
+import json
+import os
+
+from a2wsgi import WSGIMiddleware
+from quart import (Quart, Response, flash, jsonify, redirect, render_template, request, stream_with_context,
+                   url_for)
+from werkzeug.exceptions import HTTPException
+from werkzeug.routing import Rule
+
+import db
+import db_async
+import plantuml_render
+import prefetch
+import singleflight
+from ai_processor import (MODEL, action_output_deps, arun_project_action, astream_project_action,
+                          build_project_prompt, input_fingerprint)
+from app import app as flask_app
+from plantuml_utils import extract_plantuml_code, plantuml_image_url, sanitize_plantuml
+
+ASGI_WSGI_THREADS = int(os.getenv("ASGI_WSGI_THREADS", "16"))  # Flask'a giden route'lar için
+
+quart_app = Quart(
+    __name__,
+    template_folder=flask_app.template_folder,
+    static_folder=flask_app.static_folder,
+    static_url_path=flask_app.static_url_path,
+)
+# aynı secret_key: flash mesajları Flask ve Quart arasında aynı session cookie'sinde taşınır
+quart_app.secret_key = flask_app.secret_key
+
+# url_for(...) Flask endpoint'leri için de çalışsın (yalnızca URL üretimi; istekler Flask'a gider)
+for _rule in flask_app.url_map.iter_rules():
+    if _rule.endpoint != "static":
+        quart_app.url_map.add(Rule(_rule.rule, endpoint=_rule.endpoint, methods=_rule.methods))
+
+ASYNC_ENDPOINTS = set()
+
+
+def async_route(rule: str, **options):
+    def decorator(fn):
+        ASYNC_ENDPOINTS.add(fn.__name__)
+        return quart_app.route(rule, endpoint=fn.__name__, **options)(fn)
+    return decorator
+
+
+async def load_upstream(project_id: int, action_key: str) -> dict:
+    # generation.load_upstream'in async hali
+    deps = action_output_deps(action_key)
+    if not deps:
+        return {}
+    latest = await db_async.get_latest_project_outputs(project_id, deps)
+    return {k: row["output_text"] for k, row in latest.items() if row}
+
+
+def diagram_url(out_id: int, output_text: str, fmt: str = "svg") -> str:
+    if plantuml_render.enabled():
+        return url_for("diagram", output_id=out_id, fmt=fmt)
+    return plantuml_image_url(extract_plantuml_code(output_text), fmt=fmt)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+# =========================
+# RUN ACTION (app.project_run)
+# =========================
+@async_route("/project/<int:project_id>/run/<action_key>", methods=["POST"])
+async def project_run(project_id: int, action_key: str):
+    p = await db_async.get_project(project_id)
+    if not p:
+        await flash("Project bulunamadı.", "error")
+        return redirect(url_for("index"))
+
+    values = await request.values
+    force = values.get("force") == "1"
+
+    try:
+        # ön üretim beklemesi DB yoklamasıdır; thread'de
+        ready = None if force else await asyncio.to_thread(prefetch.ready_output, p, action_key)
+        if ready:
+            row, _ = ready
+            return await render_template(
+                "index_yeni.html",
+                p=p,
+                action_key=action_key,
+                output_text=row["output_text"],
+                prompt_text=await asyncio.to_thread(db.get_project_output_prompt, row["id"]),
+                model=row["model"],
+                out_id=row["id"],
+                img_url=diagram_url(row["id"], row["output_text"]) if action_key == "er_plantuml" else None,
+            )
+
+        upstream = await load_upstream(project_id, action_key)
+        async with singleflight.aflight(singleflight.generation_key(p, action_key, upstream, force)) as f:
+            if f.result is None:
+                prompt_text, output_text, model_used, usage = await arun_project_action(
+                    p, action_key, temperature=0.2, force=force, upstream=upstream
+                )
+
+                if action_key == "er_plantuml":
+                    output_text = sanitize_plantuml(output_text)
+
+                out_id = await db_async.insert_project_output(
+                    project_id=project_id,
+                    action_key=action_key,
+                    prompt_text=prompt_text,
+                    output_text=output_text,
+                    model=model_used,
+                    temperature=0.2,
+                    input_fingerprint=input_fingerprint(p, action_key, upstream, 0.2),
+                    **db_async.usage_columns(usage),
+                )
+                f.result = {"out_id": out_id, "output_text": output_text, "prompt_text": prompt_text,
+                            "model": model_used}
+
+        r = f.result
+        img_url = diagram_url(r["out_id"], r["output_text"]) if action_key == "er_plantuml" else None
+
+        return await render_template(
+            "index_yeni.html",
+            p=p,
+            action_key=action_key,
+            output_text=r["output_text"],
+            prompt_text=r["prompt_text"],
+            model=r["model"],
+            out_id=r["out_id"],
+            img_url=img_url,
+        )
+
+    except Exception as e:
+        return await render_template(
+            "index_yeni.html",
+            p=p,
+            action_key=action_key,
+            error=str(e),
+        )
+
+
+# =========================
+# RUN ACTION (STREAMING / SSE) (app.project_stream)
+# =========================
+@async_route("/project/<int:project_id>/stream/<action_key>", methods=["POST"])
+async def project_stream(project_id: int, action_key: str):
+    p = await db_async.get_project(project_id)
+    if not p:
+        return jsonify({"error": "Project bulunamadı."}), 404
+
+    force = request.args.get("force") == "1"
+
+    @stream_with_context
+    async def events():
+        try:
+            ready = None if force else await asyncio.to_thread(prefetch.ready_output, p, action_key)
+            if ready:
+                row, _ = ready
+                yield _sse("token", row["output_text"])
+                yield _sse("done", {
+                    "out_id": row["id"],
+                    "output_text": row["output_text"],
+                    "prompt_text": await asyncio.to_thread(db.get_project_output_prompt, row["id"]),
+                    "model": row["model"],
+                    "img_url": diagram_url(row["id"], row["output_text"]) if action_key == "er_plantuml" else None,
+                })
+                return
+
+            upstream = await load_upstream(project_id, action_key)
+            async with singleflight.aflight(singleflight.generation_key(p, action_key, upstream, force)) as f:
+                if f.result is None:
+                    prompt_text = build_project_prompt(p, action_key, upstream)
+                    parts = []
+                    usage = {}
+                    async for delta in astream_project_action(
+                        p, action_key, temperature=0.2, force=force, upstream=upstream, usage=usage
+                    ):
+                        parts.append(delta)
+                        yield _sse("token", delta)
+
+                    output_text = "".join(parts).strip()
+                    if action_key == "er_plantuml":
+                        output_text = sanitize_plantuml(output_text)
+
+                    out_id = await db_async.insert_project_output(
+                        project_id=project_id,
+                        action_key=action_key,
+                        prompt_text=prompt_text,
+                        output_text=output_text,
+                        model=MODEL,
+                        temperature=0.2,
+                        input_fingerprint=input_fingerprint(p, action_key, upstream, 0.2),
+                        **db_async.usage_columns(usage),
+                    )
+                    f.result = {"out_id": out_id, "output_text": output_text, "prompt_text": prompt_text,
+                                "model": MODEL}
+                else:
+                    yield _sse("token", f.result["output_text"])
+
+            r = f.result
+            img_url = diagram_url(r["out_id"], r["output_text"]) if action_key == "er_plantuml" else None
+
+            yield _sse("done", {
+                "out_id": r["out_id"],
+                "output_text": r["output_text"],
+                "prompt_text": r["prompt_text"],
+                "model": r["model"],
+                "img_url": img_url,
+            })
+        except Exception as e:
+            yield _sse("error", str(e))
+
+    return Response(
+        events(),
+        mimetype="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@quart_app.before_serving
+async def _check_cache_sync():
+    await asyncio.to_thread(db.check_cache_sync)
+
+
+@quart_app.after_serving
+async def _close_db_pool():
+    await db_async.close_pool()
+
+
+# =========================
+# ASGI dispatch: async route'lar Quart'a, kalanlar Flask'a
+# =========================
+_wsgi = WSGIMiddleware(flask_app, workers=ASGI_WSGI_THREADS)
+_adapter = quart_app.url_map.bind("")
+
+
+def _is_async(scope) -> bool:
+    try:
+        endpoint, _ = _adapter.match(scope["path"], method=scope["method"])
+    except HTTPException:
+        return False
+    return endpoint in ASYNC_ENDPOINTS
+
+
+async def app(scope, receive, send):
+    if scope["type"] == "http" and not _is_async(scope):
+        await _wsgi(scope, receive, send)
+    else:
+        await quart_app(scope, receive, send)  # lifespan dahil
@@ -0,0 +1,101 @@
+"""
+DOCX tablo yazımı micro-benchmark'ı: docx_export.docx_add_md_table (tek parça XML)
+ile eski hücre hücre python-docx yolu karşılaştırılır.
+
+  python -m bench.docx_tables --rows 10,100,1000,5000 --cols 6 --repeat 3
+
+Her boyut için iki yolun ürettiği tablo XML'inin aynı olduğu da doğrulanır.
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+from docx_export import docx_add_md_table, parse_md_table
+
+
+def legacy_add_md_table(doc, title: str, md_table_text: str) -> bool:
+    """Eski yol: add_row().cells + cell.text (karşılaştırma için)."""
+    parsed = parse_md_table(md_table_text)
+    if not parsed:
+        return False
+
+    header, rows = parsed
+
+    doc.add_heading(title, level=2)
+    table = doc.add_table(rows=1, cols=len(header))
+    table.style = "Table Grid"
+
+    hdr_cells = table.rows[0].cells
+    for i, h in enumerate(header):
+        hdr_cells[i].text = h
+
+    for r in rows:
+        row_cells = table.add_row().cells
+        for i, val in enumerate(r):
+            row_cells[i].text = val
+
+    doc.add_paragraph("")
+    return True
+
+
+def make_md_table(rows: int, cols: int, seed: int = 0) -> str:
+    rnd = random.Random(seed)
+    words = ["kullanici", "siparis", "urun", "odeme", "rol", "kayit", "durum", "tarih", "<fk>", "a & b"]
+    header = "| " + " | ".join(f"Kolon {c}" for c in range(cols)) + " |"
+    sep = "|" + "---|" * cols
+    body = [
+        "| " + " | ".join(" ".join(rnd.choices(words, k=rnd.randint(0, 6))) for _ in range(cols)) + " |"
+        for _ in range(rows)
+    ]
+    return "\n".join([header, sep, *body])
+
+
+def _table_xml(fn, md: str) -> str:
+    from docx import Document
+
+    doc = Document()
+    fn(doc, "T", md)
+    return doc.tables[0]._tbl.xml
+
+
+def _time(fn, md: str, repeat: int) -> float:
+    from docx import Document
+
+    best = float("inf")
+    for _ in range(repeat):
+        doc = Document()
+        started = time.perf_counter()
+        fn(doc, "T", md)
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="DOCX tablo yazımı benchmark'ı")
+    parser.add_argument("--rows", default="10,100,1000,5000")
+    parser.add_argument("--cols", type=int, default=6)
+    parser.add_argument("--repeat", type=int, default=3, help="en iyi süre raporlanır")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'rows':>7}{'legacy ms':>12}{'bulk ms':>12}{'speedup':>10}  same_xml")
+    for n in [int(x) for x in args.rows.split(",") if x.strip()]:
+        md = make_md_table(n, args.cols, seed=n)
+        same = _table_xml(legacy_add_md_table, md) == _table_xml(docx_add_md_table, md)
+        legacy = _time(legacy_add_md_table, md, args.repeat)
+        bulk = _time(docx_add_md_table, md, args.repeat)
+        results.append({"rows": n, "cols": args.cols, "legacy_ms": legacy * 1000, "bulk_ms": bulk * 1000,
+                        "speedup": legacy / bulk if bulk else 0.0, "same_xml": same})
+        print(f"{n:>7}{legacy * 1000:>12.1f}{bulk * 1000:>12.1f}{legacy / bulk:>9.1f}x  {same}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0 if all(r["same_xml"] for r in results) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
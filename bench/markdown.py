@@ -0,0 +1,83 @@
+"""
+md_blocks.tokenize benchmark'ı: çok MB'lık sentetik LLM çıktılarında süre ve
+MB/s; boyut iki katına çıkınca sürenin de ~iki katı olması beklenir (doğrusal).
+
+  python -m bench.markdown --sizes-mb 1,2,4,8 --repeat 3
+  python -m bench.markdown --sizes-mb 1 --docx     # docx_add_block dahil
+"""
+import argparse
+import json
+import random
+import sys
+import time
+
+import md_blocks
+
+
+def make_output(size_bytes: int, seed: int = 0) -> str:
+    """Başlık + tablo + paragraf + code fence karışımı (normalization çıktısına benzer)."""
+    rnd = random.Random(seed)
+    words = ["kullanici", "siparis", "urun", "odeme", "rol", "kayit", "durum", "tarih", "a\\|b", "tutar"]
+    parts, size, n = [], 0, 0
+    while size < size_bytes:
+        n += 1
+        chunk = [f"## {n}NF", "", "| Tablo | Kolon | Anahtar | Açıklama |", "|---|---|:---:|---|"]
+        chunk += [
+            "| " + " | ".join(" ".join(rnd.choices(words, k=3)) for _ in range(4)) + " |"
+            for _ in range(rnd.randint(5, 40))
+        ]
+        chunk += ["", " ".join(rnd.choices(words, k=20)), ""]
+        if n % 3 == 0:
+            chunk += ["```sql", *(f"CREATE TABLE t{n}_{i} (id INT PRIMARY KEY);" for i in range(10)), "```", ""]
+        text = "\n".join(chunk) + "\n"
+        parts.append(text)
+        size += len(text.encode("utf-8"))
+    return "".join(parts)
+
+
+def _time(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        best = min(best, time.perf_counter() - started)
+    return best
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Markdown tokenizer benchmark'ı")
+    parser.add_argument("--sizes-mb", default="1,2,4,8")
+    parser.add_argument("--repeat", type=int, default=3, help="en iyi süre raporlanır")
+    parser.add_argument("--docx", action="store_true", help="docx_add_block süresini de ölç")
+    parser.add_argument("--json", dest="json_path")
+    args = parser.parse_args(argv)
+
+    results = []
+    print(f"{'MB':>6}{'blocks':>9}{'tables':>8}{'tokenize ms':>14}{'MB/s':>8}{'docx ms':>10}")
+    for mb in [float(x) for x in args.sizes_mb.split(",") if x.strip()]:
+        text = make_output(int(mb * 1024 * 1024), seed=int(mb * 10))
+        blocks = list(md_blocks.tokenize(text))
+        tables = sum(1 for b in blocks if b.kind == "table")
+        tok = _time(lambda: sum(1 for _ in md_blocks.tokenize(text)), args.repeat)
+
+        docx_ms = None
+        if args.docx:
+            from docx import Document
+
+            from docx_export import docx_add_block
+
+            docx_ms = _time(lambda: docx_add_block(Document(), "Bench", text), 1) * 1000
+
+        results.append({"mb": mb, "blocks": len(blocks), "tables": tables,
+                        "tokenize_ms": tok * 1000, "mb_per_s": mb / tok if tok else 0.0, "docx_ms": docx_ms})
+        print(f"{mb:>6.1f}{len(blocks):>9}{tables:>8}{tok * 1000:>14.1f}{mb / tok:>8.1f}"
+              f"{docx_ms if docx_ms is not None else float('nan'):>10.1f}")
+
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
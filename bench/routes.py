@@ -0,0 +1,216 @@
+"""
+app.py route benchmark'ı — OpenAI'a para ödemeden (LLM_BACKEND=fake).
+
+  # MySQL: docker compose -f bench/docker-compose.yml up -d
+  DB_PORT=3307 DB_PASSWORD=bench python -m bench.routes --requests 200 --concurrency 16
+
+  # çalışan bir sunucuya karşı (sunucu LLM_BACKEND=fake ile başlatılmalı)
+  python -m bench.routes --base-url http://127.0.0.1:8000
+
+Her senaryo için p50/p95/p99 gecikme ve throughput (req/s) raporlanır.
+Sahte backend ayarları: LLM_FAKE_LATENCY_MS, LLM_FAKE_TTFT_MS, LLM_FAKE_ROWS.
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+
+ACTIONS = ["business_rules", "er_tables", "missing_rules", "normalization", "er_plantuml", "sql_script", "report"]
+
+
+def percentile(sorted_vals, p: float) -> float:
+    if not sorted_vals:
+        return 0.0
+    # nearest-rank
+    k = max(0, min(len(sorted_vals) - 1, math.ceil(p / 100.0 * len(sorted_vals)) - 1))
+    return sorted_vals[k]
+
+
+# -------------------------
+# HTTP istemcileri
+# -------------------------
+class InProcessClient:
+    """Flask test client: sunucu gerekmez, WSGI katmanı dahil ölçülür."""
+
+    def __init__(self):
+        from app import app
+
+        self._c = app.test_client()
+
+    def get(self, path: str):
+        r = self._c.get(path)
+        return r.status_code, r.headers.get("Location")
+
+    def post(self, path: str, data: dict):
+        r = self._c.post(path, data=data)
+        return r.status_code, r.headers.get("Location")
+
+
+class HttpClient:
+    def __init__(self, base_url: str):
+        import httpx
+
+        self._c = httpx.Client(base_url=base_url, timeout=300, follow_redirects=False)
+
+    def get(self, path: str):
+        r = self._c.get(path)
+        return r.status_code, r.headers.get("location")
+
+    def post(self, path: str, data: dict):
+        r = self._c.post(path, data=data)
+        return r.status_code, r.headers.get("location")
+
+
+def project_form(prefix: str) -> dict:
+    return {
+        "title": f"{prefix}-{uuid.uuid4().hex[:12]}",
+        "domain": "teams, players, matches",
+        "primary_entity": "Matches",
+        "constraints_text": "Bir oyuncu aynı anda tek takımda olabilir",
+        "advanced_feature": "Maç istatistikleri",
+        "security_access": "Admin / Coach / Viewer",
+        "reporting_requirement": "Sezon bazlı oyuncu performansı",
+        "common_tasks": "Maç kaydı, transfer",
+    }
+
+
+# -------------------------
+# Senaryolar
+# -------------------------
+def run_scenario(name: str, make_client, fn, total: int, concurrency: int) -> dict:
+    local = threading.local()
+    latencies = []
+    errors = []
+    lock = threading.Lock()
+
+    def one(i: int):
+        if not hasattr(local, "client"):
+            local.client = make_client()
+        started = time.perf_counter()
+        try:
+            status = fn(local.client, i)
+            ok = status < 400
+        except Exception as e:
+            ok = False
+            status = repr(e)
+        elapsed = time.perf_counter() - started
+        with lock:
+            latencies.append(elapsed)
+            if not ok:
+                errors.append(status)
+
+    wall_start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(one, range(total)))
+    wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": total / wall if wall else 0.0,
+    }
+
+
+def seed_project(client) -> int:
+    status, location = client.post("/projects/create", project_form("bench-seed"))
+    m = re.search(r"/project/(\d+)", location or "")
+    if status >= 400 or not m:
+        raise SystemExit(f"Seed project oluşturulamadı (status={status}, location={location}).")
+    return int(m.group(1))
+
+
+def drain_jobs(workers: int) -> dict:
+    """create_and_generate ile kuyruğa giren işleri process içinde tüketir."""
+    import jobs
+
+    started = time.perf_counter()
+    threads = [threading.Thread(target=jobs.run_worker, kwargs={"once": True}) for _ in range(workers)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return {"scenario": "jobs_drain", "workers": workers, "seconds": time.perf_counter() - started}
+
+
+def print_report(results):
+    print(f"{'scenario':<24}{'reqs':>7}{'conc':>6}{'err':>6}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'req/s':>10}")
+    for r in results:
+        if "p50_ms" not in r:
+            print(f"{r['scenario']:<24}" + "  ".join(f"{k}={v:.3f}" if isinstance(v, float) else f"{k}={v}"
+                                                   for k, v in r.items() if k != "scenario"))
+            continue
+        print(
+            f"{r['scenario']:<24}{r['requests']:>7}{r['concurrency']:>6}{r['errors']:>6}"
+            f"{r['p50_ms']:>10.1f}{r['p95_ms']:>10.1f}{r['p99_ms']:>10.1f}{r['throughput_rps']:>10.1f}"
+        )
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="app.py route benchmark (fake LLM)")
+    parser.add_argument("--base-url", help="çalışan sunucu; verilmezse Flask test client kullanılır")
+    parser.add_argument("--requests", type=int, default=100, help="senaryo başına istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--scenarios", default="index,project_detail,project_run,project_run_cached,create_and_generate")
+    parser.add_argument("--drain-jobs", type=int, default=0, metavar="N",
+                        help="create_and_generate işlerini N worker thread ile tüket ve süreyi ölç")
+    parser.add_argument("--startup-runs", type=int, default=3,
+                        help="import/başlangıç süresi ölçüm tekrarı (0 = ölçme)")
+    parser.add_argument("--json", dest="json_path", help="sonuçları JSON olarak bu dosyaya yaz")
+    args = parser.parse_args(argv)
+
+    if args.base_url:
+        def make_client():
+            return HttpClient(args.base_url)
+    else:
+        make_client = InProcessClient
+
+    project_id = seed_project(make_client())
+
+    scenarios = {
+        "index": lambda c, i: c.get("/")[0],
+        "project_detail": lambda c, i: c.get(f"/project/{project_id}")[0],
+        "project_run": lambda c, i: c.post(f"/project/{project_id}/run/{ACTIONS[i % len(ACTIONS)]}",
+                                           {"force": "1"})[0],
+        "project_run_cached": lambda c, i: c.post(f"/project/{project_id}/run/{ACTIONS[i % len(ACTIONS)]}", {})[0],
+        "create_and_generate": lambda c, i: c.post("/projects/create_and_generate", project_form("bench"))[0],
+    }
+
+    results = []
+    if args.startup_runs:
+        from bench import startup
+
+        results.extend(startup.measure(args.startup_runs))
+
+    for name in [s.strip() for s in args.scenarios.split(",") if s.strip()]:
+        if name not in scenarios:
+            raise SystemExit(f"Bilinmeyen senaryo: {name}")
+        results.append(run_scenario(name, make_client, scenarios[name], args.requests, args.concurrency))
+
+    if args.drain_jobs:
+        if args.base_url:
+            raise SystemExit("--drain-jobs sadece process içi modda kullanılabilir.")
+        results.append(drain_jobs(args.drain_jobs))
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,162 @@
+"""
+Sync (gunicorn + Flask) ve async (hypercorn + Quart, asgi.py) serving karşılaştırması,
+eşzamanlı yük altında — OpenAI'a para ödemeden (LLM_BACKEND=fake).
+
+  docker compose -f bench/docker-compose.yml up -d
+  pip install -r requirements-async.txt
+  DB_PORT=3307 DB_PASSWORD=bench python -m bench.serving --concurrency 200 --requests 600
+
+Her mod için sunucu ayrı process'te, aynı ortamla başlatılır; senaryolar httpx.AsyncClient
+ile koşulur. Varsayılan olarak iki mod da tek worker process'tir: sync modda eşzamanlı
+istek üst sınırı --threads, async modda limiter (LLM_MAX_CONCURRENCY) ve DB_POOL_SIZE'dır.
+Limiter'ın RPM/TPM sınırları karşılaştırmayı bozmasın diye yükseltilir.
+"""
+import argparse
+import asyncio
+import json
+import os
+import pathlib
+import subprocess
+import sys
+import time
+
+from bench.routes import ACTIONS, HttpClient, percentile, print_report, seed_project
+
+REPO_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+
+def server_command(mode: str, bind: str, workers: int, threads: int) -> list:
+    if mode == "sync":
+        return [sys.executable, "-m", "gunicorn", "-c", "gunicorn.conf.py", "--bind", bind,
+                "--workers", str(workers), "--threads", str(threads), "wsgi:app"]
+    return [sys.executable, "-m", "hypercorn", "--bind", bind, "--workers", str(workers), "asgi:app"]
+
+
+def start_server(mode: str, port: int, args) -> subprocess.Popen:
+    env = dict(os.environ)
+    env.update(
+        LLM_BACKEND="fake",
+        LLM_FAKE_LATENCY_MS=str(args.latency_ms),
+        LLM_MAX_CONCURRENCY=str(max(args.concurrency, 8)),
+        LLM_RPM="1000000",
+        LLM_TPM="1000000000",
+        SLOW_REQUEST_MS="1000000",
+    )
+    proc = subprocess.Popen(
+        server_command(mode, f"127.0.0.1:{port}", args.workers, args.threads),
+        cwd=REPO_DIR, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE,
+    )
+    import httpx
+
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise SystemExit(f"{mode} sunucusu başlamadı:\n{proc.stderr.read().decode(errors='replace')}")
+        try:
+            if httpx.get(f"http://127.0.0.1:{port}/metrics", timeout=1).status_code == 200:
+                return proc
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    proc.terminate()
+    raise SystemExit(f"{mode} sunucusu 30 sn içinde hazır olmadı.")
+
+
+async def _run_stream(c, path: str) -> int:
+    async with c.stream("POST", path) as r:
+        async for _ in r.aiter_bytes():
+            pass
+        return r.status_code
+
+
+async def _post_status(c, path: str) -> int:
+    r = await c.post(path, data={"force": "1"})
+    return r.status_code
+
+
+async def run_load(base_url: str, name: str, fn, total: int, concurrency: int) -> dict:
+    import httpx
+
+    sem = asyncio.Semaphore(concurrency)
+    latencies, errors = [], []
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+
+    async with httpx.AsyncClient(base_url=base_url, timeout=600, limits=limits) as c:
+        async def one(i: int):
+            async with sem:
+                started = time.perf_counter()
+                try:
+                    status = await fn(c, i)
+                    ok = status < 400
+                except Exception as e:
+                    ok, status = False, repr(e)
+                latencies.append(time.perf_counter() - started)
+                if not ok:
+                    errors.append(status)
+
+        wall_start = time.perf_counter()
+        await asyncio.gather(*(one(i) for i in range(total)))
+        wall = time.perf_counter() - wall_start
+
+    latencies.sort()
+    return {
+        "scenario": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "errors": len(errors),
+        "p50_ms": percentile(latencies, 50) * 1000,
+        "p95_ms": percentile(latencies, 95) * 1000,
+        "p99_ms": percentile(latencies, 99) * 1000,
+        "throughput_rps": total / wall if wall else 0.0,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="sync vs async serving benchmark (fake LLM)")
+    parser.add_argument("--modes", default="sync,async")
+    parser.add_argument("--scenarios", default="project_run,project_stream")
+    parser.add_argument("--requests", type=int, default=400, help="senaryo başına istek sayısı")
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--workers", type=int, default=1, help="sunucu process sayısı (iki mod için aynı)")
+    parser.add_argument("--threads", type=int, default=8, help="sync mod: worker başına thread")
+    parser.add_argument("--latency-ms", type=int, default=2000, help="LLM_FAKE_LATENCY_MS")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--json", dest="json_path", help="sonuçları JSON olarak bu dosyaya yaz")
+    args = parser.parse_args(argv)
+
+    scenarios = {
+        "project_run": lambda c, i, pid: _post_status(c, f"/project/{pid}/run/{ACTIONS[i % len(ACTIONS)]}"),
+        "project_stream": lambda c, i, pid: _run_stream(c, f"/project/{pid}/stream/{ACTIONS[i % len(ACTIONS)]}?force=1"),
+    }
+    names = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    for name in names:
+        if name not in scenarios:
+            raise SystemExit(f"Bilinmeyen senaryo: {name}")
+
+    results = []
+    for mode in [m.strip() for m in args.modes.split(",") if m.strip()]:
+        if mode not in ("sync", "async"):
+            raise SystemExit(f"Bilinmeyen mod: {mode}")
+        base_url = f"http://127.0.0.1:{args.port}"
+        proc = start_server(mode, args.port, args)
+        try:
+            project_id = seed_project(HttpClient(base_url))
+            for name in names:
+                fn = scenarios[name]
+                results.append(asyncio.run(run_load(
+                    base_url, f"{mode}:{name}", lambda c, i, fn=fn: fn(c, i, project_id),
+                    args.requests, args.concurrency,
+                )))
+        finally:
+            proc.terminate()
+            proc.wait(timeout=30)
+
+    print_report(results)
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,60 @@
+"""
+Başlangıç (import) süreleri: her ölçüm yeni bir Python process'inde yapılır.
+
+  python -m bench.startup --runs 5
+"""
+import argparse
+import os
+import pathlib
+import statistics
+import subprocess
+import sys
+
+REPO_DIR = pathlib.Path(__file__).resolve().parent.parent
+
+TARGETS = {
+    "import_db": "import db",
+    "import_ai_processor": "import ai_processor",
+    "import_app": "import app",
+    "import_wsgi": "import wsgi",
+}
+
+_PROBE = """
+import time
+t0 = time.perf_counter()
+{stmt}
+print(time.perf_counter() - t0)
+"""
+
+
+def measure(runs: int = 3, targets=None) -> list:
+    env = dict(os.environ)
+    env.setdefault("LLM_BACKEND", "fake")
+    results = []
+    for name, stmt in (targets or TARGETS).items():
+        samples = []
+        for _ in range(runs):
+            out = subprocess.run(
+                [sys.executable, "-c", _PROBE.format(stmt=stmt)],
+                cwd=REPO_DIR, env=env, capture_output=True, text=True,
+            )
+            if out.returncode != 0:
+                samples = None
+                break
+            samples.append(float(out.stdout.strip().splitlines()[-1]))
+
+        results.append({
+            "scenario": f"startup:{name}",
+            "runs": runs,
+            "median_ms": statistics.median(samples) * 1000 if samples else float("nan"),
+            "ok": samples is not None,
+        })
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="import/startup süreleri")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    for r in measure(args.runs):
+        print(f"{r['scenario']:<28}{r['median_ms']:>10.1f} ms{'' if r['ok'] else '  (HATA)'}")
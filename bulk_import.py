@@ -0,0 +1,357 @@
+"""
+Toplu proje import + üretim (web katmanı olmadan).
+
+    python bulk_import.py projects.csv                    # bounded concurrent pipeline
+    python bulk_import.py projects.jsonl --mode batch     # provider batch API (fake backend'de yerel)
+    python bulk_import.py projects.csv --resume           # checkpoint'ten devam
+
+CSV başlıkları / JSONL anahtarları proje alanlarıdır (title, domain, primary_entity,
+constraints_text, ...). Aynı başlıkta zaten var olan projeler atlanır.
+
+Checkpoint (<input>.checkpoint.json) okunan satır sayısını, bu çalıştırmada eklenen
+projeleri, üretimi biten projeleri ve gönderilmiş batch id'lerini tutar. Eklenecek
+başlıklar insert'ten önce checkpoint'e yazılır (pending_titles): insert ile checkpoint
+arasında kesilen bir çalıştırmanın eklediği projeler resume'da "zaten var" sayılıp
+üretimsiz kalmaz. Yarıda kalan
+bir çalıştırma --resume ile kaldığı yerden devam eder; zaten üretilmiş çıktılar
+input_fingerprint sayesinde yeniden üretilmez. DOCX'ler en sonda yazılır.
+"""
+import argparse
+import csv
+import json
+import logging
+import os
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import db
+import llm_cache
+from ai_processor import (MODEL, PROJECT_FIELDS, PROJECT_SYSTEM_PROMPT, action_output_deps, build_project_prompt,
+                          chat_messages, get_backend, input_fingerprint)
+from generation import ALL_ACTIONS, generate_project_outputs, load_upstream, write_project_docx
+from llm_backends import BATCH_TERMINAL
+from plantuml_utils import sanitize_plantuml
+
+logger = logging.getLogger(__name__)
+
+REQUIRED_FIELDS = ("title", "domain", "primary_entity")
+
+
+# =========================
+# Girdi
+# =========================
+def read_rows(path: str):
+    """
+    CSV veya JSONL'den satırları sırayla (dosyayı belleğe almadan) okur.
+    """
+    fields = [key for key, _ in PROJECT_FIELDS]
+    with open(path, encoding="utf-8-sig", newline="") as f:
+        if path.lower().endswith((".jsonl", ".ndjson")):
+            rows = (json.loads(line) for line in f if line.strip())
+        else:
+            rows = csv.DictReader(f)
+        for row in rows:
+            yield {key: str(row.get(key) or "").strip() for key in fields}
+
+
+# =========================
+# Checkpoint
+# =========================
+def checkpoint_path(input_path: str) -> str:
+    return f"{input_path}.checkpoint.json"
+
+
+def load_checkpoint(input_path: str, resume: bool) -> dict:
+    path = checkpoint_path(input_path)
+    if resume and os.path.exists(path):
+        with open(path, encoding="utf-8") as f:
+            cp = json.load(f)
+        if cp.get("input") != os.path.abspath(input_path):
+            raise SystemExit(f"Checkpoint başka bir girdiye ait: {cp.get('input')}")
+        return cp
+    return {
+        "input": os.path.abspath(input_path),
+        "rows_done": 0,
+        "skipped": 0,
+        "invalid": 0,
+        "project_ids": [],
+        "pending_titles": [],
+        "generated_ids": [],
+        "batches": {},
+    }
+
+
+def save_checkpoint(cp: dict, input_path: str):
+    path = checkpoint_path(input_path)
+    fd, tmp = tempfile.mkstemp(dir=os.path.dirname(os.path.abspath(path)), suffix=".tmp")
+    with os.fdopen(fd, "w", encoding="utf-8") as f:
+        json.dump(cp, f)
+    os.replace(tmp, path)  # yarım checkpoint asla okunmaz
+
+
+# =========================
+# 1) Import
+# =========================
+def import_batch(batch, cp: dict, input_path: str):
+    valid, invalid, duplicates = {}, 0, 0
+    for row in batch:
+        if not all(row[k] for k in REQUIRED_FIELDS):
+            invalid += 1
+            continue
+        if row["title"] in valid:
+            duplicates += 1
+            continue
+        valid[row["title"]] = row
+
+    existing = db.get_projects_by_titles(valid)
+    # önceki çalıştırma insert'ten sonra, checkpoint'ten önce kesildiyse eklediği başlıklar
+    # "mevcut" görünür; pending_titles'ta oldukları için yine bu import'a aittir
+    pending = cp.get("pending_titles") or []
+    ours = [title for title in valid if title in existing and title in pending]
+    new_titles = [title for title in valid if title not in existing]
+    rest = [title for title in pending if title not in valid]
+
+    if new_titles:
+        # write-ahead: sayaçlar ve rows_done henüz değişmedi, yalnızca eklenecek başlıklar
+        cp["pending_titles"] = rest + ours + new_titles
+        save_checkpoint(cp, input_path)
+        db.insert_projects_bulk([valid[title] for title in new_titles])
+
+    titles = ours + new_titles
+    inserted = db.get_projects_by_titles(titles)
+    cp["project_ids"].extend(inserted[title]["id"] for title in titles if title in inserted)
+    cp["pending_titles"] = rest
+    cp["invalid"] += invalid
+    cp["skipped"] += duplicates + len(valid) - len(titles)
+
+
+def import_projects(input_path: str, cp: dict, batch_size: int):
+    batch = []
+    for i, row in enumerate(read_rows(input_path)):
+        if i < cp["rows_done"]:
+            continue
+        batch.append(row)
+        if len(batch) >= batch_size:
+            import_batch(batch, cp, input_path)
+            cp["rows_done"] += len(batch)
+            save_checkpoint(cp, input_path)
+            batch = []
+    if batch:
+        import_batch(batch, cp, input_path)
+        cp["rows_done"] += len(batch)
+        save_checkpoint(cp, input_path)
+
+    logger.info("import: %d project eklendi, %d atlandı (aynı başlık), %d geçersiz satır",
+                len(cp["project_ids"]), cp["skipped"], cp["invalid"])
+
+
+# =========================
+# 2a) Üretim: bounded concurrent pipeline
+# =========================
+def generate_pipeline(input_path: str, cp: dict, concurrency: int, action_workers: int, force: bool):
+    done = set(cp["generated_ids"])
+    todo = [pid for pid in cp["project_ids"] if pid not in done]
+    lock = threading.Lock()
+
+    def one(project_id: int):
+        p = db.get_project(project_id)
+        if not p:
+            return
+        results = generate_project_outputs(p, force=force, max_workers=action_workers)
+        failed = [k for k, (ok, _) in results.items() if not ok]
+        if failed:
+            # checkpoint'e yazılmaz: resume'da yalnızca başarısızlar yeniden denenir
+            logger.warning("project=%s failed actions: %s", project_id, ", ".join(failed))
+            return
+        with lock:
+            cp["generated_ids"].append(project_id)
+            save_checkpoint(cp, input_path)
+
+    with ThreadPoolExecutor(max_workers=max(1, concurrency)) as pool:
+        for fut in [pool.submit(one, pid) for pid in todo]:
+            try:
+                fut.result()
+            except Exception:
+                logger.exception("project generation failed")
+
+
+# =========================
+# 2b) Üretim: provider batch API
+# =========================
+def action_levels() -> list:
+    """
+    ALL_ACTIONS'ı bağımlılık seviyelerine ayırır: bir seviyedeki action'lar yalnızca
+    önceki seviyelerin çıktılarına bağlıdır ve tek batch'te gönderilebilir.
+    """
+    keys = [key for key, _ in ALL_ACTIONS]
+    levels, placed = [], set()
+    while len(placed) < len(keys):
+        level = [k for k in keys if k not in placed
+                 and all(d in placed or d not in keys for d in action_output_deps(k))]
+        if not level:
+            raise RuntimeError("ACTION_DEPENDENCIES döngü içeriyor.")
+        levels.append(level)
+        placed.update(level)
+    return levels
+
+
+def _batch_requests(project_ids, level, force: bool):
+    """
+    Returns: (requests, meta) — meta[custom_id] = (project, action_key, upstream, prompt_text)
+    """
+    requests, meta = [], {}
+    for project_id in project_ids:
+        p = db.get_project(project_id)
+        if not p:
+            continue
+        latest = db.get_latest_project_outputs(project_id, level)
+        for action_key in level:
+            upstream = load_upstream(project_id, action_key)
+            prev = latest.get(action_key)
+            if prev and not force and prev.get("input_fingerprint") == input_fingerprint(p, action_key, upstream, 0.2):
+                continue
+            prompt_text = build_project_prompt(p, action_key, upstream)
+            custom_id = f"{project_id}:{action_key}"
+            requests.append((custom_id, chat_messages(prompt_text), 0.2))
+            meta[custom_id] = (p, action_key, upstream, prompt_text)
+    return requests, meta
+
+
+def _store_batch_results(results: dict, meta: dict) -> int:
+    rows, failed = [], 0
+    for custom_id, (p, action_key, upstream, prompt_text) in meta.items():
+        res = results.get(custom_id)
+        if res is None or isinstance(res, Exception):
+            failed += 1
+            logger.warning("batch %s failed: %s", custom_id, res or "sonuç yok")
+            continue
+        text, usage = res
+        out = text.strip()
+        if not out:
+            failed += 1
+            continue
+        llm_cache.put(llm_cache.cache_key(MODEL, PROJECT_SYSTEM_PROMPT, prompt_text, 0.2), MODEL, out)
+        if action_key == "er_plantuml":
+            out = sanitize_plantuml(out)
+        rows.append({
+            "project_id": p["id"],
+            "action_key": action_key,
+            "prompt_text": prompt_text,
+            "output_text": out,
+            "model": MODEL,
+            "temperature": 0.2,
+            "input_fingerprint": input_fingerprint(p, action_key, upstream, 0.2),
+            **db.usage_columns(usage),
+        })
+
+    for i in range(0, len(rows), 500):
+        db.insert_project_outputs_bulk(rows[i:i + 500])
+    return failed
+
+
+def generate_batch(input_path: str, cp: dict, max_requests: int, poll_interval: float, force: bool):
+    backend = get_backend()
+    project_ids = [pid for pid in cp["project_ids"] if pid not in set(cp["generated_ids"])]
+
+    for n, level in enumerate(action_levels()):
+        state = cp["batches"].get(str(n))
+        if state and state.get("done"):
+            continue
+
+        # meta resume'da DB'den yeniden kurulur; prompt'lar deterministik
+        requests, meta = _batch_requests(project_ids, level, force)
+        if not requests:
+            cp["batches"][str(n)] = {"ids": [], "done": True}
+            save_checkpoint(cp, input_path)
+            continue
+
+        if not state:
+            ids = [backend.submit_batch(requests[i:i + max_requests])
+                   for i in range(0, len(requests), max_requests)]
+            state = cp["batches"][str(n)] = {"ids": ids, "done": False}
+            save_checkpoint(cp, input_path)
+            logger.info("level %d (%s): %d istek, %d batch gönderildi", n, ",".join(level), len(requests), len(ids))
+
+        results = {}
+        for batch_id in state["ids"]:
+            while (status := backend.batch_status(batch_id)) not in BATCH_TERMINAL:
+                time.sleep(poll_interval)
+            if status != "completed":
+                logger.warning("batch %s: %s", batch_id, status)
+            results.update(backend.batch_results(batch_id))
+
+        failed = _store_batch_results(results, meta)
+        logger.info("level %d: %d çıktı kaydedildi, %d başarısız", n, len(meta) - failed, failed)
+        if failed:
+            # sonraki seviyeler eksik upstream ile üretilmesin; --resume yalnızca
+            # kaydedilemeyen istekleri yeni bir batch'le tekrar gönderir
+            cp["batches"].pop(str(n))
+            save_checkpoint(cp, input_path)
+            logger.warning("level %d eksik kaldı; --resume ile devam edin", n)
+            return
+        state["done"] = True
+        save_checkpoint(cp, input_path)
+
+    cp["generated_ids"].extend(pid for pid in project_ids if pid not in set(cp["generated_ids"]))
+    save_checkpoint(cp, input_path)
+
+
+# =========================
+# 3) DOCX
+# =========================
+def write_all_docx(project_ids) -> int:
+    keys = [key for key, _ in ALL_ACTIONS]
+    written = 0
+    for project_id in project_ids:
+        p = db.get_project(project_id)
+        if not p:
+            continue
+        latest = db.get_latest_project_outputs(project_id, keys)
+        results = {k: (True, row["output_text"]) if row else (False, "çıktı yok") for k, row in latest.items()}
+        out_path, failures = write_project_docx(p, results)
+        written += 1
+        if failures:
+            logger.warning("project=%s DOCX eksik bölümler: %s", project_id, " | ".join(failures))
+        logger.debug("project=%s -> %s", project_id, out_path)
+    return written
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="CSV/JSONL'den toplu proje import + üretim")
+    parser.add_argument("input", help="CSV veya JSONL (.jsonl/.ndjson)")
+    parser.add_argument("--mode", choices=["pipeline", "batch"], default="pipeline")
+    parser.add_argument("--resume", action="store_true", help="checkpoint'ten devam et")
+    parser.add_argument("--force", action="store_true", help="mevcut çıktıları yeniden kullanma")
+    parser.add_argument("--insert-batch-size", type=int, default=500)
+    parser.add_argument("--concurrency", type=int, default=8, help="pipeline: aynı anda işlenen proje")
+    parser.add_argument("--action-workers", type=int, default=2, help="pipeline: proje başına paralel action")
+    parser.add_argument("--batch-max-requests", type=int, default=50000, help="batch: batch başına istek")
+    parser.add_argument("--poll-interval", type=float, default=30, help="batch: durum sorgu aralığı (sn)")
+    parser.add_argument("--no-docx", action="store_true")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    started = time.perf_counter()
+    cp = load_checkpoint(args.input, args.resume)
+    import_projects(args.input, cp, args.insert_batch_size)
+
+    if args.mode == "batch":
+        generate_batch(args.input, cp, args.batch_max_requests, args.poll_interval, args.force)
+    else:
+        generate_pipeline(args.input, cp, args.concurrency, args.action_workers, args.force)
+
+    docs = 0 if args.no_docx else write_all_docx(cp["project_ids"])
+
+    elapsed = time.perf_counter() - started
+    generations = len(cp["generated_ids"]) * len(ALL_ACTIONS)
+    logger.info("bitti: %d proje üretildi, %d DOCX, %.1fs (~%.0f üretim/saat)",
+                len(cp["generated_ids"]), docs, elapsed, generations / elapsed * 3600 if elapsed else 0)
+    return 0 if len(cp["generated_ids"]) == len(cp["project_ids"]) else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
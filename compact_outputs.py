@@ -0,0 +1,154 @@
+"""
+Migration 006 sonrası eski project_ai_outputs satırlarını yeni saklama düzenine taşır:
+prompt_text -> text_blobs (prompt_hash), büyük output_text -> output_blob (zlib).
+
+    python compact_outputs.py                 # hepsini taşı, kazancı raporla
+    python compact_outputs.py --dry-run       # yalnızca tahmini kazancı raporla
+    python compact_outputs.py --optimize      # sonunda OPTIMIZE TABLE (alanı diske iade eder)
+
+Tekrar çalıştırılabilir: yalnızca henüz taşınmamış satırlara dokunur.
+"""
+import argparse
+import logging
+import sys
+
+import db
+
+logger = logging.getLogger(__name__)
+
+
+def _fmt(n: int) -> str:
+    return f"{n / (1024 * 1024):.1f} MB"
+
+
+def new_blob_bytes(prompts, seen: set) -> int:
+    """
+    Bu prompt'lardan text_blobs'a yeni yazılacak (tabloda ve önceki batch'lerde olmayan)
+    blob'ların saklanan bayt sayısı. seen güncellenir.
+    """
+    _, blob_rows = db._text_blob_rows(prompts)
+    blob_rows = [r for r in blob_rows if r[0] not in seen]
+    if not blob_rows:
+        return 0
+    with db.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"SELECT hash FROM text_blobs WHERE hash IN ({','.join(['%s'] * len(blob_rows))})",
+                [r[0] for r in blob_rows],
+            )
+            seen.update(row["hash"] for row in cur.fetchall())
+    fresh = [r for r in blob_rows if r[0] not in seen]
+    seen.update(r[0] for r in fresh)
+    return sum(len(r[2]) for r in fresh)
+
+
+def compact_batch(rows, dry_run: bool, seen: set) -> tuple:
+    """
+    Returns: (prompt baytı, output baytı önce, output baytı sonra, yeni blob baytı) — bu batch için
+    """
+    prompt_bytes = before = after = 0
+    prompts = []
+    updates = []
+    for row in rows:
+        prompt = row["prompt_text"]
+        output = row["output_text"]
+        prompt_bytes += len((prompt or "").encode("utf-8"))
+        before += len((output or "").encode("utf-8"))
+
+        encoding, data = db.encode_text(output) if output is not None else ("plain", None)
+        after += len(data) if encoding == "zlib" else len((output or "").encode("utf-8"))
+        prompts.append(prompt)
+        updates.append((row["id"], encoding, data))
+
+    blob_bytes = new_blob_bytes(prompts, seen)
+    if dry_run:
+        return prompt_bytes, before, after, blob_bytes
+
+    with db.get_conn() as conn:
+        conn.begin()
+        with conn.cursor() as cur:
+            hashes = db.put_text_blobs(cur, prompts)
+            cur.executemany(
+                """
+                UPDATE project_ai_outputs
+                SET prompt_hash=%s, prompt_text=NULL,
+                    output_text=%s, output_encoding=%s, output_blob=%s
+                WHERE id=%s
+                """,
+                [
+                    (h, data if encoding == "plain" else None, encoding, data if encoding == "zlib" else None, oid)
+                    for h, (oid, encoding, data) in zip(hashes, updates)
+                ],
+            )
+        conn.commit()
+    return prompt_bytes, before, after, blob_bytes
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="project_ai_outputs metinlerini dedup + sıkıştır")
+    parser.add_argument("--batch-size", type=int, default=500)
+    parser.add_argument("--dry-run", action="store_true")
+    parser.add_argument("--optimize", action="store_true", help="sonunda OPTIMIZE TABLE çalıştır")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+
+    stats_before = db.output_storage_stats()
+    last_id = 0
+    moved = prompt_bytes = out_before = out_after = blob_bytes = 0
+    seen = set()
+    while True:
+        with db.get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute(
+                    """
+                    SELECT id, prompt_text, output_text
+                    FROM project_ai_outputs
+                    WHERE id > %s AND prompt_hash IS NULL AND output_encoding='plain'
+                    ORDER BY id
+                    LIMIT %s
+                    """,
+                    (last_id, args.batch_size),
+                )
+                rows = cur.fetchall()
+        if not rows:
+            break
+
+        p_bytes, before, after, b_bytes = compact_batch(rows, args.dry_run, seen)
+        moved += len(rows)
+        prompt_bytes += p_bytes
+        out_before += before
+        out_after += after
+        blob_bytes += b_bytes
+        last_id = rows[-1]["id"]
+        logger.info("%d satır işlendi (son id=%s)", moved, last_id)
+
+    if args.optimize and not args.dry_run:
+        with db.get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("OPTIMIZE TABLE project_ai_outputs")
+                cur.fetchall()
+
+    def stored(st: dict) -> int:
+        return (st["legacy_prompt_bytes"] + st["plain_output_bytes"]
+                + st["compressed_output_bytes"] + st["blob_bytes"])
+
+    total_before = stored(stats_before)
+    if args.dry_run:
+        # tablo değişmedi: taşınınca satırlardan düşecek ve text_blobs'a eklenecek baytlardan tahmin
+        total_after = total_before - prompt_bytes - out_before + out_after + blob_bytes
+    else:
+        total_after = stored(db.output_storage_stats())
+
+    logger.info("%d satır%s", moved, " (dry-run, değişiklik yapılmadı)" if args.dry_run else "")
+    logger.info("output_text: %s -> %s", _fmt(out_before), _fmt(out_after))
+    logger.info("prompt_text: satırlarda %s -> text_blobs'a %s (dedup + sıkıştırma)",
+                _fmt(prompt_bytes), _fmt(blob_bytes))
+    logger.info("toplam metin: %s -> %s (%skazanç %s)",
+                _fmt(total_before), _fmt(total_after), "tahmini " if args.dry_run else "",
+                _fmt(total_before - total_after))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,11 +1,27 @@
+import hashlib
+import json
+import logging
 import os
+import threading
+import time
+import zlib
+from collections import OrderedDict
+from contextlib import contextmanager
+
 import pymysql
 from dotenv import load_dotenv
 
+import profiling
+
 load_dotenv()
 
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE", "10"))
+DB_POOL_TIMEOUT = float(os.getenv("DB_POOL_TIMEOUT", "10"))        # saniye: boş bağlantı bekleme sınırı
+DB_POOL_MAX_IDLE = float(os.getenv("DB_POOL_MAX_IDLE", "300"))     # saniye: bu kadar boşta kalan bağlantı kapatılır
+DB_POOL_PING_AFTER = float(os.getenv("DB_POOL_PING_AFTER", "30"))  # saniye: bundan uzun boşta kaldıysa ping at
 
-def get_conn():
+
+def _connect():
     return pymysql.connect(
         host=os.getenv("DB_HOST", "127.0.0.1"),
         user=os.getenv("DB_USER", "root"),
@@ -18,6 +34,472 @@ def get_conn():
     )
 
 
+class PoolTimeout(RuntimeError):
+    pass
+
+
+class ConnectionPool:
+    """
+    Thread-safe, bounded PyMySQL connection pool.
+    Boşta bekleyen bağlantılar LIFO sırayla verilir; uzun süre boşta kalanlar
+    ping ile kontrol edilir, DB_POOL_MAX_IDLE'ı geçenler kapatılıp yenisi açılır.
+    """
+
+    def __init__(self, size: int, timeout: float, max_idle: float, ping_after: float, connect=_connect):
+        self.size = max(1, size)
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.ping_after = ping_after
+        self._connect = connect
+        self._cond = threading.Condition()
+        self._idle = []  # [(conn, last_used_monotonic)]
+        self._open = 0
+        self._stats = {
+            "acquired": 0,
+            "created": 0,
+            "recycled": 0,
+            "health_check_failures": 0,
+            "discarded": 0,
+            "waits": 0,
+            "wait_seconds_total": 0.0,
+            "wait_seconds_max": 0.0,
+            "timeouts": 0,
+        }
+
+    def acquire(self):
+        start = time.monotonic()
+        deadline = start + self.timeout
+        waited = False
+
+        while True:
+            conn = None
+            idle_for = 0.0
+            create = False
+
+            with self._cond:
+                while True:
+                    if self._idle:
+                        conn, last_used = self._idle.pop()
+                        idle_for = time.monotonic() - last_used
+                        if idle_for > self.max_idle:
+                            self._open -= 1
+                            self._stats["recycled"] += 1
+                            _close_quietly(conn)
+                            conn = None
+                            continue
+                        break
+                    if self._open < self.size:
+                        self._open += 1
+                        create = True
+                        break
+
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        self._stats["timeouts"] += 1
+                        raise PoolTimeout(
+                            f"DB pool: {self.timeout:.1f}s içinde boş bağlantı bulunamadı (size={self.size})."
+                        )
+                    waited = True
+                    self._cond.wait(remaining)
+
+            if create:
+                try:
+                    conn = self._connect()
+                except Exception:
+                    with self._cond:
+                        self._open -= 1
+                        self._cond.notify()
+                    raise
+                with self._cond:
+                    self._stats["created"] += 1
+            elif idle_for > self.ping_after:
+                try:
+                    conn.ping(reconnect=False)
+                except Exception:
+                    _close_quietly(conn)
+                    with self._cond:
+                        self._open -= 1
+                        self._stats["health_check_failures"] += 1
+                        self._cond.notify()
+                    continue
+
+            with self._cond:
+                self._stats["acquired"] += 1
+                if waited:
+                    wait = time.monotonic() - start
+                    self._stats["waits"] += 1
+                    self._stats["wait_seconds_total"] += wait
+                    self._stats["wait_seconds_max"] = max(self._stats["wait_seconds_max"], wait)
+            return conn
+
+    def release(self, conn, broken: bool = False):
+        if broken or not conn.open:
+            _close_quietly(conn)
+            with self._cond:
+                self._open -= 1
+                self._stats["discarded"] += 1
+                self._cond.notify()
+            return
+
+        with self._cond:
+            self._idle.append((conn, time.monotonic()))
+            self._cond.notify()
+
+    def close_all(self):
+        with self._cond:
+            idle, self._idle = self._idle, []
+            self._open -= len(idle)
+        for conn, _ in idle:
+            _close_quietly(conn)
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._stats)
+            out.update(size=self.size, open=self._open, idle=len(self._idle), in_use=self._open - len(self._idle))
+        return out
+
+
+def _close_quietly(conn):
+    try:
+        conn.close()
+    except Exception:
+        pass
+
+
+_pool = None
+_pool_pid = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> ConnectionPool:
+    global _pool, _pool_pid
+    pid = os.getpid()
+    if _pool is None or _pool_pid != pid:
+        with _pool_lock:
+            if _pool is None or _pool_pid != pid:
+                # fork sonrası ebeveynin soketleri paylaşılmaz: yeni process yeni pool
+                _pool = ConnectionPool(DB_POOL_SIZE, DB_POOL_TIMEOUT, DB_POOL_MAX_IDLE, DB_POOL_PING_AFTER)
+                _pool_pid = pid
+    return _pool
+
+
+@contextmanager
+def get_conn():
+    # "db" fazı: pool beklemesi + with bloğundaki sorgular
+    with profiling.phase("db"):
+        pool = _get_pool()
+        conn = pool.acquire()
+        broken = False
+        try:
+            yield conn
+        except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+            broken = True
+            raise
+        except Exception:
+            try:
+                conn.rollback()
+            except Exception:
+                broken = True
+            raise
+        finally:
+            pool.release(conn, broken=broken)
+
+
+def pool_stats() -> dict:
+    return _get_pool().stats()
+
+
+def reset_pool_after_fork():
+    """
+    Fork sonrası çağrılır (gunicorn post_fork). Ebeveynden kalan bağlantılar
+    kapatılmaz (COM_QUIT ebeveynin oturumunu da düşürür), sadece bırakılır.
+    """
+    global _pool, _pool_pid
+    with _pool_lock:
+        _pool = None
+        _pool_pid = None
+
+
+# =========================
+# Okuma cache'i (process içi)
+# =========================
+# get_project / get_project_by_title / son çıktılar için LRU + TTL. Yazan fonksiyonlar
+# (update_project, insert_project_output*) ilgili anahtarları kendisi düşürür.
+# DB_CACHE_SYNC=db (varsayılan; jobs.py worker'ı ve gunicorn worker'ları ayrı process'lerde
+# yazar) ise düşürülen anahtarlar cache_invalidations tablosuna yazılır, diğer process'ler
+# DB_CACHE_SYNC_INTERVAL'de bir bu tabloyu okur. DB_CACHE_SYNC=none yalnızca tek process'li
+# kurulum içindir: başka process'in yazısı en geç TTL sonunda görünür.
+DB_CACHE_ENABLED = os.getenv("DB_CACHE", "1") == "1"
+DB_CACHE_MAX_ENTRIES = int(os.getenv("DB_CACHE_MAX_ENTRIES", "2000"))
+DB_CACHE_TTL = float(os.getenv("DB_CACHE_TTL", "300"))                   # saniye
+DB_CACHE_SYNC = os.getenv("DB_CACHE_SYNC", "db")                         # db | none
+DB_CACHE_SYNC_INTERVAL = float(os.getenv("DB_CACHE_SYNC_INTERVAL", "2"))  # saniye
+DB_CACHE_SYNC_RETENTION = int(os.getenv("DB_CACHE_SYNC_RETENTION", "3600"))  # saniye: eski kayıtlar silinir
+DB_CACHE_SYNC_MAX_BACKOFF = float(os.getenv("DB_CACHE_SYNC_MAX_BACKOFF", "60"))  # saniye: sync hatasında en uzun bekleme
+
+logger = logging.getLogger(__name__)
+
+
+class RowCache:
+    """
+    Anahtar -> değer; en fazla max_entries, her kayıt ttl saniye geçerli.
+    Okuma yarışı: get() ile birlikte dönen version, put()'a verilir; arada herhangi bir
+    invalidate() çağrıldıysa (eski satır okunmuş olabilir) değer yazılmaz. Yazmalar
+    okumalardan çok seyrek olduğu için tek sayaç yeterli.
+    """
+
+    MISSING = object()
+
+    def __init__(self, max_entries: int, ttl: float):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._data = OrderedDict()  # key -> (value, expires_at)
+        self._version = 0           # her invalidate/clear'da artar
+        self._lock = threading.Lock()
+        self.stats = {"hits": 0, "misses": 0, "evictions": 0, "invalidations": 0, "expired": 0}
+
+    def get(self, key):
+        """
+        Returns: (value | MISSING, version)
+        """
+        now = time.monotonic()
+        with self._lock:
+            version = self._version
+            item = self._data.get(key)
+            if item is not None:
+                if item[1] > now:
+                    self._data.move_to_end(key)
+                    self.stats["hits"] += 1
+                    return item[0], version
+                del self._data[key]
+                self.stats["expired"] += 1
+            self.stats["misses"] += 1
+            return self.MISSING, version
+
+    def put(self, key, value, version: int):
+        with self._lock:
+            if self._version != version:
+                return
+            self._data[key] = (value, time.monotonic() + self.ttl)
+            self._data.move_to_end(key)
+            while len(self._data) > self.max_entries:
+                self._data.popitem(last=False)
+                self.stats["evictions"] += 1
+
+    def invalidate(self, keys):
+        with self._lock:
+            self._version += 1
+            for key in keys:
+                self._data.pop(key, None)
+                self.stats["invalidations"] += 1
+
+    def clear(self):
+        with self._lock:
+            self._version += 1
+            self._data.clear()
+
+    def __len__(self):
+        return len(self._data)
+
+
+_cache = RowCache(DB_CACHE_MAX_ENTRIES, DB_CACHE_TTL)
+_sync_lock = threading.Lock()
+# failures: art arda hata sayısı (backoff); stale_since: sync kopuk, cache okunmuyor
+_sync_state = {"last_id": None, "checked_at": 0.0, "received": 0, "errors": 0, "failures": 0, "stale_since": None}
+
+
+def _cache_key_str(key) -> str:
+    return ":".join(str(k) for k in key)
+
+
+def _cache_key_parse(text: str):
+    kind, _, value = text.partition(":")
+    return (kind, int(value)) if kind in ("project", "latest") else (kind, value)
+
+
+def _sync_due() -> bool:
+    if DB_CACHE_SYNC != "db":
+        return False
+    interval = DB_CACHE_SYNC_INTERVAL
+    if _sync_state["failures"]:
+        interval = min(DB_CACHE_SYNC_INTERVAL * 2 ** _sync_state["failures"], DB_CACHE_SYNC_MAX_BACKOFF)
+    return time.monotonic() - _sync_state["checked_at"] >= interval
+
+
+def _read_invalidations(cur):
+    if _sync_state["last_id"] is None:
+        # ilk okuma: cache zaten boş, yalnızca başlangıç noktası
+        cur.execute("SELECT COALESCE(MAX(id), 0) AS id FROM cache_invalidations")
+        _sync_state["last_id"] = cur.fetchone()["id"]
+        return
+    cur.execute(
+        "SELECT id, cache_key FROM cache_invalidations WHERE id > %s ORDER BY id",
+        (_sync_state["last_id"],),
+    )
+    rows = cur.fetchall()
+    if rows:
+        _cache.invalidate(_cache_key_parse(r["cache_key"]) for r in rows)
+        _sync_state["last_id"] = rows[-1]["id"]
+        _sync_state["received"] += len(rows)
+
+
+def check_cache_sync():
+    """
+    Process başında bir kez (gunicorn post_fork, jobs.py, asgi): DB_CACHE_SYNC=db iken
+    cache_invalidations tablosu yoksa diğer process'lerin yazıları hiç görülmez; sessizce
+    bayat okumak yerine başlatmayı durdurur. Geçici bağlantı hatası yalnızca loglanır.
+    """
+    if not DB_CACHE_ENABLED or DB_CACHE_SYNC != "db":
+        return
+    try:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                _read_invalidations(cur)
+    except pymysql.err.ProgrammingError as e:
+        if e.args and e.args[0] == 1146:  # ER_NO_SUCH_TABLE
+            raise RuntimeError(
+                "cache_invalidations tablosu yok: migrations/010_cache_invalidations.sql uygulanmalı "
+                "(tek process'li kurulumda DB_CACHE_SYNC=none)."
+            ) from e
+        raise
+    except pymysql.err.OperationalError:
+        logger.warning("cache invalidation başlangıç kontrolü yapılamadı (DB erişilemiyor)", exc_info=True)
+
+
+def _sync_invalidations():
+    # diğer process'lerin yazdığı invalidation'lar; en fazla DB_CACHE_SYNC_INTERVAL'de bir sorgu
+    if not _sync_due() or not _sync_lock.acquire(blocking=False):
+        return
+    try:
+        _sync_state["checked_at"] = time.monotonic()
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                _read_invalidations(cur)
+    except Exception:
+        # geçici hata: bir kez logla, okumaları DB'ye yönlendir, gittikçe seyrek dene
+        _sync_state["errors"] += 1
+        _sync_state["failures"] += 1
+        if _sync_state["stale_since"] is None:
+            _sync_state["stale_since"] = time.monotonic()
+            logger.warning("cache invalidation sync başarısız; düzelene kadar okuma cache'i kullanılmıyor",
+                           exc_info=True)
+    else:
+        if _sync_state["stale_since"] is not None:
+            # kopukluk süresince kaçan kayıtlar last_id'den okundu; retention'dan uzunsa silinmiş olabilir
+            if time.monotonic() - _sync_state["stale_since"] >= DB_CACHE_SYNC_RETENTION:
+                _cache.clear()
+            logger.info("cache invalidation sync düzeldi (%d hata)", _sync_state["failures"])
+        _sync_state["failures"] = 0
+        _sync_state["stale_since"] = None
+    finally:
+        _sync_lock.release()
+
+
+def _cache_get(key, sync: bool = True):
+    # sync=False: çağıran _sync_invalidations'ı kendisi çalıştırır (db_async, thread'de)
+    if not DB_CACHE_ENABLED:
+        return RowCache.MISSING, 0
+    if sync:
+        _sync_invalidations()
+    if _sync_state["stale_since"] is not None:
+        return RowCache.MISSING, -1  # version -1: put() yazmaz
+    return _cache.get(key)
+
+
+def _cache_put(key, value, version: int):
+    if DB_CACHE_ENABLED:
+        _cache.put(key, value, version)
+
+
+def _invalidate(cur, keys):
+    """
+    Yazan fonksiyonlar kendi cursor'larıyla çağırır (aynı bağlantı, autocommit).
+    """
+    keys = list(keys)
+    if not DB_CACHE_ENABLED or not keys:
+        return
+    _cache.invalidate(keys)
+    if DB_CACHE_SYNC == "db":
+        cur.executemany(_INSERT_INVALIDATION_SQL, [(_cache_key_str(k),) for k in keys])
+        if _should_prune(cur.lastrowid, len(keys)):
+            cur.execute(_PRUNE_INVALIDATIONS_SQL, (DB_CACHE_SYNC_RETENTION,))
+
+
+_INSERT_INVALIDATION_SQL = "INSERT INTO cache_invalidations (cache_key) VALUES (%s)"
+_PRUNE_INVALIDATIONS_SQL = "DELETE FROM cache_invalidations WHERE created_at < NOW() - INTERVAL %s SECOND"
+
+
+def _should_prune(last_id: int, n: int) -> bool:
+    # ~1000 kayıtta bir eski kayıtları sil
+    return bool(last_id) and last_id % 1000 < n
+
+
+def invalidate_project_outputs(project_id: int):
+    """
+    Başka process'in (örn. jobs.py) az önce yazdığı bilinen çıktılar için yerel cache'i düşürür.
+    """
+    _cache.invalidate([("latest", int(project_id))])
+
+
+def cache_stats() -> dict:
+    with _cache._lock:
+        out = dict(_cache.stats)
+    out.update(
+        enabled=DB_CACHE_ENABLED,
+        entries=len(_cache),
+        max_entries=_cache.max_entries,
+        sync_received=_sync_state["received"],
+        sync_errors=_sync_state["errors"],
+        sync_stale=_sync_state["stale_since"] is not None,
+    )
+    return out
+
+
+def _keyset_page(table: str, columns: str, where: list, params: list, limit: int,
+                 before_id: int = None, after_id: int = None) -> dict:
+    """
+    OFFSET yerine id üzerinden sayfalama: her sayfa index'te bir seek + limit satır,
+    tablo büyüdükçe yavaşlamaz. Sayfa her zaman yeniden eskiye sıralı döner.
+    before_id: bu id'den eski satırlar (sonraki sayfa), after_id: daha yeniler (önceki sayfa)
+    Returns: {"rows", "next_before": id | None, "prev_after": id | None}
+    """
+    where, params = list(where), list(params)
+    if after_id:
+        where.append("id > %s")
+        params.append(after_id)
+        order = "ASC"
+    else:
+        if before_id:
+            where.append("id < %s")
+            params.append(before_id)
+        order = "DESC"
+
+    sql = f"SELECT {columns} FROM {table}"
+    if where:
+        sql += " WHERE " + " AND ".join(where)
+    sql += f" ORDER BY id {order} LIMIT %s"
+
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, (*params, limit + 1))
+            rows = cur.fetchall()
+
+    more = len(rows) > limit
+    rows = rows[:limit]
+    if after_id:
+        rows.reverse()
+        return {
+            "rows": rows,
+            "next_before": rows[-1]["id"] if rows else after_id + 1,
+            "prev_after": rows[0]["id"] if rows and more else None,
+        }
+    return {
+        "rows": rows,
+        "next_before": rows[-1]["id"] if rows and more else None,
+        "prev_after": rows[0]["id"] if rows and before_id else None,
+    }
+
+
 # =========================
 # 1) FILES
 # =========================
@@ -48,6 +530,16 @@ def list_files(limit: int = 50):
             return cur.fetchall()
 
 
+FILE_LIST_COLUMNS = "id, original_name, status, error_message, output_path, created_at"
+
+
+def list_files_page(limit: int = 50, before_id: int = None, after_id: int = None) -> dict:
+    """
+    Keyset sayfalama (id DESC). bkz. _keyset_page
+    """
+    return _keyset_page("files", FILE_LIST_COLUMNS, [], [], limit, before_id, after_id)
+
+
 def set_status(file_id: int, status: str, error_message=None, output_path=None):
     with get_conn() as conn:
         with conn.cursor() as cur:
@@ -73,17 +565,51 @@ def list_projects(limit: int = 200):
             return cur.fetchall()
 
 
+PROJECT_LIST_COLUMNS = "id, title, domain, created_at"
+
+
+def list_projects_page(limit: int = 50, before_id: int = None, after_id: int = None, domain: str = None) -> dict:
+    """
+    Liste sayfası: yalnızca PROJECT_LIST_COLUMNS, keyset sayfalama (id DESC).
+    domain verilirse tam eşleşme (idx_projects_domain_id). bkz. _keyset_page
+    """
+    where, params = [], []
+    if domain:
+        where.append("domain=%s")
+        params.append(domain)
+    return _keyset_page("projects", PROJECT_LIST_COLUMNS, where, params, limit, before_id, after_id)
+
+
 def get_project(project_id: int):
-    with get_conn() as conn:
-        with conn.cursor() as cur:
-            cur.execute("SELECT * FROM projects WHERE id=%s", (project_id,))
-            return cur.fetchone()
+    key = ("project", int(project_id))
+    row, version = _cache_get(key)
+    if row is RowCache.MISSING:
+        with get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("SELECT * FROM projects WHERE id=%s", (project_id,))
+                row = cur.fetchone()
+        if row is None:
+            return None
+        _cache_put(key, row, version)
+    return dict(row)
+
 
 def get_project_by_title(title: str):
+    # title -> id cache'lenir (title değişmez); satırın kendisi get_project cache'inden gelir.
+    # Bulunamayan başlık cache'lenmez (create akışı hemen ardından ekler).
+    key = ("title", title)
+    project_id, version = _cache_get(key)
+    if project_id is not RowCache.MISSING:
+        return get_project(project_id)
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute("SELECT * FROM projects WHERE title=%s LIMIT 1", (title,))
-            return cur.fetchone()
+            row = cur.fetchone()
+    if row is None:
+        return None
+    _cache_put(key, row["id"], version)
+    _cache_put(("project", row["id"]), row, version)
+    return dict(row)
 
 
 def insert_project(data: dict) -> int:
@@ -111,9 +637,189 @@ def insert_project(data: dict) -> int:
 
 
 
+def insert_projects_bulk(rows) -> int:
+    """
+    Tek executemany ile çoklu insert. Aynı başlıkta proje varsa satır atlanır (INSERT IGNORE).
+    Returns: eklenen satır sayısı
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            return cur.executemany(
+                """
+                INSERT IGNORE INTO projects
+                (title, domain, primary_entity, constraints_text, advanced_feature,
+                 security_access, reporting_requirement, common_tasks)
+                VALUES (%s,%s,%s,%s,%s,%s,%s,%s)
+                """,
+                [
+                    (
+                        d["title"],
+                        d["domain"],
+                        d["primary_entity"],
+                        d.get("constraints_text", ""),
+                        d.get("advanced_feature", ""),
+                        d.get("security_access", ""),
+                        d.get("reporting_requirement", ""),
+                        d.get("common_tasks", ""),
+                    )
+                    for d in rows
+                ],
+            ) or 0
+
+
+def get_projects_by_titles(titles) -> dict:
+    """
+    Returns: {title: row}
+    """
+    titles = list(titles)
+    if not titles:
+        return {}
+    placeholders = ",".join(["%s"] * len(titles))
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(f"SELECT * FROM projects WHERE title IN ({placeholders})", titles)
+            return {row["title"]: row for row in cur.fetchall()}
+
+
+def update_project(project_id: int, data: dict):
+    """
+    title hariç alanları günceller (title projeyi tekil tanımlar).
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE projects
+                SET domain=%s, primary_entity=%s, constraints_text=%s, advanced_feature=%s,
+                    security_access=%s, reporting_requirement=%s, common_tasks=%s
+                WHERE id=%s
+                """,
+                (
+                    data["domain"],
+                    data["primary_entity"],
+                    data.get("constraints_text", ""),
+                    data.get("advanced_feature", ""),
+                    data.get("security_access", ""),
+                    data.get("reporting_requirement", ""),
+                    data.get("common_tasks", ""),
+                    project_id,
+                ),
+            )
+            _invalidate(cur, [("project", int(project_id))])
+
+
 # =========================
 # 3) PROJECT AI OUTPUTS
 # =========================
+# prompt_text: sha256 ile text_blobs'a bir kez yazılır, satırda yalnızca prompt_hash durur.
+# output_text: OUTPUT_COMPRESS_MIN_BYTES'tan büyükse zlib ile output_blob'a yazılır.
+# Okuyan fonksiyonlar output_text'i her zaman düz metin döndürür.
+OUTPUT_COMPRESS_MIN_BYTES = int(os.getenv("OUTPUT_COMPRESS_MIN_BYTES", "1024"))
+OUTPUT_COMPRESS_LEVEL = int(os.getenv("OUTPUT_COMPRESS_LEVEL", "6"))
+
+_OUTPUT_COLUMNS = "o.output_text, o.output_encoding, o.output_blob"
+
+
+def encode_text(text: str):
+    """
+    Returns: (encoding, data) — encoding 'plain' ise data str, 'zlib' ise bytes
+    """
+    raw = (text or "").encode("utf-8")
+    if len(raw) >= OUTPUT_COMPRESS_MIN_BYTES:
+        packed = zlib.compress(raw, OUTPUT_COMPRESS_LEVEL)
+        if len(packed) < len(raw):
+            return "zlib", packed
+    return "plain", text
+
+
+def decode_text(encoding: str, data) -> str:
+    if encoding == "zlib":
+        return zlib.decompress(data).decode("utf-8")
+    if isinstance(data, (bytes, bytearray)):
+        return bytes(data).decode("utf-8")
+    return data
+
+
+def _decode_output(row):
+    if row and "output_encoding" in row:
+        encoding = row.pop("output_encoding")
+        blob = row.pop("output_blob", None)
+        if encoding == "zlib":
+            row["output_text"] = decode_text(encoding, blob)
+    return row
+
+
+def put_text_blobs(cur, texts) -> list:
+    """
+    Metinleri text_blobs'a (yoksa) yazar; sıralı hash listesi döner.
+    """
+    hashes, rows = _text_blob_rows(texts)
+    if rows:
+        cur.executemany(_INSERT_TEXT_BLOBS_SQL, rows)
+    return hashes
+
+
+_INSERT_TEXT_BLOBS_SQL = "INSERT IGNORE INTO text_blobs (hash, encoding, body, raw_size) VALUES (%s,%s,%s,%s)"
+
+
+def _text_blob_rows(texts):
+    """
+    Returns: (hashes, text_blobs satırları) — db_async ile ortak
+    """
+    hashes, rows = [], {}
+    for text in texts:
+        if text is None:
+            hashes.append(None)
+            continue
+        h = hashlib.sha256(text.encode("utf-8")).hexdigest()
+        hashes.append(h)
+        if h not in rows:
+            encoding, data = encode_text(text)
+            raw_size = len(text.encode("utf-8"))
+            rows[h] = (h, encoding, data.encode("utf-8") if encoding == "plain" else data, raw_size)
+    return hashes, list(rows.values())
+
+
+def _output_params(r: dict, prompt_hash: str) -> tuple:
+    encoding, data = encode_text(r["output_text"])
+    return (
+        r["project_id"],
+        r["action_key"],
+        prompt_hash,
+        data if encoding == "plain" else None,
+        encoding,
+        data if encoding == "zlib" else None,
+        r["model"],
+        r.get("temperature", 0.2),
+        r.get("input_fingerprint"),
+        r.get("prompt_tokens"),
+        r.get("cached_tokens"),
+        r.get("completion_tokens"),
+        r.get("latency_ms"),
+        r.get("ttft_ms"),
+    )
+
+
+_INSERT_OUTPUT_SQL = """
+    INSERT INTO project_ai_outputs
+    (project_id, action_key, prompt_hash, output_text, output_encoding, output_blob, model, temperature,
+     input_fingerprint, prompt_tokens, cached_tokens, completion_tokens, latency_ms, ttft_ms)
+    VALUES (%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s,%s)
+"""
+
+USAGE_COLUMNS = ("prompt_tokens", "cached_tokens", "completion_tokens", "latency_ms", "ttft_ms")
+
+
+def usage_columns(usage: dict) -> dict:
+    """
+    ai_processor usage dict'inden insert_project_output argümanları (cache'ten gelen çıktıda hepsi None).
+    """
+    return {k: (usage or {}).get(k) for k in USAGE_COLUMNS}
+
+
 def insert_project_output(
     project_id: int,
     action_key: str,
@@ -121,48 +827,534 @@ def insert_project_output(
     output_text: str,
     model: str,
     temperature: float = 0.2,
+    input_fingerprint: str = None,
+    prompt_tokens: int = None,
+    cached_tokens: int = None,
+    completion_tokens: int = None,
+    latency_ms: int = None,
+    ttft_ms: int = None,
 ) -> int:
+    row = {
+        "project_id": project_id,
+        "action_key": action_key,
+        "output_text": output_text,
+        "model": model,
+        "temperature": temperature,
+        "input_fingerprint": input_fingerprint,
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_ms": latency_ms,
+        "ttft_ms": ttft_ms,
+    }
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            prompt_hash = put_text_blobs(cur, [prompt_text])[0]
+            cur.execute(_INSERT_OUTPUT_SQL, _output_params(row, prompt_hash))
+            out_id = cur.lastrowid
+            _invalidate(cur, [("latest", int(project_id))])
+            return out_id
+
+
+def insert_project_outputs_bulk(rows) -> int:
+    """
+    rows: insert_project_output argümanlarıyla aynı anahtarlara sahip dict'ler.
+    """
+    rows = list(rows)
+    if not rows:
+        return 0
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            hashes = put_text_blobs(cur, [r["prompt_text"] for r in rows])
+            n = cur.executemany(
+                _INSERT_OUTPUT_SQL,
+                [_output_params(r, h) for r, h in zip(rows, hashes)],
+            ) or 0
+            _invalidate(cur, [("latest", pid) for pid in sorted({int(r["project_id"]) for r in rows})])
+            return n
+
+
+def get_latest_project_output(project_id: int, action_key: str):
+    return get_latest_project_outputs(project_id, [action_key])[action_key]
+
+
+def get_project_output(output_id: int):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT o.id, o.project_id, o.action_key, {_OUTPUT_COLUMNS}, o.model, o.created_at
+                FROM project_ai_outputs o
+                WHERE o.id=%s
+                """,
+                (output_id,),
+            )
+            return _decode_output(cur.fetchone())
+
+
+def get_project_output_prompt(output_id: int):
+    """
+    Çıktının prompt'u (text_blobs'tan; eski satırlarda prompt_text kolonundan).
+    """
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
-                INSERT INTO project_ai_outputs
-                (project_id, action_key, prompt_text, output_text, model, temperature)
-                VALUES (%s,%s,%s,%s,%s,%s)
+                SELECT o.prompt_text, b.encoding, b.body
+                FROM project_ai_outputs o
+                LEFT JOIN text_blobs b ON b.hash = o.prompt_hash
+                WHERE o.id=%s
                 """,
-                (project_id, action_key, prompt_text, output_text, model, temperature),
+                (output_id,),
             )
-            return cur.lastrowid
+            row = cur.fetchone()
+    if not row:
+        return None
+    if row["body"] is not None:
+        return decode_text(row["encoding"], row["body"])
+    return row["prompt_text"]
 
 
-def get_latest_project_output(project_id: int, action_key: str):
+def get_latest_project_outputs(project_id: int, action_keys):
+    """
+    Her action_key için en son çıktıyı tek sorguda döndürür: {action_key: row | None}
+    (groupwise-max; idx_pao_project_action_id index'ini kullanır)
+    Proje başına {action_key: row | None} cache'lenir; yalnızca cache'te olmayan
+    action'lar sorgulanır. Çıktı yoksa None da cache'lenir (insert_project_output düşürür).
+    """
+    action_keys = list(action_keys)
+    if not action_keys:
+        return {}
+
+    key = ("latest", int(project_id))
+    cached, version = _cache_get(key)
+    if cached is RowCache.MISSING:
+        cached = {}
+    missing = [k for k in action_keys if k not in cached]
+    if missing:
+        fetched = _query_latest_project_outputs(project_id, missing)
+        cached = {**cached, **fetched}
+        _cache_put(key, cached, version)
+    return {k: dict(cached[k]) if cached[k] else None for k in action_keys}
+
+
+def _latest_outputs_sql(n: int) -> str:
+    placeholders = ",".join(["%s"] * n)
+    return f"""
+        SELECT o.id, o.project_id, o.action_key, o.prompt_hash, {_OUTPUT_COLUMNS}, o.model,
+               o.temperature, o.input_fingerprint, o.created_at
+        FROM project_ai_outputs o
+        JOIN (
+            SELECT action_key, MAX(id) AS id
+            FROM project_ai_outputs
+            WHERE project_id=%s AND action_key IN ({placeholders})
+            GROUP BY action_key
+        ) m ON m.id = o.id
+    """
+
+
+def _query_latest_project_outputs(project_id: int, action_keys: list) -> dict:
+    latest = {k: None for k in action_keys}
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(_latest_outputs_sql(len(action_keys)), (project_id, *action_keys))
+            for row in cur.fetchall():
+                latest[row["action_key"]] = _decode_output(row)
+    return latest
+
+
+def list_project_outputs(project_id: int, limit: int = 50):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                f"""
+                SELECT o.id, o.project_id, o.action_key, o.prompt_hash, {_OUTPUT_COLUMNS}, o.model,
+                       o.temperature, o.input_fingerprint, o.prompt_tokens, o.cached_tokens, o.created_at
+                FROM project_ai_outputs o
+                WHERE o.project_id=%s
+                ORDER BY o.id DESC
+                LIMIT %s
+                """,
+                (project_id, limit),
+            )
+            return [_decode_output(row) for row in cur.fetchall()]
+
+
+def output_storage_stats() -> dict:
+    """
+    project_ai_outputs + text_blobs için mantıksal (ham) ve saklanan bayt sayıları.
+    """
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT *
+                SELECT COUNT(*) AS rows_total,
+                       COALESCE(SUM(LENGTH(prompt_text)), 0) AS legacy_prompt_bytes,
+                       COALESCE(SUM(LENGTH(output_text)), 0) AS plain_output_bytes,
+                       COALESCE(SUM(LENGTH(output_blob)), 0) AS compressed_output_bytes,
+                       COALESCE(SUM(output_encoding='zlib'), 0) AS compressed_rows
                 FROM project_ai_outputs
-                WHERE project_id=%s AND action_key=%s
-                ORDER BY id DESC
+                """
+            )
+            stats = cur.fetchone()
+            cur.execute(
+                """
+                SELECT COUNT(*) AS blobs, COALESCE(SUM(LENGTH(body)), 0) AS blob_bytes,
+                       COALESCE(SUM(raw_size), 0) AS blob_raw_bytes
+                FROM text_blobs
+                """
+            )
+            stats.update(cur.fetchone())
+    return {k: int(v) for k, v in stats.items()}
+
+
+# =========================
+# 4) GENERATION JOBS (DB-backed queue)
+# =========================
+def insert_generation_job(project_id, file_id: int, progress: dict, kind: str = "project") -> int:
+    """
+    kind: project (tüm action'lar + DOCX) | document (yüklenen doküman, project_id=None)
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO generation_jobs (kind, project_id, file_id, progress)
+                VALUES (%s,%s,%s,%s)
+                """,
+                (kind, project_id, file_id, json.dumps(progress)),
+            )
+            return cur.lastrowid
+
+
+def claim_generation_job(worker_id: str, lock_timeout: int, max_attempts: int):
+    """
+    Sıradaki işi kilitleyip files.status'u PROCESSING'e çeker.
+    QUEUED işler ve lock_timeout saniyedir takılı kalmış RUNNING işler alınır; takılı iş
+    max_attempts kez alınmışsa (worker her seferinde ölmüş) tekrar alınmaz, dosya ERROR olur.
+    Birden fazla worker SKIP LOCKED sayesinde aynı işi almaz.
+    """
+    with get_conn() as conn:
+        conn.begin()
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                UPDATE generation_jobs j
+                JOIN files f ON f.id = j.file_id
+                SET j.status='ERROR', f.status='ERROR',
+                    f.error_message=CONCAT('İş ', j.attempts, ' denemede tamamlanamadı.')
+                WHERE j.status='RUNNING' AND j.locked_at < NOW() - INTERVAL %s SECOND
+                  AND j.attempts >= %s
+                """,
+                (lock_timeout, max_attempts),
+            )
+            cur.execute(
+                """
+                SELECT j.id, j.kind, j.project_id, j.file_id, j.progress, f.input_path, f.original_name
+                FROM generation_jobs j
+                JOIN files f ON f.id = j.file_id
+                WHERE j.status='QUEUED'
+                   OR (j.status='RUNNING' AND j.locked_at < NOW() - INTERVAL %s SECOND)
+                ORDER BY j.id
+                LIMIT 1
+                FOR UPDATE SKIP LOCKED
+                """,
+                (lock_timeout,),
+            )
+            job = cur.fetchone()
+            if not job:
+                conn.commit()
+                return None
+
+            cur.execute(
+                """
+                UPDATE generation_jobs
+                SET status='RUNNING', locked_by=%s, locked_at=NOW(), attempts=attempts+1
+                WHERE id=%s
+                """,
+                (worker_id, job["id"]),
+            )
+            cur.execute("UPDATE files SET status='PROCESSING' WHERE id=%s", (job["file_id"],))
+        conn.commit()
+
+    job["progress"] = json.loads(job["progress"]) if job.get("progress") else {}
+    return job
+
+
+def finish_generation_job(job_id: int, file_id: int, status: str, error_message=None, output_path=None):
+    """
+    İşi kuyruktan düşürür ve files.status'u (DONE / ERROR) aynı transaction'da yazar.
+    """
+    with get_conn() as conn:
+        conn.begin()
+        with conn.cursor() as cur:
+            cur.execute("UPDATE generation_jobs SET status=%s WHERE id=%s", (status, job_id))
+            cur.execute(
+                """
+                UPDATE files
+                SET status=%s,
+                    error_message=%s,
+                    output_path=COALESCE(%s, output_path)
+                WHERE id=%s
+                """,
+                (status, error_message, output_path, file_id),
+            )
+        conn.commit()
+
+
+def update_generation_job_progress(job_id: int, progress: dict):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE generation_jobs SET progress=%s, locked_at=NOW() WHERE id=%s",
+                (json.dumps(progress), job_id),
+            )
+
+
+def get_generation_job_by_file(file_id: int):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT j.id, j.kind, j.project_id, j.file_id, j.progress, j.attempts,
+                       f.original_name, f.status, f.error_message, f.output_path
+                FROM generation_jobs j
+                JOIN files f ON f.id = j.file_id
+                WHERE j.file_id=%s
+                """,
+                (file_id,),
+            )
+            row = cur.fetchone()
+    if row:
+        row["progress"] = json.loads(row["progress"]) if row.get("progress") else {}
+    return row
+
+
+# =========================
+# 4b) PREFETCH JOBS (spekülatif ön üretim, düşük öncelik)
+# =========================
+# status: QUEUED -> RUNNING -> DONE / ERROR / CANCELLED; başlamadan expires_at geçerse EXPIRED.
+# touched_at: proje sayfası görüntülendikçe güncellenir; uzun süre dokunulmayan iş bırakılır.
+def insert_prefetch_job(project_id: int, action_keys, progress: dict, expires_in: int) -> int:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO prefetch_jobs (project_id, action_keys, progress, expires_at, touched_at)
+                VALUES (%s,%s,%s, NOW() + INTERVAL %s SECOND, NOW())
+                """,
+                (project_id, json.dumps(list(action_keys)), json.dumps(progress), expires_in),
+            )
+            return cur.lastrowid
+
+
+def _prefetch_row(row):
+    if row:
+        row["action_keys"] = json.loads(row["action_keys"]) if row.get("action_keys") else []
+        row["progress"] = json.loads(row["progress"]) if row.get("progress") else {}
+    return row
+
+
+def claim_prefetch_job(worker_id: str, lock_timeout: int):
+    """
+    Süresi geçmemiş sıradaki QUEUED işi (ya da lock_timeout'tur takılı RUNNING işi) alır.
+    """
+    with get_conn() as conn:
+        conn.begin()
+        with conn.cursor() as cur:
+            cur.execute("UPDATE prefetch_jobs SET status='EXPIRED' WHERE status='QUEUED' AND expires_at <= NOW()")
+            cur.execute(
+                """
+                SELECT id, project_id, action_keys, progress
+                FROM prefetch_jobs
+                WHERE (status='QUEUED' AND expires_at > NOW())
+                   OR (status='RUNNING' AND locked_at < NOW() - INTERVAL %s SECOND)
+                ORDER BY id
                 LIMIT 1
+                FOR UPDATE SKIP LOCKED
+                """,
+                (lock_timeout,),
+            )
+            job = cur.fetchone()
+            if job:
+                cur.execute(
+                    "UPDATE prefetch_jobs SET status='RUNNING', locked_by=%s, locked_at=NOW() WHERE id=%s",
+                    (worker_id, job["id"]),
+                )
+        conn.commit()
+    return _prefetch_row(job)
+
+
+def update_prefetch_job(job_id: int, progress: dict = None, status: str = None, from_status: str = None) -> int:
+    """
+    from_status verilirse yalnızca iş hâlâ o durumdaysa yazar (ör. iptal edilmiş işi DONE yapmaz).
+    Returns: güncellenen satır sayısı
+    """
+    sets, params = ["locked_at=NOW()"], []
+    if progress is not None:
+        sets.append("progress=%s")
+        params.append(json.dumps(progress))
+    if status is not None:
+        sets.append("status=%s")
+        params.append(status)
+    where = "id=%s"
+    params.append(job_id)
+    if from_status is not None:
+        where += " AND status=%s"
+        params.append(from_status)
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            return cur.execute(f"UPDATE prefetch_jobs SET {', '.join(sets)} WHERE {where}", params)
+
+
+def get_prefetch_job(job_id: int):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, project_id, status, action_keys, progress,
+                       TIMESTAMPDIFF(SECOND, touched_at, NOW()) AS idle_seconds
+                FROM prefetch_jobs WHERE id=%s
+                """,
+                (job_id,),
+            )
+            return _prefetch_row(cur.fetchone())
+
+
+def get_latest_prefetch_job(project_id: int):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT id, project_id, status, action_keys, progress,
+                       TIMESTAMPDIFF(SECOND, touched_at, NOW()) AS idle_seconds
+                FROM prefetch_jobs WHERE project_id=%s
+                ORDER BY id DESC LIMIT 1
+                """,
+                (project_id,),
+            )
+            return _prefetch_row(cur.fetchone())
+
+
+def touch_prefetch_jobs(project_id: int):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "UPDATE prefetch_jobs SET touched_at=NOW() WHERE project_id=%s AND status IN ('QUEUED','RUNNING')",
+                (project_id,),
+            )
+
+
+def cancel_prefetch_jobs(project_id: int) -> int:
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            return cur.execute(
+                "UPDATE prefetch_jobs SET status='CANCELLED' WHERE project_id=%s AND status IN ('QUEUED','RUNNING')",
+                (project_id,),
+            )
+
+
+# =========================
+# 4c) GENERATION LEASES (singleflight.py)
+# =========================
+# status: RUNNING -> DONE (output_id) / ERROR; lider bırakırsa (istemci koptu) satır silinir.
+def acquire_generation_lease(lease_key: str, owner: str, ttl: int) -> bool:
+    """
+    Kira boşsa, bitmişse ya da süresi geçmişse alır.
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            if cur.execute(
+                "INSERT IGNORE INTO generation_leases (lease_key, owner, expires_at) "
+                "VALUES (%s,%s, NOW() + INTERVAL %s SECOND)",
+                (lease_key, owner, ttl),
+            ):
+                return True
+            return cur.execute(
+                """
+                UPDATE generation_leases
+                SET owner=%s, status='RUNNING', output_id=NULL, error_message=NULL,
+                    expires_at=NOW() + INTERVAL %s SECOND, created_at=NOW()
+                WHERE lease_key=%s AND (status<>'RUNNING' OR expires_at<=NOW())
+                """,
+                (owner, ttl, lease_key),
+            ) == 1
+
+
+def get_generation_lease(lease_key: str):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                SELECT status, output_id, error_message, expires_at <= NOW() AS expired
+                FROM generation_leases WHERE lease_key=%s
                 """,
-                (project_id, action_key),
+                (lease_key,),
             )
             return cur.fetchone()
 
 
-def list_project_outputs(project_id: int, limit: int = 50):
+def finish_generation_lease(lease_key: str, owner: str, status: str, output_id: int = None,
+                            error_message: str = None, keep: int = 60, retention: int = 3600):
+    """
+    Sonucu bekleyenler için `keep` saniye tutar; `retention`'dan eski kiraları siler.
+    """
     with get_conn() as conn:
         with conn.cursor() as cur:
             cur.execute(
                 """
-                SELECT *
-                FROM project_ai_outputs
-                WHERE project_id=%s
-                ORDER BY id DESC
-                LIMIT %s
+                UPDATE generation_leases
+                SET status=%s, output_id=%s, error_message=%s, expires_at=NOW() + INTERVAL %s SECOND
+                WHERE lease_key=%s AND owner=%s
                 """,
-                (project_id, limit),
+                (status, output_id, error_message, keep, lease_key, owner),
             )
-            return cur.fetchall()
+            cur.execute(
+                "DELETE FROM generation_leases WHERE expires_at < NOW() - INTERVAL %s SECOND LIMIT 100",
+                (retention,),
+            )
+
+
+def release_generation_lease(lease_key: str, owner: str):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("DELETE FROM generation_leases WHERE lease_key=%s AND owner=%s", (lease_key, owner))
+
+
+# =========================
+# 5) LLM CACHE (kalıcı katman)
+# =========================
+def get_llm_cache_entry(cache_key: str):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "SELECT output_text, model FROM llm_cache WHERE cache_key=%s AND expires_at > NOW()",
+                (cache_key,),
+            )
+            return cur.fetchone()
+
 
+def put_llm_cache_entry(cache_key: str, model: str, output_text: str, ttl: int):
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                """
+                INSERT INTO llm_cache (cache_key, model, output_text, expires_at)
+                VALUES (%s,%s,%s, NOW() + INTERVAL %s SECOND)
+                ON DUPLICATE KEY UPDATE output_text=VALUES(output_text), created_at=CURRENT_TIMESTAMP,
+                                        expires_at=VALUES(expires_at)
+                """,
+                (cache_key, model, output_text, ttl),
+            )
+
+
+def prune_llm_cache(limit: int) -> int:
+    """
+    Süresi dolmuş en fazla limit satırı siler (idx_llm_cache_expires); silinen sayısı döner.
+    """
+    with get_conn() as conn:
+        with conn.cursor() as cur:
+            return cur.execute(
+                "DELETE FROM llm_cache WHERE expires_at <= NOW() ORDER BY expires_at LIMIT %s",
+                (limit,),
+            )
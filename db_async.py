@@ -0,0 +1,206 @@
+"""
+db.py'nin asyncio karşılığı (aiomysql) — asgi.py'deki async route'lar için.
+
+Aynı isim ve imzalar, coroutine olarak:
+  get_project, get_project_by_title, get_latest_project_outputs,
+  get_latest_project_output, insert_project_output (+ usage_columns)
+
+SQL, çıktı sıkıştırma ve okuma cache'i (db.RowCache) db.py ile ortaktır: sync ve async
+yollar aynı process'te aynı cache'i görür, yazmalar ikisinde de anahtarları düşürür.
+Pool event loop başına ilk kullanımda kurulur (DB_POOL_SIZE / DB_POOL_TIMEOUT).
+"""
+import asyncio
+import os
+from contextlib import asynccontextmanager
+
+import aiomysql
+import pymysql
+
+import db
+from db import RowCache, usage_columns  # noqa: F401
+
+_pools = {}  # event loop -> pool kuran Task
+
+
+async def _create_pool():
+    return await aiomysql.create_pool(
+        host=os.getenv("DB_HOST", "127.0.0.1"),
+        user=os.getenv("DB_USER", "root"),
+        password=os.getenv("DB_PASSWORD", ""),
+        db=os.getenv("DB_NAME", "ai_docs"),
+        port=int(os.getenv("DB_PORT", "3306")),
+        charset="utf8mb4",
+        cursorclass=aiomysql.DictCursor,
+        autocommit=True,
+        minsize=1,
+        maxsize=db.DB_POOL_SIZE,
+        pool_recycle=int(db.DB_POOL_MAX_IDLE),
+    )
+
+
+async def _get_pool():
+    loop = asyncio.get_running_loop()
+    task = _pools.get(loop)
+    if task is None:
+        task = _pools[loop] = loop.create_task(_create_pool())
+    try:
+        return await task
+    except Exception:
+        _pools.pop(loop, None)  # bir sonraki çağrı yeniden denesin
+        raise
+
+
+async def close_pool():
+    task = _pools.pop(asyncio.get_running_loop(), None)
+    if task is not None and task.done() and not task.exception():
+        pool = task.result()
+        pool.close()
+        await pool.wait_closed()
+
+
+@asynccontextmanager
+async def get_conn():
+    pool = await _get_pool()
+    try:
+        conn = await asyncio.wait_for(pool.acquire(), db.DB_POOL_TIMEOUT)
+    except asyncio.TimeoutError:
+        raise db.PoolTimeout(f"DB pool: {db.DB_POOL_TIMEOUT:.0f} sn içinde boş bağlantı yok") from None
+    try:
+        yield conn
+    except (pymysql.err.OperationalError, pymysql.err.InterfaceError):
+        conn.close()  # kapalı bağlantı release'de pool'dan çıkarılır
+        raise
+    except Exception:
+        try:
+            await conn.rollback()
+        except Exception:
+            conn.close()
+        raise
+    finally:
+        pool.release(conn)
+
+
+# =========================
+# Okuma cache'i (db.py ile ortak)
+# =========================
+async def _cache_get(key):
+    if db._sync_due():
+        # process'ler arası invalidation okuması seyrek; sync pool ile thread'de yapılır
+        await asyncio.to_thread(db._sync_invalidations)
+    return db._cache_get(key, sync=False)
+
+
+async def _invalidate(cur, keys):
+    keys = list(keys)
+    if not db.DB_CACHE_ENABLED or not keys:
+        return
+    db._cache.invalidate(keys)
+    if db.DB_CACHE_SYNC == "db":
+        await cur.executemany(db._INSERT_INVALIDATION_SQL, [(db._cache_key_str(k),) for k in keys])
+        if db._should_prune(cur.lastrowid, len(keys)):
+            await cur.execute(db._PRUNE_INVALIDATIONS_SQL, (db.DB_CACHE_SYNC_RETENTION,))
+
+
+# =========================
+# PROJECTS
+# =========================
+async def get_project(project_id: int):
+    key = ("project", int(project_id))
+    row, version = await _cache_get(key)
+    if row is RowCache.MISSING:
+        async with get_conn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute("SELECT * FROM projects WHERE id=%s", (project_id,))
+                row = await cur.fetchone()
+        if row is None:
+            return None
+        db._cache_put(key, row, version)
+    return dict(row)
+
+
+async def get_project_by_title(title: str):
+    key = ("title", title)
+    project_id, version = await _cache_get(key)
+    if project_id is not RowCache.MISSING:
+        return await get_project(project_id)
+    async with get_conn() as conn:
+        async with conn.cursor() as cur:
+            await cur.execute("SELECT * FROM projects WHERE title=%s LIMIT 1", (title,))
+            row = await cur.fetchone()
+    if row is None:
+        return None
+    db._cache_put(key, row["id"], version)
+    db._cache_put(("project", row["id"]), row, version)
+    return dict(row)
+
+
+# =========================
+# PROJECT AI OUTPUTS
+# =========================
+async def insert_project_output(
+    project_id: int,
+    action_key: str,
+    prompt_text: str,
+    output_text: str,
+    model: str,
+    temperature: float = 0.2,
+    input_fingerprint: str = None,
+    prompt_tokens: int = None,
+    cached_tokens: int = None,
+    completion_tokens: int = None,
+    latency_ms: int = None,
+    ttft_ms: int = None,
+) -> int:
+    row = {
+        "project_id": project_id,
+        "action_key": action_key,
+        "output_text": output_text,
+        "model": model,
+        "temperature": temperature,
+        "input_fingerprint": input_fingerprint,
+        "prompt_tokens": prompt_tokens,
+        "cached_tokens": cached_tokens,
+        "completion_tokens": completion_tokens,
+        "latency_ms": latency_ms,
+        "ttft_ms": ttft_ms,
+    }
+    # zlib sıkıştırma CPU işi ama çıktılar küçük (KB'lar); loop'u anlamlı bloklamaz
+    hashes, blob_rows = db._text_blob_rows([prompt_text])
+    params = db._output_params(row, hashes[0])
+    async with get_conn() as conn:
+        async with conn.cursor() as cur:
+            if blob_rows:
+                await cur.executemany(db._INSERT_TEXT_BLOBS_SQL, blob_rows)
+            await cur.execute(db._INSERT_OUTPUT_SQL, params)
+            out_id = cur.lastrowid
+            await _invalidate(cur, [("latest", int(project_id))])
+            return out_id
+
+
+async def get_latest_project_outputs(project_id: int, action_keys):
+    """
+    db.get_latest_project_outputs ile aynı: {action_key: row | None}, proje başına cache'li.
+    """
+    action_keys = list(action_keys)
+    if not action_keys:
+        return {}
+
+    key = ("latest", int(project_id))
+    cached, version = await _cache_get(key)
+    if cached is RowCache.MISSING:
+        cached = {}
+    missing = [k for k in action_keys if k not in cached]
+    if missing:
+        fetched = {k: None for k in missing}
+        async with get_conn() as conn:
+            async with conn.cursor() as cur:
+                await cur.execute(db._latest_outputs_sql(len(missing)), (project_id, *missing))
+                for row in await cur.fetchall():
+                    fetched[row["action_key"]] = db._decode_output(row)
+        cached = {**cached, **fetched}
+        db._cache_put(key, cached, version)
+    return {k: dict(cached[k]) if cached[k] else None for k in action_keys}
+
+
+async def get_latest_project_output(project_id: int, action_key: str):
+    return (await get_latest_project_outputs(project_id, [action_key]))[action_key]
@@ -0,0 +1,128 @@
+"""
+Yüklenen doküman işleme (map-reduce).
+
+Doküman paragraf paragraf okunur (file_utils.iter_paragraphs), DOC_CHUNK_TOKENS
+bütçeli parçalara bölünür ve parçalar DOC_MAP_WORKERS eşzamanlı LLM çağrısıyla
+notlara çevrilir (map). Notlar DOC_REDUCE_TOKENS bütçesine sığana kadar gruplar
+halinde birleştirilir, son birleştirme nihai çıktıyı üretir (reduce).
+Bellekte aynı anda en fazla ~2 x DOC_MAP_WORKERS parça ve parça notları tutulur.
+"""
+import logging
+import os
+import pathlib
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+from ai_processor import estimate_tokens, extract_document_notes, merge_document_notes, process_text_with_ai
+from file_utils import chunk_paragraphs, iter_paragraphs
+
+DOC_CHUNK_TOKENS = int(os.getenv("DOC_CHUNK_TOKENS", "3000"))     # map parçası girdi bütçesi
+DOC_REDUCE_TOKENS = int(os.getenv("DOC_REDUCE_TOKENS", "12000"))  # tek reduce çağrısına giren not bütçesi
+DOC_MAP_WORKERS = int(os.getenv("DOC_MAP_WORKERS", "4"))
+
+DOCUMENT_STEPS = [
+    ("map", "Parçalar (map)"),
+    ("reduce", "Birleştirme (reduce)"),
+]
+
+logger = logging.getLogger(__name__)
+
+
+def _map_chunks(chunks, on_progress=None) -> list:
+    """
+    Parçaları sırayı koruyarak eşzamanlı işler; generator'dan yalnızca boş yer
+    açıldıkça yeni parça çekilir.
+    Returns: [notes] (parça sırasıyla)
+    """
+    notes = {}
+    running = {}
+    max_pending = max(1, DOC_MAP_WORKERS) * 2
+    chunks = iter(chunks)
+    exhausted = False
+    index = 0
+
+    pool = ThreadPoolExecutor(max_workers=max(1, DOC_MAP_WORKERS))
+    try:
+        while running or not exhausted:
+            while not exhausted and len(running) < max_pending:
+                chunk = next(chunks, None)
+                if chunk is None:
+                    exhausted = True
+                    break
+                index += 1
+                running[pool.submit(extract_document_notes, chunk, index)] = index
+
+            if not running:
+                break
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                notes[running.pop(fut)] = fut.result()  # parça hatası tüm işi durdurur
+            if on_progress:
+                on_progress("map", f"RUNNING ({len(notes)} parça bitti)")
+    except BaseException:
+        # kuyrukta bekleyen (ücretli) çağrılar başlamadan iptal; çalışanlar beklenmez
+        pool.shutdown(wait=False, cancel_futures=True)
+        raise
+    pool.shutdown()
+
+    return [notes[i] for i in sorted(notes)]
+
+
+def _reduce(notes, on_progress=None) -> str:
+    level = 0
+    while True:
+        level += 1
+        if sum(estimate_tokens(n) for n in notes) <= DOC_REDUCE_TOKENS:
+            if on_progress:
+                on_progress("reduce", "RUNNING (son birleştirme)")
+            return merge_document_notes(notes, final=True)
+
+        groups, cur, used = [], [], 0
+        for n in notes:
+            t = estimate_tokens(n)
+            if cur and used + t > DOC_REDUCE_TOKENS:
+                groups.append(cur)
+                cur, used = [], 0
+            cur.append(n)
+            used += t
+        groups.append(cur)
+        if len(groups) >= len(notes):
+            # tek not bile bütçeyi aşıyor; yine de son birleştirmeyi dene
+            return merge_document_notes(notes, final=True)
+
+        if on_progress:
+            on_progress("reduce", f"RUNNING (seviye {level}: {len(notes)} not -> {len(groups)})")
+        with ThreadPoolExecutor(max_workers=max(1, DOC_MAP_WORKERS)) as pool:
+            notes = list(pool.map(lambda g: merge_document_notes(g, final=False), groups))
+
+
+def process_document(path: pathlib.Path, on_progress=None) -> str:
+    """
+    Tek parçaya sığan doküman eskisi gibi tek çağrıyla (process_text_with_ai) işlenir.
+    on_progress(step, state): step = map / reduce
+    """
+    chunks = chunk_paragraphs(iter_paragraphs(path), DOC_CHUNK_TOKENS, estimate_tokens)
+    first = next(chunks, None)
+    if first is None:
+        raise ValueError("Dokümanda metin bulunamadı.")
+    second = next(chunks, None)
+
+    if second is None:
+        if on_progress:
+            on_progress("map", "SKIPPED (tek parça)")
+            on_progress("reduce", "RUNNING")
+        out = process_text_with_ai(first)
+    else:
+        def all_chunks():
+            yield first
+            yield second
+            yield from chunks
+
+        notes = _map_chunks(all_chunks(), on_progress)
+        if on_progress:
+            on_progress("map", f"DONE ({len(notes)} parça)")
+        out = _reduce(notes, on_progress)
+
+    if on_progress:
+        on_progress("reduce", "DONE")
+    logger.info("document %s processed", path.name)
+    return out
@@ -0,0 +1,131 @@
+import pathlib
+import re
+from datetime import datetime
+from typing import TYPE_CHECKING
+
+import md_blocks
+import profiling
+
+if TYPE_CHECKING:
+    from docx.document import Document
+
+# python-docx (lxml) ağır bir import: ilk DOCX üretiminde yüklenir
+
+CODE_FONT = "Consolas"
+
+
+def parse_md_table(text: str):
+    """
+    İlk Markdown tablosu: (header, rows) | None
+    """
+    for block in md_blocks.tokenize(text):
+        if block.kind == "table":
+            return block.rows[0], block.rows[1:]
+    return None
+
+
+_XML_INVALID = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+_XML_ESCAPES = {"&": "&amp;", "<": "&lt;", ">": "&gt;"}
+_XML_ESCAPE = re.compile("[&<>]")
+_CELL_BREAKS = re.compile("([\t\r\n])")
+
+
+def _cell_xml(tc_pr: str, text: str) -> str:
+    # cell.text ile aynı yapı: <w:p><w:r><w:t/>, \t -> <w:tab/>, her \r / \n -> <w:br/>
+    if not text:
+        return f"<w:tc>{tc_pr}<w:p><w:r/></w:p></w:tc>"
+    text = _XML_ESCAPE.sub(lambda m: _XML_ESCAPES[m.group()], _XML_INVALID.sub("", text))
+    parts = []
+    for piece in _CELL_BREAKS.split(text):
+        if piece == "\t":
+            parts.append("<w:tab/>")
+        elif piece in ("\r", "\n"):
+            parts.append("<w:br/>")
+        elif piece:
+            space = ' xml:space="preserve"' if piece[0].isspace() or piece[-1].isspace() else ""
+            parts.append(f"<w:t{space}>{piece}</w:t>")
+    return f"<w:tc>{tc_pr}<w:p><w:r>{''.join(parts)}</w:r></w:p></w:tc>"
+
+
+def docx_add_table(doc: "Document", rows) -> None:
+    """
+    rows = [header, *body]. Tabloyu satır satır python-docx API'siyle değil, tüm
+    <w:tr>'leri tek XML parçası olarak üretip tek seferde parse ederek ekler
+    (büyük tablolarda çok daha hızlı).
+    """
+    from docx.oxml import parse_xml
+    from docx.oxml.ns import nsdecls, qn
+
+    # tblPr / tblGrid / stil python-docx'ten; şablon satır yalnızca hücre genişlikleri için
+    table = doc.add_table(rows=1, cols=len(rows[0]))
+    table.style = "Table Grid"
+    tbl = table._tbl
+
+    tc_prs = [
+        f'<w:tcPr><w:tcW w:type="dxa" w:w="{col.get(qn("w:w"))}"/></w:tcPr>'
+        for col in tbl.tblGrid.findall(qn("w:gridCol"))
+    ]
+    tbl.remove(tbl.tr_lst[0])
+
+    xml = "".join(
+        "<w:tr>" + "".join(_cell_xml(tc_pr, val) for tc_pr, val in zip(tc_prs, r)) + "</w:tr>"
+        for r in rows
+    )
+    tbl.extend(parse_xml(f"<w:tbl {nsdecls('w')}>{xml}</w:tbl>").findall(qn("w:tr")))
+
+
+def docx_add_md_table(doc: "Document", title: str, md_table_text: str) -> bool:
+    parsed = parse_md_table(md_table_text)
+    if not parsed:
+        return False
+
+    header, rows = parsed
+
+    doc.add_heading(title, level=2)
+    docx_add_table(doc, [header, *rows])
+    doc.add_paragraph("")
+    return True
+
+
+def docx_add_block(doc: "Document", title: str, content: str, allow_table: bool = True):
+    """
+    Çıktıyı md_blocks ile bloklara ayırıp her birini Word karşılığıyla yazar:
+    başlık -> heading, tablo -> tablo, code fence -> tek parça monospace paragraf.
+    allow_table=False: tablolar ham satırlar olarak yazılır.
+    """
+    doc.add_heading(title, level=2)
+    for block in md_blocks.tokenize(content):
+        if block.kind == "heading":
+            # bölüm başlığı level 2; çıktı içindeki başlıklar onun altında
+            doc.add_heading(_XML_INVALID.sub("", block.text), level=min(block.level + 2, 9))
+        elif block.kind == "table" and allow_table:
+            docx_add_table(doc, block.rows)
+            doc.add_paragraph("")
+        elif block.kind == "code":
+            run = doc.add_paragraph().add_run(_XML_INVALID.sub("", block.text))
+            run.font.name = CODE_FONT
+        elif block.kind == "table":
+            for line in block.text.splitlines():
+                doc.add_paragraph(_XML_INVALID.sub("", line))
+        else:
+            doc.add_paragraph(_XML_INVALID.sub("", block.text))
+    doc.add_paragraph("")
+
+
+def new_project_document(p: dict) -> "Document":
+    from docx import Document
+
+    doc = Document()
+    doc.add_heading(p["title"], level=1)
+    doc.add_paragraph(f"Domain: {p['domain']}")
+    doc.add_paragraph(f"Primary Entity: {p['primary_entity']}")
+    doc.add_paragraph("")
+    return doc
+
+
+def save_project_document(doc: "Document", project_id: int, out_dir: pathlib.Path) -> pathlib.Path:
+    ts = datetime.utcnow().strftime("%Y%m%d_%H%M%S")
+    out_path = out_dir / f"project_{project_id}_all_{ts}.docx"
+    with profiling.phase("docx_save"):
+        doc.save(str(out_path))
+    return out_path
@@ -1,23 +1,91 @@
 import pathlib
-from docx import Document
+import zipfile
 
-def extract_text(path: pathlib.Path) -> str:
+_W = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+
+
+def _iter_docx_paragraphs(path: pathlib.Path):
+    # document.xml iterparse ile okunur; işlenen <w:p>'ler bellekten atılır
+    from lxml import etree  # python-docx bağımlılığı
+
+    with zipfile.ZipFile(str(path)) as zf, zf.open("word/document.xml") as f:
+        for _, el in etree.iterparse(f, events=("end",), tag=f"{_W}p"):
+            parts = []
+            for node in el.iter(f"{_W}t", f"{_W}tab", f"{_W}br"):
+                if node.tag == f"{_W}t":
+                    parts.append(node.text or "")
+                else:
+                    parts.append("\t" if node.tag == f"{_W}tab" else "\n")
+            text = "".join(parts).strip()
+
+            el.clear()
+            parent = el.getparent()
+            while el.getprevious() is not None and parent is not None:
+                del parent[0]
+
+            if text:
+                yield text
+
+
+def iter_paragraphs(path: pathlib.Path):
+    """
+    Dosyayı tümüyle belleğe almadan paragrafları sırayla üretir.
+    .docx: boş olmayan paragraflar; .txt: satırlar olduğu gibi (yalnızca satır sonu atılır),
+    böylece extract_text dosyanın kendisini verir.
+    """
     ext = path.suffix.lower()
     if ext == ".docx":
-        doc = Document(str(path))
-        parts = []
-        for p in doc.paragraphs:
-            t = (p.text or "").strip()
-            if t:
-                parts.append(t)
-        return "\n".join(parts).strip()
+        yield from _iter_docx_paragraphs(path)
+        return
 
     if ext == ".txt":
-        return path.read_text(encoding="utf-8", errors="ignore").strip()
+        with open(path, encoding="utf-8", errors="ignore") as f:
+            for line in f:
+                yield line.rstrip("\n")
+        return
 
     raise ValueError("Desteklenmeyen dosya türü. (.docx, .txt)")
 
+
+def extract_text(path: pathlib.Path) -> str:
+    return "\n".join(iter_paragraphs(path)).strip()
+
+
+def chunk_paragraphs(paragraphs, max_tokens: int, count_tokens):
+    """
+    Paragrafları max_tokens bütçesini aşmayan parçalar halinde birleştirir (generator).
+    Bütçeden uzun tek paragraf kelime sınırlarından bölünür.
+    """
+    buf, used = [], 0
+    for para in paragraphs:
+        pieces = [para]
+        if count_tokens(para) > max_tokens:
+            pieces, cur, cur_tokens = [], [], 0
+            for word in para.split():
+                t = count_tokens(word + " ")
+                if cur and cur_tokens + t > max_tokens:
+                    pieces.append(" ".join(cur))
+                    cur, cur_tokens = [], 0
+                cur.append(word)
+                cur_tokens += t
+            if cur:
+                pieces.append(" ".join(cur))
+
+        for piece in pieces:
+            t = count_tokens(piece)
+            if buf and used + t > max_tokens:
+                yield "\n".join(buf)
+                buf, used = [], 0
+            buf.append(piece)
+            used += t
+
+    if buf:
+        yield "\n".join(buf)
+
+
 def write_docx_from_text(text: str, out_path: pathlib.Path):
+    from docx import Document
+
     doc = Document()
     for line in text.splitlines():
         doc.add_paragraph(line)
@@ -0,0 +1,275 @@
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import tempfile
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+
+import db
+import profiling
+import singleflight
+from ai_processor import action_output_deps, input_fingerprint, run_project_action
+from docx_export import docx_add_block, new_project_document, save_project_document
+from plantuml_utils import sanitize_plantuml
+
+APP_DIR = pathlib.Path(__file__).resolve().parent
+OUTPUT_DIR = APP_DIR / "outputs"
+OUTPUT_DIR.mkdir(exist_ok=True)
+EXPORT_DIR = OUTPUT_DIR / "exports"
+EXPORT_FORMAT = 1  # build_project_docx çıktısı değişince artır (eski export cache'i geçersiz olur)
+
+GENERATE_MAX_WORKERS = int(os.getenv("GENERATE_MAX_WORKERS", "4"))  # create_and_generate eşzamanlı LLM çağrısı
+
+logger = logging.getLogger(__name__)
+
+ALL_ACTIONS = [
+    ("business_rules", "Business Rules"),
+    ("er_tables", "ER Tables"),
+    ("missing_rules", "Missing Rules"),
+    ("normalization", "Normalization (0NF → 3NF)"),
+    ("er_plantuml", "ER Diagram (PlantUML)"),
+    ("sql_script", "SQL Script"),
+    ("report", "Report Queries"),
+]
+
+
+def load_upstream(project_id: int, action_key: str) -> dict:
+    """
+    Tek action çalıştırılırken bağlı olduğu önceki çıktıları DB'den getirir.
+    """
+    deps = action_output_deps(action_key)
+    if not deps:
+        return {}
+    latest = db.get_latest_project_outputs(project_id, deps)
+    return {k: row["output_text"] for k, row in latest.items() if row}
+
+
+def generate_and_store(p: dict, action_key: str, force: bool = False, upstream: dict = None):
+    """
+    Returns: (output_text, usage | None)
+    """
+    started = time.perf_counter()
+    usage = None
+    try:
+        # aynı çıktıyı o anda project_run / başka bir worker üretiyorsa onunkini paylaş
+        with singleflight.flight(singleflight.generation_key(p, action_key, upstream, force)) as f:
+            if f.result is None:
+                prompt_text, output_text, model_used, usage = run_project_action(
+                    p, action_key, temperature=0.2, force=force, upstream=upstream
+                )
+
+                if action_key == "er_plantuml":
+                    with profiling.phase("plantuml"):
+                        output_text = sanitize_plantuml(output_text)
+
+                out_id = db.insert_project_output(
+                    project_id=p["id"],
+                    action_key=action_key,
+                    prompt_text=prompt_text,
+                    output_text=output_text,
+                    model=model_used,
+                    temperature=0.2,
+                    input_fingerprint=input_fingerprint(p, action_key, upstream, 0.2),
+                    **db.usage_columns(usage),
+                )
+                f.result = {"out_id": out_id, "output_text": output_text, "prompt_text": prompt_text,
+                            "model": model_used}
+    except Exception:
+        logger.warning("project=%s action=%s failed after %.2fs",
+                       p["id"], action_key, time.perf_counter() - started)
+        raise
+
+    if f.shared:
+        logger.info("project=%s action=%s shared in-flight result in %.2fs",
+                    p["id"], action_key, time.perf_counter() - started)
+        return f.result["output_text"], None
+
+    logger.info("project=%s action=%s done in %.2fs (prompt_tokens=%s cached_tokens=%s)",
+                p["id"], action_key, time.perf_counter() - started,
+                usage.get("prompt_tokens", "-") if usage else "-", usage.get("cached_tokens", "-") if usage else "-")
+    return output_text, usage
+
+
+def run_in_dependency_order(action_keys, run_one, max_workers: int = None) -> dict:
+    """
+    run_one(action_key, upstream) çağrılarını paralel yapar; bir action, bağlı olduğu
+    action'lar (action_keys içindekiler) bitmeden başlamaz.
+    Returns: {action_key: (ok, output_text | exception)}
+    """
+    keys = list(action_keys)
+    results = {}
+    pending = list(keys)
+    running = {}
+
+    with ThreadPoolExecutor(max_workers=max(1, max_workers or GENERATE_MAX_WORKERS)) as pool:
+        while pending or running:
+            for key in list(pending):
+                deps = [d for d in action_output_deps(key) if d in keys]
+                if all(d in results for d in deps):
+                    # başarısız upstream'ler atlanır; action eldeki bilgiyle yine çalışır
+                    upstream = {d: results[d][1] for d in deps if results[d][0]}
+                    running[pool.submit(run_one, key, upstream)] = key
+                    pending.remove(key)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                key = running.pop(fut)
+                try:
+                    results[key] = (True, fut.result())
+                except Exception as e:
+                    results[key] = (False, e)
+
+    return results
+
+
+class GenerationCancelled(RuntimeError):
+    pass
+
+
+def with_dependencies(action_keys) -> list:
+    """
+    action_keys + bağlı oldukları action'lar, ALL_ACTIONS sırasıyla.
+    """
+    needed, stack = set(), list(action_keys)
+    while stack:
+        key = stack.pop()
+        if key not in needed:
+            needed.add(key)
+            stack.extend(action_output_deps(key))
+    return [key for key, _ in ALL_ACTIONS if key in needed]
+
+
+def generate_project_outputs(p: dict, on_progress=None, force: bool = False, max_workers: int = None,
+                             action_keys=None, should_continue=None) -> dict:
+    """
+    ALL_ACTIONS (ya da action_keys ve bağımlılıkları) çıktılarını üretir (DB'ye yazar).
+    Girdi fingerprint'i son kayıtlı çıktıyla aynı olan action yeniden üretilmez
+    (force=True hepsini yeniden üretir).
+    on_progress(action_key, state): state = RUNNING / DONE / REUSED / ERROR / CANCELLED
+    should_continue(): her action başlamadan sorulur; False ise kalan action'lar
+    GenerationCancelled ile biter.
+    Returns: {action_key: (ok, output_text | exception)}
+    """
+    progress_lock = threading.Lock()
+    keys = with_dependencies(action_keys) if action_keys else [key for key, _ in ALL_ACTIONS]
+    tokens = {"prompt": 0, "cached": 0}
+
+    def report(action_key: str, state: str):
+        if on_progress:
+            with progress_lock:
+                on_progress(action_key, state)
+
+    def run_one(action_key: str, upstream: dict) -> str:
+        if should_continue and not should_continue():
+            report(action_key, "CANCELLED")
+            raise GenerationCancelled("iptal edildi")
+
+        # iş sürerken başka bir istek (project_run) aynı çıktıyı üretmiş olabilir
+        prev = db.get_latest_project_output(p["id"], action_key)
+        if prev and not force and prev.get("input_fingerprint") == input_fingerprint(p, action_key, upstream, 0.2):
+            report(action_key, "REUSED")
+            return prev["output_text"]
+
+        report(action_key, "RUNNING")
+        try:
+            out, usage = generate_and_store(p, action_key, force=force, upstream=upstream)
+        except Exception:
+            report(action_key, "ERROR")
+            raise
+        if usage:
+            with progress_lock:
+                tokens["prompt"] += usage.get("prompt_tokens") or 0
+                tokens["cached"] += usage.get("cached_tokens") or 0
+        report(action_key, "DONE")
+        return out
+
+    results = run_in_dependency_order(keys, run_one, max_workers=max_workers)
+    if tokens["prompt"]:
+        logger.info("project=%s prompt_tokens=%d cached_tokens=%d (%.0f%% from provider prompt cache)",
+                    p["id"], tokens["prompt"], tokens["cached"], 100.0 * tokens["cached"] / tokens["prompt"])
+    return results
+
+
+def build_project_docx(p: dict, results: dict):
+    """
+    results: {action_key: (ok, output_text | exception)}; eksik action'lar HATA olarak yazılır.
+    DOCX'i ALL_ACTIONS sırasıyla kurar. Returns: (doc, failures)
+    """
+    with profiling.phase("docx_build"):
+        doc = new_project_document(p)
+        failures = []
+        for action_key, section_title in ALL_ACTIONS:
+            ok, value = results.get(action_key, (False, "çıktı yok"))
+            if ok:
+                docx_add_block(doc, section_title, value, allow_table=(action_key != "er_plantuml"))
+            else:
+                failures.append(f"{action_key}: {value}")
+                docx_add_block(doc, f"{section_title} (HATA)", str(value), allow_table=False)
+    return doc, failures
+
+
+def write_project_docx(p: dict, results: dict):
+    """
+    Returns: (out_path, failures)
+    """
+    doc, failures = build_project_docx(p, results)
+    out_path = save_project_document(doc, p["id"], OUTPUT_DIR)
+    return out_path, failures
+
+
+def export_key(p: dict, latest: dict) -> str:
+    """
+    Kayıtlı çıktılardan üretilen DOCX'in içerik anahtarı: çıktı id'leri + başlık alanları
+    (+ EXPORT_FORMAT; DOCX yazımı değişince artırılır).
+    """
+    payload = {
+        "format": EXPORT_FORMAT,
+        "project": [p["id"], p["title"], p["domain"], p["primary_entity"]],
+        "outputs": sorted(f"{k}:{row['id']}" for k, row in latest.items() if row),
+    }
+    return hashlib.sha256(json.dumps(payload, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def export_project_docx(p: dict):
+    """
+    LLM çağrısı yapmadan, son kayıtlı çıktılardan DOCX. Aynı çıktı seti için dosya
+    EXPORT_DIR'den tekrar kullanılır.
+    Returns: (path, key) — key ETag olarak kullanılabilir
+    """
+    latest = db.get_latest_project_outputs(p["id"], [key for key, _ in ALL_ACTIONS])
+    key = export_key(p, latest)
+    prefix = f"project_{p['id']}_"
+    path = EXPORT_DIR / f"{prefix}{key[:32]}.docx"
+    if path.exists():
+        return path, key
+
+    results = {k: (True, row["output_text"]) if row else (False, "çıktı yok") for k, row in latest.items()}
+    doc, _ = build_project_docx(p, results)
+
+    EXPORT_DIR.mkdir(parents=True, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=EXPORT_DIR, suffix=".tmp")
+    os.close(fd)
+    with profiling.phase("docx_save"):
+        doc.save(tmp)
+    os.replace(tmp, path)  # yarım dosya asla servis edilmez
+
+    # aynı projenin eski export'ları artık erişilemez
+    for old in EXPORT_DIR.glob(f"{prefix}*.docx"):
+        if old != path:
+            try:
+                old.unlink()
+            except FileNotFoundError:
+                pass
+    return path, key
+
+
+def generate_project_docx(p: dict, on_progress=None, force: bool = False):
+    """
+    generate_project_outputs + write_project_docx.
+    Returns: (out_path, failures)
+    """
+    results = generate_project_outputs(p, on_progress=on_progress, force=force)
+    return write_project_docx(p, results)
@@ -0,0 +1,18 @@
+import multiprocessing
+import os
+
+bind = os.getenv("BIND", "0.0.0.0:8000")
+workers = int(os.getenv("WEB_CONCURRENCY", str(multiprocessing.cpu_count() * 2 + 1)))
+threads = int(os.getenv("GUNICORN_THREADS", "4"))
+timeout = int(os.getenv("GUNICORN_TIMEOUT", "120"))
+preload_app = True
+
+
+def post_fork(server, worker):
+    # preload sonrası her worker kendi DB pool'unu ve OpenAI client'ını kursun
+    import ai_processor
+    import db
+
+    db.reset_pool_after_fork()
+    ai_processor.reset_after_fork()
+    db.check_cache_sync()  # cache_invalidations yoksa worker açılmaz (gunicorn durur)
@@ -0,0 +1,137 @@
+"""
+Arka plan worker'ı: create_and_generate işleri, yüklenen dokümanlar ve
+(PREFETCH=1 ise, kuyruk boşken) spekülatif ön üretim işleri.
+
+    python jobs.py            # sürekli çalışır
+    python jobs.py --once     # kuyrukta ne varsa işler, çıkar
+
+Birden fazla worker process aynı anda çalışabilir (SKIP LOCKED).
+"""
+import argparse
+import logging
+import os
+import pathlib
+import socket
+import time
+
+import db
+import prefetch
+from documents import DOCUMENT_STEPS, process_document
+from file_utils import write_docx_from_text
+from generation import ALL_ACTIONS, OUTPUT_DIR, generate_project_docx
+
+JOB_POLL_INTERVAL = float(os.getenv("JOB_POLL_INTERVAL", "2"))   # saniye: kuyruk boşken bekleme
+JOB_LOCK_TIMEOUT = int(os.getenv("JOB_LOCK_TIMEOUT", "900"))     # saniye: takılı PROCESSING işi tekrar al
+JOB_MAX_ATTEMPTS = int(os.getenv("JOB_MAX_ATTEMPTS", "3"))       # takılı iş bu kadar alındıysa dosya ERROR
+
+logger = logging.getLogger(__name__)
+
+
+def initial_progress(kind: str = "project") -> dict:
+    steps = DOCUMENT_STEPS if kind == "document" else ALL_ACTIONS
+    return {key: "QUEUED" for key, _ in steps}
+
+
+def enqueue_project_generation(project_id: int) -> int:
+    """
+    files satırını (UPLOADED) ve iş kaydını oluşturur; file_id döner.
+    """
+    file_id = db.insert_file(
+        original_name=f"PROJECT_{project_id}_ALL_OUTPUTS.docx",
+        mime_type="application/vnd.openxmlformats-officedocument.wordprocessingml.document",
+        input_path="",
+    )
+    db.insert_generation_job(project_id, file_id, initial_progress())
+    return file_id
+
+
+def enqueue_document_processing(file_id: int) -> int:
+    """
+    Yüklenmiş (files satırı UPLOADED) doküman için iş kaydı.
+    """
+    return db.insert_generation_job(None, file_id, initial_progress("document"), kind="document")
+
+
+def process_document_job(job: dict):
+    file_id = job["file_id"]
+    progress = initial_progress("document")
+
+    def on_progress(step: str, state: str):
+        progress[step] = state
+        db.update_generation_job_progress(job["id"], progress)
+
+    try:
+        input_path = pathlib.Path(job["input_path"])
+        text = process_document(input_path, on_progress=on_progress)
+        out_path = OUTPUT_DIR / f"{file_id}_{input_path.stem}_AI.docx"
+        write_docx_from_text(text, out_path)
+    except Exception as e:
+        logger.exception("job=%s file=%s failed", job["id"], file_id)
+        db.finish_generation_job(job["id"], file_id, "ERROR", error_message=str(e))
+        return
+
+    db.finish_generation_job(job["id"], file_id, "DONE", output_path=str(out_path))
+    logger.info("job=%s file=%s document done", job["id"], file_id)
+
+
+def process_job(job: dict):
+    if job.get("kind") == "document":
+        process_document_job(job)
+        return
+
+    file_id = job["file_id"]
+    progress = initial_progress()
+
+    def on_progress(action_key: str, state: str):
+        progress[action_key] = state
+        db.update_generation_job_progress(job["id"], progress)
+
+    try:
+        p = db.get_project(job["project_id"])
+        if not p:
+            raise RuntimeError(f"Project bulunamadı (ID={job['project_id']}).")
+
+        out_path, failures = generate_project_docx(p, on_progress=on_progress)
+    except Exception as e:
+        logger.exception("job=%s file=%s failed", job["id"], file_id)
+        db.finish_generation_job(job["id"], file_id, "ERROR", error_message=str(e))
+        return
+
+    # bölüm hataları DOCX'e yazıldı; dosya yine de indirilebilir
+    db.finish_generation_job(
+        job["id"],
+        file_id,
+        "DONE",
+        error_message=" | ".join(failures) if failures else None,
+        output_path=str(out_path),
+    )
+    logger.info("job=%s file=%s done (%d failed sections)", job["id"], file_id, len(failures))
+
+
+def run_worker(once: bool = False):
+    worker_id = f"{socket.gethostname()}:{os.getpid()}"
+    logger.info("worker %s started", worker_id)
+
+    while True:
+        job = db.claim_generation_job(worker_id, JOB_LOCK_TIMEOUT, JOB_MAX_ATTEMPTS)
+        if job:
+            process_job(job)
+            continue
+        # düşük öncelik: yalnızca kullanıcının beklediği iş yokken
+        job = db.claim_prefetch_job(worker_id, JOB_LOCK_TIMEOUT) if prefetch.PREFETCH_ENABLED else None
+        if job:
+            prefetch.process_prefetch_job(job)
+            continue
+        if once:
+            return
+        time.sleep(JOB_POLL_INTERVAL)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Project generation worker")
+    parser.add_argument("--once", action="store_true", help="kuyruk boşalınca çık")
+    args = parser.parse_args()
+
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    db.check_cache_sync()
+    run_worker(once=args.once)
@@ -0,0 +1,329 @@
+"""
+LLM backend'leri. ai_processor LLM_BACKEND ortam değişkenine göre birini seçer:
+
+  openai : gerçek OpenAI chat.completions
+  fake   : deterministik sahte backend (benchmark / offline geliştirme)
+
+Her backend aynı arayüzü sağlar:
+  model                                   -> str
+  complete(messages, temperature, action_key=None) -> (text, usage | None)
+      usage = {prompt_tokens, completion_tokens, total_tokens, cached_tokens}
+  open_stream(messages, temperature, action_key=None, usage=None) -> iterator[str]
+                                          (usage dict'i stream bitince doldurulur)
+  classify_error(exc)                     -> (kind, retry_after)  (rate_limiter.call için)
+
+asyncio karşılıkları (asgi.py):
+  acomplete(...)                          -> coroutine (text, usage | None)
+  aopen_stream(...)                       -> coroutine, async iterator[str] döner
+
+Toplu üretim (bulk_import) için batch arayüzü:
+  submit_batch([(custom_id, messages, temperature)]) -> batch_id
+  batch_status(batch_id)                  -> BATCH_TERMINAL içindeyse bitti
+  batch_results(batch_id)                 -> {custom_id: (text, usage) | Exception}
+"""
+import asyncio
+import hashlib
+import io
+import json
+import os
+import random
+import time
+import uuid
+from types import SimpleNamespace
+
+BATCH_TERMINAL = ("completed", "failed", "expired", "cancelled")
+
+
+class OpenAIBackend:
+    def __init__(self, model: str, api_key: str):
+        import openai
+        from openai import OpenAI
+
+        self._openai = openai
+        self.model = model
+        # retry'ları limiter yönetir; OPENAI_BASE_URL ile yerel sahte endpoint'e yönlendirilebilir
+        self.client = OpenAI(api_key=api_key, max_retries=0)
+        self._api_key = api_key
+        self._aclient = None
+
+    @property
+    def aclient(self):
+        # AsyncOpenAI ilk async çağrıda kurulur (sync kullanımda httpx.AsyncClient açılmaz)
+        if self._aclient is None:
+            from openai import AsyncOpenAI
+
+            self._aclient = AsyncOpenAI(api_key=self._api_key, max_retries=0)
+        return self._aclient
+
+    def complete(self, messages, temperature: float, action_key: str = None):
+        resp = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+        )
+        text = resp.choices[0].message.content or ""
+        usage = _usage_dict(resp.usage) if getattr(resp, "usage", None) else None
+        return text, usage
+
+    def open_stream(self, messages, temperature: float, action_key: str = None, usage: dict = None):
+        # HTTP isteği burada yapılır; limiter.stream ilk parçaya kadar retry eder, slotu stream sonuna kadar tutar
+        stream = self.client.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        return self._iter_stream(stream, usage)
+
+    @staticmethod
+    def _iter_stream(stream, usage: dict = None):
+        for chunk in stream:
+            # include_usage: son chunk'ta choices boş, usage dolu gelir
+            if usage is not None and getattr(chunk, "usage", None):
+                usage.update(_usage_dict(chunk.usage))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    async def acomplete(self, messages, temperature: float, action_key: str = None):
+        resp = await self.aclient.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+        )
+        text = resp.choices[0].message.content or ""
+        usage = _usage_dict(resp.usage) if getattr(resp, "usage", None) else None
+        return text, usage
+
+    async def aopen_stream(self, messages, temperature: float, action_key: str = None, usage: dict = None):
+        stream = await self.aclient.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            temperature=temperature,
+            stream=True,
+            stream_options={"include_usage": True},
+        )
+        return self._aiter_stream(stream, usage)
+
+    @staticmethod
+    async def _aiter_stream(stream, usage: dict = None):
+        async for chunk in stream:
+            if usage is not None and getattr(chunk, "usage", None):
+                usage.update(_usage_dict(chunk.usage))
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta.content
+            if delta:
+                yield delta
+
+    def submit_batch(self, requests) -> str:
+        buf = io.BytesIO()
+        for custom_id, messages, temperature in requests:
+            line = {
+                "custom_id": custom_id,
+                "method": "POST",
+                "url": "/v1/chat/completions",
+                "body": {"model": self.model, "messages": messages, "temperature": temperature},
+            }
+            buf.write(json.dumps(line, ensure_ascii=False).encode("utf-8") + b"\n")
+
+        f = self.client.files.create(file=("batch.jsonl", buf.getvalue()), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=f.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h",
+        )
+        return batch.id
+
+    def batch_status(self, batch_id: str) -> str:
+        return self.client.batches.retrieve(batch_id).status
+
+    def batch_results(self, batch_id: str) -> dict:
+        batch = self.client.batches.retrieve(batch_id)
+        results = {}
+        for file_id in (batch.output_file_id, batch.error_file_id):
+            if not file_id:
+                continue
+            for line in self.client.files.content(file_id).text.splitlines():
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                resp = item.get("response") or {}
+                if item.get("error") or resp.get("status_code") != 200:
+                    err = item.get("error") or (resp.get("body") or {}).get("error")
+                    results[item["custom_id"]] = RuntimeError(f"Batch isteği başarısız: {err}")
+                    continue
+                body = resp["body"]
+                text = body["choices"][0]["message"]["content"] or ""
+                usage = _usage_dict(SimpleNamespace(**body["usage"])) if body.get("usage") else None
+                results[item["custom_id"]] = (text, usage)
+        return results
+
+    def classify_error(self, e: Exception):
+        from rate_limiter import retry_after_seconds
+
+        openai = self._openai
+        if isinstance(e, openai.RateLimitError):
+            return "rate_limited", retry_after_seconds(e.response.headers)
+        if isinstance(e, (openai.APIConnectionError, openai.APITimeoutError, openai.InternalServerError)):
+            return "retryable", None
+        if isinstance(e, openai.APIStatusError) and e.status_code in (408, 409):
+            return "retryable", retry_after_seconds(e.response.headers)
+        return None, None
+
+
+def _usage_dict(u) -> dict:
+    # prompt_tokens_details.cached_tokens: provider prompt cache'inden gelen input token'ları
+    details = getattr(u, "prompt_tokens_details", None)
+    if isinstance(details, dict):
+        cached = details.get("cached_tokens")
+    else:
+        cached = getattr(details, "cached_tokens", None)
+    return {
+        "prompt_tokens": u.prompt_tokens,
+        "completion_tokens": u.completion_tokens,
+        "total_tokens": u.total_tokens,
+        "cached_tokens": cached or 0,
+    }
+
+
+class FakeBackend:
+    """
+    Aynı prompt -> aynı çıktı. Gecikme ve boyut ayarlanabilir:
+      LLM_FAKE_LATENCY_MS   toplam yanıt süresi
+      LLM_FAKE_TTFT_MS      streaming'de ilk parçaya kadar geçen süre
+      LLM_FAKE_ROWS         tablo çıktılarındaki satır sayısı
+    """
+
+    model = "fake-llm"
+
+    def __init__(self, latency_ms: float = 800, ttft_ms: float = 150, rows: int = 15):
+        self.latency = latency_ms / 1000.0
+        self.ttft = min(ttft_ms / 1000.0, self.latency)
+        self.rows = rows
+        self._batches = {}
+
+    def _render(self, messages, action_key: str) -> str:
+        seed = hashlib.sha256("".join(m["content"] for m in messages).encode("utf-8")).hexdigest()
+        rnd = random.Random(seed)
+        words = ["kullanici", "siparis", "urun", "odeme", "rol", "kayit", "durum", "tarih", "tutar", "adres"]
+
+        if action_key == "er_plantuml":
+            lines = ["```plantuml", "@startuml"]
+            names = [f"{w.title()}{i}" for i, w in enumerate(rnd.sample(words, min(self.rows, len(words))))]
+            for n in names:
+                lines += [f"entity {n} {{", "  *id : INT <<PK>>", "  name : VARCHAR", "}"]
+            for a, b in zip(names, names[1:]):
+                lines.append(f"{a} ||--o{{ {b} : has")
+            lines += ["@enduml", "```"]
+            return "\n".join(lines)
+
+        if action_key in ("sql_script", "report"):
+            return "\n".join(
+                f"SELECT {rnd.choice(words)}_id, COUNT(*) FROM {rnd.choice(words)} GROUP BY 1; -- {i}"
+                for i in range(self.rows)
+            )
+
+        header = "| BR-ID | Tür | Kural | ER Etkisi | Uygulama İpucu | Gerekçe |"
+        sep = "|---|---|---|---|---|---|"
+        rows = [
+            f"| BR-{i:02d} | Yapısal | {' '.join(rnd.choices(words, k=6))} | UNIQUE | FK | {rnd.choice(words)} |"
+            for i in range(1, self.rows + 1)
+        ]
+        return "\n".join([header, sep, *rows])
+
+    def complete(self, messages, temperature: float, action_key: str = None):
+        text = self._render(messages, action_key)
+        time.sleep(self.latency)
+        return text, self._usage(messages, text)
+
+    @staticmethod
+    def _usage(messages, text: str) -> dict:
+        prompt_tokens = sum(len(m["content"]) for m in messages) // 4
+        completion_tokens = len(text) // 4
+        return {
+            "prompt_tokens": prompt_tokens,
+            "completion_tokens": completion_tokens,
+            "total_tokens": prompt_tokens + completion_tokens,
+            "cached_tokens": 0,
+        }
+
+    def open_stream(self, messages, temperature: float, action_key: str = None, usage: dict = None):
+        text = self._render(messages, action_key)
+        return self._iter_stream(text, self._usage(messages, text), usage)
+
+    def _iter_stream(self, text: str, final_usage: dict, usage: dict = None):
+        time.sleep(self.ttft)
+        chunks = [text[i:i + 32] for i in range(0, len(text), 32)] or [""]
+        gap = (self.latency - self.ttft) / len(chunks)
+        for c in chunks:
+            yield c
+            if gap > 0:
+                time.sleep(gap)
+        if usage is not None:
+            usage.update(final_usage)
+
+    async def acomplete(self, messages, temperature: float, action_key: str = None):
+        text = self._render(messages, action_key)
+        await asyncio.sleep(self.latency)
+        return text, self._usage(messages, text)
+
+    async def aopen_stream(self, messages, temperature: float, action_key: str = None, usage: dict = None):
+        text = self._render(messages, action_key)
+        return self._aiter_stream(text, self._usage(messages, text), usage)
+
+    async def _aiter_stream(self, text: str, final_usage: dict, usage: dict = None):
+        await asyncio.sleep(self.ttft)
+        chunks = [text[i:i + 32] for i in range(0, len(text), 32)] or [""]
+        gap = (self.latency - self.ttft) / len(chunks)
+        for c in chunks:
+            yield c
+            if gap > 0:
+                await asyncio.sleep(gap)
+        if usage is not None:
+            usage.update(final_usage)
+
+    def submit_batch(self, requests) -> str:
+        # yerel batch: sonuçlar hemen hazır (process içinde tutulur, resume'da yeniden gönderilir)
+        batch_id = f"fakebatch_{uuid.uuid4().hex}"
+        results = {}
+        for custom_id, messages, temperature in requests:
+            text = self._render(messages, custom_id.rsplit(":", 1)[-1])
+            results[custom_id] = (text, self._usage(messages, text))
+        time.sleep(self.latency)
+        self._batches[batch_id] = results
+        return batch_id
+
+    def batch_status(self, batch_id: str) -> str:
+        return "completed" if batch_id in self._batches else "expired"
+
+    def batch_results(self, batch_id: str) -> dict:
+        return dict(self._batches.get(batch_id, {}))
+
+    def classify_error(self, e: Exception):
+        return None, None
+
+
+def backend_model(name: str, model: str) -> str:
+    # client kurmadan model adını bilmek için (cache anahtarı, DB kaydı)
+    return FakeBackend.model if name == "fake" else model
+
+
+def create_backend(name: str, model: str):
+    if name == "fake":
+        return FakeBackend(
+            latency_ms=float(os.getenv("LLM_FAKE_LATENCY_MS", "800")),
+            ttft_ms=float(os.getenv("LLM_FAKE_TTFT_MS", "150")),
+            rows=int(os.getenv("LLM_FAKE_ROWS", "15")),
+        )
+
+    if name == "openai":
+        api_key = os.getenv("OPENAI_API_KEY")
+        if not api_key:
+            raise RuntimeError("OPENAI_API_KEY bulunamadı (.env kontrol).")
+        return OpenAIBackend(model, api_key)
+
+    raise ValueError(f"Bilinmeyen LLM_BACKEND: {name}")
@@ -0,0 +1,165 @@
+"""
+İçerik adresli LLM yanıt cache'i.
+
+Anahtar: sha256(model, system, prompt, temperature). Aynı girdi -> aynı yanıt.
+İki katman:
+  1) process içi LRU (toplam byte boyutuna göre tahliye)
+  2) kalıcı katman: MySQL llm_cache tablosu (LLM_CACHE_PERSIST=db); satırlar LLM_CACHE_TTL
+     sonra okunmaz, put en fazla LLM_CACHE_PRUNE_INTERVAL'da bir süresi dolanları siler
+"""
+import hashlib
+import json
+import logging
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import db
+
+LLM_CACHE_ENABLED = os.getenv("LLM_CACHE", "1") == "1"
+LLM_CACHE_MAX_BYTES = int(os.getenv("LLM_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+LLM_CACHE_PERSIST = os.getenv("LLM_CACHE_PERSIST", "db")  # db | none
+LLM_CACHE_TTL = int(os.getenv("LLM_CACHE_TTL", str(30 * 24 * 3600)))          # saniye: kalıcı satır ömrü
+LLM_CACHE_PRUNE_INTERVAL = float(os.getenv("LLM_CACHE_PRUNE_INTERVAL", "3600"))  # saniye: process başına
+LLM_CACHE_PRUNE_BATCH = int(os.getenv("LLM_CACHE_PRUNE_BATCH", "1000"))        # tek DELETE'in üst sınırı
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(model: str, system: str, prompt: str, temperature: float) -> str:
+    payload = json.dumps([model, system, prompt, float(temperature)], ensure_ascii=False)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class LRUCache:
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._data = OrderedDict()  # key -> (value, size)
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self.evictions = 0
+
+    def get(self, key: str):
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return None
+            self._data.move_to_end(key)
+            return item[0]
+
+    def put(self, key: str, value: str):
+        size = len(value.encode("utf-8"))
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._bytes -= old[1]
+            self._data[key] = (value, size)
+            self._bytes += size
+            while self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._data.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self._bytes = 0
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def size_bytes(self) -> int:
+        return self._bytes
+
+
+_memory = LRUCache(LLM_CACHE_MAX_BYTES)
+_stats_lock = threading.Lock()
+_stats = {"hits_memory": 0, "hits_persistent": 0, "misses": 0, "bypassed": 0, "stores": 0, "errors": 0,
+          "pruned": 0}
+_prune_state = {"at": 0.0}
+
+
+def _count(name: str):
+    with _stats_lock:
+        _stats[name] += 1
+
+
+def get(key: str):
+    if not LLM_CACHE_ENABLED:
+        return None
+
+    out = _memory.get(key)
+    if out is not None:
+        _count("hits_memory")
+        return out
+
+    if LLM_CACHE_PERSIST == "db":
+        try:
+            row = db.get_llm_cache_entry(key)
+        except Exception:
+            # cache hiçbir zaman üretimi bozmamalı
+            logger.warning("llm cache read failed", exc_info=True)
+            _count("errors")
+            row = None
+        if row:
+            _memory.put(key, row["output_text"])
+            _count("hits_persistent")
+            return row["output_text"]
+
+    _count("misses")
+    return None
+
+
+def put(key: str, model: str, output_text: str):
+    if not LLM_CACHE_ENABLED:
+        return
+
+    _memory.put(key, output_text)
+    if LLM_CACHE_PERSIST == "db":
+        try:
+            db.put_llm_cache_entry(key, model, output_text, LLM_CACHE_TTL)
+        except Exception:
+            logger.warning("llm cache write failed", exc_info=True)
+            _count("errors")
+            return
+        _maybe_prune()
+    _count("stores")
+
+
+def _maybe_prune():
+    now = time.monotonic()
+    with _stats_lock:
+        if now - _prune_state["at"] < LLM_CACHE_PRUNE_INTERVAL:
+            return
+        _prune_state["at"] = now
+    try:
+        n = db.prune_llm_cache(LLM_CACHE_PRUNE_BATCH)
+    except Exception:
+        logger.warning("llm cache prune failed", exc_info=True)
+        _count("errors")
+        return
+    if n:
+        with _stats_lock:
+            _stats["pruned"] += n
+        logger.info("llm cache: %d expired rows pruned", n)
+
+
+def note_bypass():
+    _count("bypassed")
+
+
+def stats() -> dict:
+    with _stats_lock:
+        out = dict(_stats)
+    out.update(
+        enabled=LLM_CACHE_ENABLED,
+        memory_entries=len(_memory),
+        memory_bytes=_memory.size_bytes,
+        memory_max_bytes=_memory.max_bytes,
+        memory_evictions=_memory.evictions,
+    )
+    return out
@@ -0,0 +1,129 @@
+"""
+LLM çıktısı (Markdown) için tek geçişli blok tokenizer.
+
+    for block in tokenize(text):
+        block.kind  -> heading | paragraph | table | code
+
+  heading   : level (1-6), text
+  paragraph : text (bir satır; boş satırlar atlanır)
+  table     : rows = [header, *body] (her satır header kadar hücre), text = ham satırlar
+  code      : lang, text (``` / ~~~ fence içi, olduğu gibi)
+
+Girdi str ya da satır iterable'ı olabilir; her satıra bir kez bakılır (doğrusal),
+tablo ayırıcısını görmek için yalnızca bir satır ileri okunur. Hücre içindeki
+\\| kaçışları | olarak döner.
+"""
+import re
+from typing import Iterable, Iterator, List, NamedTuple, Union
+
+_HEADING = re.compile(r"^(#{1,6})[ \t]+(.*?)(?:[ \t]+#+)?[ \t]*$")
+_FENCE = re.compile(r"^(`{3,}|~{3,})[ \t]*([^`\s]*)")
+_SEP_CELL = re.compile(r"^:?-+:?$")
+_CELL_SPLIT = re.compile(r"(?<!\\)\|")
+
+
+class Block(NamedTuple):
+    kind: str
+    text: str = ""
+    level: int = 0
+    lang: str = ""
+    rows: List[List[str]] = None
+
+
+def split_row(line: str) -> List[str]:
+    core = line.strip()
+    if core.startswith("|"):
+        core = core[1:]
+    if core.endswith("|") and not core.endswith("\\|"):
+        core = core[:-1]
+    return [c.strip().replace("\\|", "|") for c in _CELL_SPLIT.split(core)]
+
+
+def is_separator_row(line: str) -> bool:
+    s = line.strip()
+    if not s.startswith("|") or s.count("|") < 2:
+        return False
+    cells = split_row(s)
+    return bool(cells) and all(_SEP_CELL.match(c.replace(" ", "")) for c in cells)
+
+
+def _is_table_row(line: str) -> bool:
+    return line.lstrip().startswith("|")
+
+
+def _fit(cells: List[str], n: int) -> List[str]:
+    if len(cells) < n:
+        return cells + [""] * (n - len(cells))
+    return cells[:n]
+
+
+def _lines(source: Union[str, Iterable[str]]) -> Iterator[str]:
+    if isinstance(source, str):
+        # splitlines() tüm listeyi kurar; finditer ile satırlar tek tek üretilir
+        for m in re.finditer(r"[^\r\n]*(?:\r\n|\r|\n)|[^\r\n]+$", source):
+            yield m.group().rstrip("\r\n")
+    else:
+        for line in source:
+            yield line.rstrip("\r\n")
+
+
+def tokenize(source: Union[str, Iterable[str]]) -> Iterator[Block]:
+    lines = _lines(source or "")
+    pending = None  # bir satırlık lookahead
+
+    def next_line():
+        nonlocal pending
+        if pending is not None:
+            line, pending = pending, None
+            return line
+        return next(lines, None)
+
+    while True:
+        line = next_line()
+        if line is None:
+            return
+        stripped = line.strip()
+        if not stripped:
+            continue
+
+        fence = _FENCE.match(stripped)
+        if fence:
+            marker = fence.group(1)
+            body = []
+            while True:
+                inner = next_line()
+                if inner is None:
+                    break
+                s = inner.strip()
+                if s.startswith(marker[0] * len(marker)) and not s.strip(marker[0]):
+                    break
+                body.append(inner)
+            yield Block("code", "\n".join(body), lang=fence.group(2))
+            continue
+
+        heading = _HEADING.match(stripped)
+        if heading:
+            yield Block("heading", heading.group(2), level=len(heading.group(1)))
+            continue
+
+        if _is_table_row(stripped):
+            sep = next_line()
+            if sep is not None and is_separator_row(sep):
+                header = split_row(stripped)
+                n = len(header)
+                rows = [header]
+                raw = [stripped, sep.strip()]
+                while True:
+                    row = next_line()
+                    if row is None:
+                        break
+                    if not _is_table_row(row):
+                        pending = row
+                        break
+                    raw.append(row.strip())
+                    rows.append(_fit(split_row(row), n))
+                yield Block("table", "\n".join(raw), rows=rows)
+                continue
+            pending = sep
+
+        yield Block("paragraph", stripped)
@@ -0,0 +1,170 @@
+"""
+Prometheus text formatında process içi metrikler (/metrics).
+
+  Counter / Histogram   : label'lı, thread-safe
+  register_collector(fn): scrape anında çağrılır, [(name, type, help, {labels: value})] döner
+                          (DB pool, LLM cache, rate limiter gibi anlık değerler için)
+
+Birden fazla worker process'te (gunicorn) her process kendi değerlerini tutar;
+Prometheus her worker'ı ayrı hedef olarak ya da proxy üzerinden toplamalıdır.
+"""
+import os
+import threading
+
+# USD / 1M token; 0 ise maliyet metriği yazılmaz
+LLM_PRICE_INPUT = float(os.getenv("LLM_PRICE_INPUT_PER_MTOK", "0.15"))
+LLM_PRICE_CACHED_INPUT = float(os.getenv("LLM_PRICE_CACHED_INPUT_PER_MTOK", "0.075"))
+LLM_PRICE_OUTPUT = float(os.getenv("LLM_PRICE_OUTPUT_PER_MTOK", "0.60"))
+
+LATENCY_BUCKETS = (0.25, 0.5, 1, 2, 5, 10, 20, 30, 60, 120, 300)
+TTFT_BUCKETS = (0.1, 0.25, 0.5, 1, 2, 5, 10, 30)
+
+_registry = []
+_collectors = []
+_lock = threading.Lock()
+
+
+def _fmt_labels(names, values, extra=None) -> str:
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ""
+    esc = [(k, str(v).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")) for k, v in pairs]
+    return "{" + ",".join(f'{k}="{v}"' for k, v in esc) + "}"
+
+
+def _fmt_value(v) -> str:
+    return repr(float(v)) if isinstance(v, float) else str(v)
+
+
+class Counter:
+    def __init__(self, name: str, help: str, labels=()):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self._values = {}
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def inc(self, amount: float = 1, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0) + amount
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted(self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        lines += [f"{self.name}{_fmt_labels(self.labels, k)} {_fmt_value(v)}" for k, v in items]
+        return lines
+
+
+class Histogram:
+    def __init__(self, name: str, help: str, labels=(), buckets=LATENCY_BUCKETS):
+        self.name, self.help, self.labels = name, help, tuple(labels)
+        self.buckets = tuple(sorted(buckets))
+        self._values = {}  # key -> [bucket counts..., sum, count]
+        self._lock = threading.Lock()
+        _registry.append(self)
+
+    def observe(self, value: float, **labels):
+        key = tuple(labels.get(n, "") for n in self.labels)
+        with self._lock:
+            v = self._values.get(key)
+            if v is None:
+                v = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, b in enumerate(self.buckets):
+                if value <= b:
+                    v[i] += 1
+            v[-2] += value
+            v[-1] += 1
+
+    def render(self) -> list:
+        with self._lock:
+            items = sorted((k, list(v)) for k, v in self._values.items())
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        for key, v in items:
+            for i, b in enumerate(self.buckets):
+                lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, [('le', b)])} {v[i]}")
+            lines.append(f"{self.name}_bucket{_fmt_labels(self.labels, key, [('le', '+Inf')])} {v[-1]}")
+            lines.append(f"{self.name}_sum{_fmt_labels(self.labels, key)} {_fmt_value(v[-2])}")
+            lines.append(f"{self.name}_count{_fmt_labels(self.labels, key)} {v[-1]}")
+        return lines
+
+
+def register_collector(fn):
+    with _lock:
+        _collectors.append(fn)
+    return fn
+
+
+def stats_collector(prefix: str, stats_fn, counters=()):
+    """
+    stats() dict'i döndüren bir fonksiyonun sayısal alanlarını metrik olarak yayınlar
+    (counters içindekiler counter, diğerleri gauge).
+    """
+    def collect():
+        samples = []
+        for key, value in stats_fn().items():
+            if isinstance(value, bool) or not isinstance(value, (int, float)):
+                continue
+            if key in counters:
+                name = f"{prefix}_{key}" if key.endswith("_total") else f"{prefix}_{key}_total"
+                samples.append((name, "counter", f"{prefix} {key}", {(): value}))
+            else:
+                samples.append((f"{prefix}_{key}", "gauge", f"{prefix} {key}", {(): value}))
+        return samples
+
+    return register_collector(collect)
+
+
+def render() -> str:
+    lines = []
+    for metric in list(_registry):
+        lines += metric.render()
+    for fn in list(_collectors):
+        try:
+            samples = fn()
+        except Exception:
+            continue  # örn. DB pool henüz kurulmadı
+        for name, kind, help_text, values in samples:
+            lines += [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+            for labels, value in values.items():
+                names = [k for k, _ in labels]
+                lines.append(f"{name}{_fmt_labels(names, [v for _, v in labels])} {_fmt_value(value)}")
+    return "\n".join(lines) + "\n"
+
+
+# =========================
+# LLM çağrıları
+# =========================
+LLM_REQUESTS = Counter("llm_requests_total", "LLM çağrıları", ("model", "action", "mode", "outcome"))
+LLM_DURATION = Histogram("llm_request_duration_seconds", "LLM çağrısı duvar saati süresi (limiter beklemesi dahil)",
+                         ("model", "action", "mode"))
+LLM_TTFT = Histogram("llm_time_to_first_token_seconds", "Streaming: ilk parçaya kadar geçen süre",
+                     ("model", "action"), buckets=TTFT_BUCKETS)
+LLM_TOKENS = Counter("llm_tokens_total", "Provider'ın bildirdiği token sayıları", ("model", "action", "type"))
+LLM_COST = Counter("llm_cost_usd_total", "Token fiyatlarından hesaplanan tahmini maliyet (USD)", ("model", "action"))
+
+
+def llm_cost(usage: dict) -> float:
+    prompt = usage.get("prompt_tokens") or 0
+    cached = usage.get("cached_tokens") or 0
+    completion = usage.get("completion_tokens") or 0
+    return ((prompt - cached) * LLM_PRICE_INPUT + cached * LLM_PRICE_CACHED_INPUT
+            + completion * LLM_PRICE_OUTPUT) / 1_000_000
+
+
+def observe_llm_call(model: str, action_key: str, mode: str, outcome: str, seconds: float,
+                     ttft: float = None, usage: dict = None):
+    """
+    mode: complete | stream, outcome: ok | error | aborted
+    """
+    action = action_key or "none"
+    LLM_REQUESTS.inc(model=model, action=action, mode=mode, outcome=outcome)
+    LLM_DURATION.observe(seconds, model=model, action=action, mode=mode)
+    if ttft is not None:
+        LLM_TTFT.observe(ttft, model=model, action=action)
+    if usage:
+        for kind in ("prompt", "completion", "cached"):
+            LLM_TOKENS.inc(usage.get(f"{kind}_tokens") or 0, model=model, action=action, type=kind)
+        cost = llm_cost(usage)
+        if cost:
+            LLM_COST.inc(cost, model=model, action=action)
@@ -0,0 +1,39 @@
+-- Temel şema (db.py'nin kullandığı tablolar). Yeni kurulumlar ve
+-- bench/docker-compose.yml içindeki MySQL bu dosyadan başlar; sonraki
+-- migration'lar numara sırasıyla uygulanır.
+CREATE TABLE IF NOT EXISTS files (
+    id             INT AUTO_INCREMENT PRIMARY KEY,
+    original_name  VARCHAR(255) NOT NULL,
+    mime_type      VARCHAR(150) NOT NULL,
+    input_path     VARCHAR(500) NOT NULL DEFAULT '',
+    output_path    VARCHAR(500) NULL,
+    status         VARCHAR(20) NOT NULL DEFAULT 'UPLOADED',  -- UPLOADED / PROCESSING / DONE / ERROR
+    error_message  TEXT NULL,
+    created_at     DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+CREATE TABLE IF NOT EXISTS projects (
+    id                     INT AUTO_INCREMENT PRIMARY KEY,
+    title                  VARCHAR(255) NOT NULL,
+    domain                 VARCHAR(255) NOT NULL,
+    primary_entity         VARCHAR(255) NOT NULL,
+    constraints_text       TEXT,
+    advanced_feature       TEXT,
+    security_access        TEXT,
+    reporting_requirement  TEXT,
+    common_tasks           TEXT,
+    created_at             DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_projects_title (title)
+);
+
+CREATE TABLE IF NOT EXISTS project_ai_outputs (
+    id           BIGINT AUTO_INCREMENT PRIMARY KEY,
+    project_id   INT NOT NULL,
+    action_key   VARCHAR(50) NOT NULL,
+    prompt_text  MEDIUMTEXT,
+    output_text  MEDIUMTEXT,
+    model        VARCHAR(100) NOT NULL,
+    temperature  DECIMAL(3,2) NOT NULL DEFAULT 0.20,
+    created_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    CONSTRAINT fk_pao_project FOREIGN KEY (project_id) REFERENCES projects (id) ON DELETE CASCADE
+);
@@ -0,0 +1,4 @@
+-- project_detail sayfası: her action için en son çıktı (groupwise-max)
+-- db.get_latest_project_outputs() bu index üzerinden tek sorguda okur.
+ALTER TABLE project_ai_outputs
+    ADD INDEX idx_pao_project_action_id (project_id, action_key, id);
@@ -0,0 +1,19 @@
+-- create_and_generate arka plan kuyruğu (jobs.py worker'ı tüketir).
+-- Kullanıcıya görünen durum files.status üzerinden ilerler:
+-- UPLOADED -> PROCESSING -> DONE / ERROR
+-- generation_jobs.status kuyruk durumudur (QUEUED -> RUNNING -> DONE / ERROR); worker yalnızca
+-- (status, id) index'iyle QUEUED / RUNNING satırlara bakar, biten iş geçmişini taramaz.
+CREATE TABLE IF NOT EXISTS generation_jobs (
+    id          BIGINT AUTO_INCREMENT PRIMARY KEY,
+    project_id  INT NOT NULL,
+    file_id     INT NOT NULL,
+    status      VARCHAR(20) NOT NULL DEFAULT 'QUEUED',
+    progress    JSON NULL,
+    attempts    INT NOT NULL DEFAULT 0,
+    locked_by   VARCHAR(128) NULL,
+    locked_at   DATETIME NULL,
+    created_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    UNIQUE KEY uq_generation_jobs_file (file_id),
+    KEY idx_generation_jobs_status (status, id),
+    KEY idx_generation_jobs_project (project_id)
+);
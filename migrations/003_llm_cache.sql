@@ -0,0 +1,10 @@
+-- llm_cache.py kalıcı katmanı: sha256(model, system, prompt, temperature) -> yanıt
+-- Satırlar LLM_CACHE_TTL sonra geçersizdir; süresi dolanları llm_cache.put aralıklı olarak siler.
+CREATE TABLE IF NOT EXISTS llm_cache (
+    cache_key    CHAR(64) NOT NULL PRIMARY KEY,
+    model        VARCHAR(100) NOT NULL,
+    output_text  MEDIUMTEXT NOT NULL,
+    created_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    expires_at   DATETIME NOT NULL,
+    KEY idx_llm_cache_expires (expires_at)
+);
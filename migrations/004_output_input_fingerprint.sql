@@ -0,0 +1,5 @@
+-- Her çıktının girdi parmak izi: sha256(model, system, prompt, temperature).
+-- Prompt yalnızca action'ın bağlı olduğu alanlardan ve önceki çıktılardan kurulur;
+-- fingerprint değişmediyse generation.generate_project_docx çıktıyı yeniden kullanır.
+ALTER TABLE project_ai_outputs
+    ADD COLUMN input_fingerprint CHAR(64) NULL AFTER temperature;
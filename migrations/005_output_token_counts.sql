@@ -0,0 +1,5 @@
+-- Provider'ın bildirdiği input token sayıları. cached_tokens: prompt prefix
+-- cache'inden karşılanan kısım (cache'ten dönen çıktılarda ikisi de NULL).
+ALTER TABLE project_ai_outputs
+    ADD COLUMN prompt_tokens INT NULL AFTER input_fingerprint,
+    ADD COLUMN cached_tokens INT NULL AFTER prompt_tokens;
@@ -0,0 +1,14 @@
+-- prompt_text dedup (text_blobs, sha256) + büyük output_text'lerin zlib ile saklanması.
+-- Eski satırlar olduğu gibi okunabilir; taşımak için: python compact_outputs.py
+CREATE TABLE IF NOT EXISTS text_blobs (
+    hash        CHAR(64) NOT NULL PRIMARY KEY,
+    encoding    VARCHAR(8) NOT NULL,           -- plain / zlib
+    body        MEDIUMBLOB NOT NULL,
+    raw_size    INT NOT NULL,                  -- sıkıştırılmamış UTF-8 bayt
+    created_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP
+);
+
+ALTER TABLE project_ai_outputs
+    ADD COLUMN prompt_hash CHAR(64) NULL AFTER action_key,
+    ADD COLUMN output_encoding VARCHAR(8) NOT NULL DEFAULT 'plain' AFTER output_text,
+    ADD COLUMN output_blob MEDIUMBLOB NULL AFTER output_encoding;
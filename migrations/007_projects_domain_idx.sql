@@ -0,0 +1,4 @@
+-- index sayfası domain filtresi: WHERE domain=? AND id<? ORDER BY id DESC
+-- (db.list_projects_page) bu index'te tek seek ile okunur.
+ALTER TABLE projects
+    ADD INDEX idx_projects_domain_id (domain, id);
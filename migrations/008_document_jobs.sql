@@ -0,0 +1,5 @@
+-- generation_jobs artık yüklenen dokümanları da taşır (documents.process_document):
+-- kind='document' işlerinin project'i yoktur, girdi files.input_path'tedir.
+ALTER TABLE generation_jobs
+    ADD COLUMN kind VARCHAR(20) NOT NULL DEFAULT 'project' AFTER id,
+    MODIFY project_id INT NULL;
@@ -0,0 +1,6 @@
+-- LLM çağrısı ölçümleri (ai_processor usage dict'inden; cache'ten gelen çıktılarda NULL).
+-- latency_ms: limiter beklemesi dahil duvar saati, ttft_ms: yalnızca streaming.
+ALTER TABLE project_ai_outputs
+    ADD COLUMN completion_tokens INT NULL AFTER cached_tokens,
+    ADD COLUMN latency_ms INT NULL AFTER completion_tokens,
+    ADD COLUMN ttft_ms INT NULL AFTER latency_ms;
@@ -0,0 +1,8 @@
+-- db.py okuma cache'i (DB_CACHE_SYNC=db): process'ler arası invalidation günlüğü.
+-- Her process id > son gördüğü id olan kayıtları okur; eski kayıtlar yazan taraf tarafından silinir.
+CREATE TABLE IF NOT EXISTS cache_invalidations (
+    id          BIGINT NOT NULL AUTO_INCREMENT PRIMARY KEY,
+    cache_key   VARCHAR(300) NOT NULL,
+    created_at  DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_cache_invalidations_created (created_at)
+);
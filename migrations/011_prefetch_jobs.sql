@@ -0,0 +1,16 @@
+-- prefetch.py: projects_create sonrası action'ların spekülatif ön üretimi (PREFETCH=1).
+-- jobs.py worker'ı bu tabloya yalnızca generation_jobs kuyruğu boşken bakar (düşük öncelik).
+CREATE TABLE IF NOT EXISTS prefetch_jobs (
+    id           BIGINT AUTO_INCREMENT PRIMARY KEY,
+    project_id   INT NOT NULL,
+    status       VARCHAR(20) NOT NULL DEFAULT 'QUEUED',
+    action_keys  JSON NOT NULL,
+    progress     JSON NULL,
+    expires_at   DATETIME NOT NULL,
+    touched_at   DATETIME NOT NULL,
+    locked_by    VARCHAR(128) NULL,
+    locked_at    DATETIME NULL,
+    created_at   DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_prefetch_jobs_status (status, id),
+    KEY idx_prefetch_jobs_project (project_id, id)
+);
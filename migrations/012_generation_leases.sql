@@ -0,0 +1,13 @@
+-- singleflight.py: aynı (proje, action, girdi) için eşzamanlı üretimleri process'ler arası birleştirir.
+-- Kirayı (lease) alan istek LLM'i çağırır; diğerleri satır DONE/ERROR olana kadar yoklar.
+-- expires_at geçmiş RUNNING kira (lider process öldü) başka bir istek tarafından devralınır.
+CREATE TABLE IF NOT EXISTS generation_leases (
+    lease_key      VARCHAR(191) NOT NULL PRIMARY KEY,
+    owner          VARCHAR(128) NOT NULL,
+    status         VARCHAR(20) NOT NULL DEFAULT 'RUNNING',
+    output_id      BIGINT NULL,
+    error_message  TEXT NULL,
+    expires_at     DATETIME NOT NULL,
+    created_at     DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+    KEY idx_generation_leases_expires (expires_at)
+);
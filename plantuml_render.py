@@ -0,0 +1,129 @@
+"""
+Sunucu tarafı PlantUML render + disk cache.
+
+PLANTUML_RENDERER:
+  none   : yerel render yok; tarayıcı PLANTUML_SERVER URL'ini kullanır (eski davranış)
+  jar    : java -jar $PLANTUML_JAR -pipe
+  server : yerel PlantUML server'a POST ($PLANTUML_LOCAL_SERVER/<fmt>)
+
+Render sonucu outputs/plantuml_cache/<sha256>.<fmt> altında saklanır; toplam boyut
+PLANTUML_CACHE_MAX_BYTES'ı geçince en az yakın zamanda kullanılanlar silinir.
+"""
+import hashlib
+import os
+import pathlib
+import subprocess
+import tempfile
+import threading
+import urllib.request
+
+PLANTUML_RENDERER = os.getenv("PLANTUML_RENDERER", "none")  # none | jar | server
+PLANTUML_JAR = os.getenv("PLANTUML_JAR", "plantuml.jar")
+PLANTUML_LOCAL_SERVER = os.getenv("PLANTUML_LOCAL_SERVER", "http://127.0.0.1:8080")
+PLANTUML_RENDER_TIMEOUT = float(os.getenv("PLANTUML_RENDER_TIMEOUT", "30"))
+PLANTUML_CACHE_MAX_BYTES = int(os.getenv("PLANTUML_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+CACHE_DIR = pathlib.Path(__file__).resolve().parent / "outputs" / "plantuml_cache"
+
+FORMATS = {"svg": "image/svg+xml", "png": "image/png"}
+
+_key_locks = {}
+_key_locks_guard = threading.Lock()
+
+
+def enabled() -> bool:
+    return PLANTUML_RENDERER in ("jar", "server")
+
+
+def content_hash(code: str, fmt: str) -> str:
+    return hashlib.sha256(f"{fmt}\n{code}".encode("utf-8")).hexdigest()
+
+
+def _render_jar(code: str, fmt: str) -> bytes:
+    proc = subprocess.run(
+        ["java", "-Djava.awt.headless=true", "-jar", PLANTUML_JAR, "-pipe", f"-t{fmt}", "-charset", "UTF-8"],
+        input=code.encode("utf-8"),
+        capture_output=True,
+        timeout=PLANTUML_RENDER_TIMEOUT,
+    )
+    if proc.returncode != 0 or not proc.stdout:
+        raise RuntimeError(f"PlantUML render hatası: {proc.stderr.decode('utf-8', 'ignore')[:500]}")
+    return proc.stdout
+
+
+def _render_server(code: str, fmt: str) -> bytes:
+    req = urllib.request.Request(
+        f"{PLANTUML_LOCAL_SERVER.rstrip('/')}/{fmt}",
+        data=code.encode("utf-8"),
+        headers={"Content-Type": "text/plain; charset=utf-8"},
+        method="POST",
+    )
+    with urllib.request.urlopen(req, timeout=PLANTUML_RENDER_TIMEOUT) as resp:
+        return resp.read()
+
+
+def _key_lock(key: str) -> threading.Lock:
+    with _key_locks_guard:
+        lock = _key_locks.get(key)
+        if lock is None:
+            lock = _key_locks[key] = threading.Lock()
+        return lock
+
+
+def render_cached(code: str, fmt: str = "svg") -> pathlib.Path:
+    """
+    Diyagramı render eder (cache'te yoksa) ve dosya yolunu döner.
+    """
+    if fmt not in FORMATS:
+        raise ValueError(f"Desteklenmeyen format: {fmt}")
+    if not enabled():
+        raise RuntimeError("Yerel PlantUML renderer kapalı (PLANTUML_RENDERER).")
+
+    key = content_hash(code, fmt)
+    path = CACHE_DIR / f"{key}.{fmt}"
+    if path.exists():
+        os.utime(path)  # LRU için erişim zamanı
+        return path
+
+    with _key_lock(key):
+        if path.exists():
+            return path
+
+        data = _render_jar(code, fmt) if PLANTUML_RENDERER == "jar" else _render_server(code, fmt)
+
+        CACHE_DIR.mkdir(parents=True, exist_ok=True)
+        fd, tmp = tempfile.mkstemp(dir=CACHE_DIR, suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        os.replace(tmp, path)  # yarım dosya asla okunmaz
+
+    with _key_locks_guard:
+        _key_locks.pop(key, None)
+
+    _evict()
+    return path
+
+
+def _evict():
+    entries = []
+    try:
+        for p in CACHE_DIR.iterdir():
+            if p.suffix == ".tmp":
+                continue
+            st = p.stat()
+            entries.append((st.st_mtime, st.st_size, p))
+    except FileNotFoundError:
+        return
+
+    total = sum(size for _, size, _ in entries)
+    if total <= PLANTUML_CACHE_MAX_BYTES:
+        return
+
+    for _, size, p in sorted(entries):
+        try:
+            p.unlink()
+        except FileNotFoundError:
+            pass
+        total -= size
+        if total <= PLANTUML_CACHE_MAX_BYTES:
+            break
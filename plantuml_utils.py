@@ -0,0 +1,74 @@
+import base64
+import os
+import re
+import zlib
+
+# --------------------------
+# PLANTUML SERVER
+# --------------------------
+PLANTUML_SERVER = os.getenv("PLANTUML_SERVER", "https://www.plantuml.com/plantuml")
+
+
+# standart base64 alfabesi -> PlantUML alfabesi (0-9A-Za-z-_)
+_B64_TO_PLANTUML = bytes.maketrans(
+    b"ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz0123456789+/",
+    b"0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_",
+)
+
+
+def _plantuml_encode64(data: bytes) -> str:
+    # 3 byte'a sıfırla tamamla (PlantUML '=' kullanmaz), base64'ü C'de yap, alfabeyi çevir
+    pad = (-len(data)) % 3
+    return base64.b64encode(data + b"\0" * pad).translate(_B64_TO_PLANTUML).decode("ascii")
+
+
+def _encode_plantuml_deflate(plantuml_text: str) -> str:
+    data = plantuml_text.encode("utf-8")
+    compressed = zlib.compress(data)[2:-4]  # zlib header/footer at
+    return _plantuml_encode64(compressed)
+
+
+def plantuml_image_url(plantuml_code: str, fmt: str = "png") -> str:
+    encoded = _encode_plantuml_deflate(plantuml_code)
+    return f"{PLANTUML_SERVER}/{fmt}/{encoded}"
+
+
+# -------------------------
+# PlantUML temizleme
+# -------------------------
+def sanitize_plantuml(text: str) -> str:
+    try:
+        if not text:
+            return "```plantuml\n@startuml\n@enduml\n```"
+
+        m = re.search(r"```plantuml\s*(.*?)```", text, flags=re.DOTALL | re.IGNORECASE)
+        code = (m.group(1) if m else text).strip()
+
+        cleaned_lines = []
+        for ln in code.splitlines():
+            ln2 = ln.rstrip()
+            if ln2.endswith(","):
+                ln2 = ln2[:-1].rstrip()
+            cleaned_lines.append(ln2)
+
+        code = "\n".join(cleaned_lines).strip()
+
+        low = code.lower()
+        if "@startuml" not in low:
+            code = "@startuml\n" + code
+        if "@enduml" not in low:
+            code = code + "\n@enduml"
+
+        return "```plantuml\n" + code.strip() + "\n```"
+    except Exception:
+        return "```plantuml\n" + (text or "").strip() + "\n```"
+
+
+def extract_plantuml_code(output_text: str) -> str:
+    """
+    sanitize_plantuml sonrası ```plantuml ... ``` bloğunun içini döndürür
+    """
+    m = re.search(r"```plantuml\s*(.*?)```", output_text, flags=re.DOTALL | re.IGNORECASE)
+    if m:
+        return m.group(1).strip()
+    return output_text.strip()
@@ -0,0 +1,132 @@
+"""
+Spekülatif ön üretim (PREFETCH=1).
+
+projects_create sonrası kullanıcı genelde action butonlarına tek tek basar; her tıklama
+soğuk bir LLM çağrısı bekler. Ön üretim açıkken proje oluşturulunca PREFETCH_ACTIONS
+(ve bağımlılıkları) için prefetch_jobs'a düşük öncelikli bir iş yazılır; jobs.py worker'ı
+bu işleri yalnızca generation_jobs kuyruğu boşken alır.
+
+project_run, üretilecek action ön üretimde hazırsa (fingerprint aynı) onu sunar. O anda
+üretiliyorsa burada beklenmez: worker aynı generation_key ile single-flight kirasını tuttuğu
+için project_run'ın kendi singleflight.flight'ı onun sonucunu bekleyip paylaşır, aynı çağrı
+ikinci kez yapılmaz.
+
+İptal:
+  - /project/<id>/prefetch/cancel
+  - PREFETCH_TTL içinde başlamayan iş EXPIRED olur
+  - proje sayfası PREFETCH_IDLE_TIMEOUT boyunca açılmazsa (terk edildi) kalan action'lar üretilmez
+"""
+import logging
+import os
+
+import db
+from ai_processor import input_fingerprint
+from generation import ALL_ACTIONS, GenerationCancelled, generate_project_outputs, load_upstream, with_dependencies
+
+PREFETCH_ENABLED = os.getenv("PREFETCH", "0") == "1"
+PREFETCH_ACTIONS = [a.strip() for a in os.getenv("PREFETCH_ACTIONS", "").split(",") if a.strip()] \
+    or [key for key, _ in ALL_ACTIONS]
+PREFETCH_TTL = int(os.getenv("PREFETCH_TTL", "600"))                         # saniye: başlamazsa EXPIRED
+PREFETCH_IDLE_TIMEOUT = int(os.getenv("PREFETCH_IDLE_TIMEOUT", "900"))       # saniye: sayfa açılmazsa bırak
+PREFETCH_MAX_WORKERS = int(os.getenv("PREFETCH_MAX_WORKERS", "2"))           # düşük öncelik: az eşzamanlı çağrı
+
+READY = ("DONE", "REUSED")
+
+logger = logging.getLogger(__name__)
+
+
+def schedule(project_id: int):
+    if not PREFETCH_ENABLED:
+        return None
+    keys = with_dependencies(PREFETCH_ACTIONS)
+    return db.insert_prefetch_job(project_id, keys, {k: "QUEUED" for k in keys}, PREFETCH_TTL)
+
+
+def touch(project_id: int):
+    # proje hâlâ kullanılıyor: idle sayacını sıfırla
+    if PREFETCH_ENABLED:
+        db.touch_prefetch_jobs(project_id)
+
+
+def cancel(project_id: int) -> int:
+    return db.cancel_prefetch_jobs(project_id)
+
+
+def job_summary(project_id: int):
+    """
+    project_detail için: {"status", "ready", "total"} | None
+    """
+    if not PREFETCH_ENABLED:
+        return None
+    job = db.get_latest_prefetch_job(project_id)
+    if not job:
+        return None
+    states = [job["progress"].get(k) for k in job["action_keys"]]
+    return {"status": job["status"], "ready": sum(s in READY for s in states), "total": len(states)}
+
+
+# =========================
+# Web tarafı: project_run
+# =========================
+def ready_output(p: dict, action_key: str):
+    """
+    Ön üretimin bu action için ürettiği güncel çıktı satırı. Beklemez: action henüz
+    üretiliyorsa None döner, çağıran single-flight üzerinden worker'ın sonucunu bekler.
+    Returns: (row, upstream) | None (ön üretim yok / sürüyor / başarısız / girdi değişmiş)
+    """
+    if not PREFETCH_ENABLED:
+        return None
+    job = db.get_latest_prefetch_job(p["id"])
+    if not job or action_key not in job["progress"]:
+        return None
+    if job["progress"].get(action_key) not in READY:
+        return None
+
+    # çıktıyı worker process'i yazdı; yerel cache ondan önceki hali tutuyor olabilir
+    db.invalidate_project_outputs(p["id"])
+    upstream = load_upstream(p["id"], action_key)
+    row = db.get_latest_project_output(p["id"], action_key)
+    if not row or row.get("input_fingerprint") != input_fingerprint(p, action_key, upstream, 0.2):
+        return None
+    return row, upstream
+
+
+# =========================
+# Worker tarafı (jobs.py)
+# =========================
+def process_prefetch_job(job: dict):
+    job_id = job["id"]
+    progress = dict(job["progress"])
+
+    def on_progress(action_key: str, state: str):
+        progress[action_key] = state
+        db.update_prefetch_job(job_id, progress=progress)
+
+    def should_continue() -> bool:
+        cur = db.get_prefetch_job(job_id)
+        if not cur or cur["status"] != "RUNNING":
+            return False  # iptal edildi
+        if cur["idle_seconds"] is not None and cur["idle_seconds"] > PREFETCH_IDLE_TIMEOUT:
+            logger.info("prefetch job=%s project=%s abandoned", job_id, job["project_id"])
+            return False
+        return True
+
+    try:
+        p = db.get_project(job["project_id"])
+        if not p:
+            raise RuntimeError(f"Project bulunamadı (ID={job['project_id']}).")
+        results = generate_project_outputs(
+            p, on_progress=on_progress, max_workers=PREFETCH_MAX_WORKERS,
+            action_keys=job["action_keys"], should_continue=should_continue,
+        )
+    except Exception:
+        logger.exception("prefetch job=%s failed", job_id)
+        db.update_prefetch_job(job_id, progress=progress, status="ERROR", from_status="RUNNING")
+        return
+
+    # son yazım koşullu: son should_continue'dan sonra gelen iptal (CANCELLED) ezilmez
+    cancelled = any(not ok and isinstance(v, GenerationCancelled) for ok, v in results.values())
+    db.update_prefetch_job(job_id, progress=progress, status="CANCELLED" if cancelled else "DONE",
+                           from_status="RUNNING")
+    logger.info("prefetch job=%s project=%s %s", job_id, job["project_id"],
+                "cancelled" if cancelled else "done")
@@ -0,0 +1,189 @@
+"""
+İstek bazlı faz süreleri, Server-Timing başlığı, yavaş istek logu ve örnekleyen profiler.
+
+    with profiling.phase("llm"):
+        ...
+
+Faz süreleri contextvars ile o anki isteğe yazılır (istek dışında -> no-op). Aynı isimli
+fazlar toplanır; iç içe fazlar ayrı ayrı sayılır (örn. "docx" içinde "docx_save").
+Arka plan thread'lerine (ThreadPoolExecutor) context taşınmaz.
+
+  SLOW_REQUEST_MS        bu süreyi aşan istekler "slow_request" logu (JSON) yazar
+  PROFILE_ENDPOINTS      virgüllü Flask endpoint adları (örn. project_run,projects_create_and_generate)
+  PROFILE_SAMPLE_RATE    bu endpoint'lerde profillenen istek oranı (0-1)
+  PROFILE_INTERVAL_MS    örnekleme aralığı
+  PROFILE_DIR            collapsed stack dosyaları (flamegraph.pl / speedscope ile açılır)
+"""
+import contextvars
+import json
+import logging
+import os
+import pathlib
+import random
+import sys
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+
+SLOW_REQUEST_MS = float(os.getenv("SLOW_REQUEST_MS", "2000"))
+PROFILE_ENDPOINTS = {e.strip() for e in os.getenv("PROFILE_ENDPOINTS", "").split(",") if e.strip()}
+PROFILE_SAMPLE_RATE = float(os.getenv("PROFILE_SAMPLE_RATE", "1.0"))
+PROFILE_INTERVAL_MS = float(os.getenv("PROFILE_INTERVAL_MS", "5"))
+PROFILE_DIR = pathlib.Path(os.getenv("PROFILE_DIR", str(pathlib.Path(__file__).resolve().parent / "outputs" / "profiles")))
+
+logger = logging.getLogger("slow_request")
+
+_timings = contextvars.ContextVar("request_timings", default=None)
+
+
+def add(name: str, seconds: float):
+    timings = _timings.get()
+    if timings is not None:
+        total, count = timings.get(name, (0.0, 0))
+        timings[name] = (total + seconds, count + 1)
+
+
+@contextmanager
+def phase(name: str):
+    if _timings.get() is None:
+        yield
+        return
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        add(name, time.perf_counter() - started)
+
+
+def begin() -> contextvars.Token:
+    return _timings.set({})
+
+
+def end(token: contextvars.Token) -> dict:
+    timings = _timings.get() or {}
+    try:
+        _timings.reset(token)
+    except ValueError:
+        _timings.set(None)  # token başka bir context'te üretildi (örn. stream sonrası teardown)
+    return timings
+
+
+def server_timing(timings: dict, total: float) -> str:
+    parts = [f"{name};dur={t * 1000:.1f};desc=\"n={n}\"" for name, (t, n) in timings.items()]
+    parts.append(f"total;dur={total * 1000:.1f}")
+    return ", ".join(parts)
+
+
+# =========================
+# Örnekleyen profiler
+# =========================
+class StackSampler:
+    """
+    Hedef thread'in stack'ini interval'de bir okur (sys._current_frames) ve
+    collapsed formatta ("a;b;c count") toplar.
+    """
+
+    def __init__(self, thread_id: int, interval: float):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.stacks = Counter()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def stop(self) -> Counter:
+        self._stop.set()
+        self._thread.join()
+        return self.stacks
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                code = frame.f_code
+                names.append(f"{pathlib.Path(code.co_filename).name}:{code.co_name}:{frame.f_lineno}")
+                frame = frame.f_back
+            self.stacks[";".join(reversed(names))] += 1
+
+
+def should_profile(endpoint: str) -> bool:
+    return endpoint in PROFILE_ENDPOINTS and random.random() < PROFILE_SAMPLE_RATE
+
+
+def write_profile(endpoint: str, stacks: Counter) -> pathlib.Path:
+    PROFILE_DIR.mkdir(parents=True, exist_ok=True)
+    path = PROFILE_DIR / f"{time.strftime('%Y%m%d_%H%M%S')}_{endpoint}_{os.getpid()}_{threading.get_ident()}.folded"
+    with open(path, "w", encoding="utf-8") as f:
+        for stack, n in stacks.most_common():
+            f.write(f"{stack} {n}\n")
+    return path
+
+
+# =========================
+# Flask entegrasyonu
+# =========================
+def init_app(app):
+    from flask import before_render_template, g, request, template_rendered
+
+    @app.before_request
+    def _profiling_begin():
+        g._timing_token = begin()
+        g._timing_started = time.perf_counter()
+        g._sampler = None
+        if PROFILE_ENDPOINTS and should_profile(request.endpoint or ""):
+            g._sampler = StackSampler(threading.get_ident(), PROFILE_INTERVAL_MS / 1000.0).start()
+
+    @app.after_request
+    def _profiling_header(resp):
+        g._status = resp.status_code
+        timings = _timings.get()
+        if timings is not None and hasattr(g, "_timing_started"):
+            resp.headers["Server-Timing"] = server_timing(timings, time.perf_counter() - g._timing_started)
+        return resp
+
+    @app.teardown_request
+    def _profiling_end(exc):
+        token = g.pop("_timing_token", None)
+        started = g.pop("_timing_started", None)
+        sampler = g.pop("_sampler", None)
+        if token is None:
+            return
+        timings = end(token)
+        total = time.perf_counter() - started
+
+        profile_path = None
+        if sampler is not None:
+            profile_path = write_profile(request.endpoint or "unknown", sampler.stop())
+
+        if total * 1000 >= SLOW_REQUEST_MS or profile_path:
+            logger.warning(json.dumps({
+                "event": "slow_request" if total * 1000 >= SLOW_REQUEST_MS else "profiled_request",
+                "method": request.method,
+                "path": request.path,
+                "endpoint": request.endpoint,
+                "status": g.pop("_status", None),
+                "total_ms": round(total * 1000, 1),
+                "phases_ms": {k: round(t * 1000, 1) for k, (t, _) in timings.items()},
+                "phase_counts": {k: n for k, (_, n) in timings.items()},
+                "error": repr(exc) if exc else None,
+                "profile": str(profile_path) if profile_path else None,
+            }, ensure_ascii=False))
+
+    # şablon render süresi (Flask sinyalleri; blinker Flask ile gelir)
+    def _template_start(sender, template, context, **extra):
+        g._template_started = time.perf_counter()
+
+    def _template_done(sender, template, context, **extra):
+        started = g.pop("_template_started", None)
+        if started is not None:
+            add("template", time.perf_counter() - started)
+
+    before_render_template.connect(_template_start, app, weak=False)
+    template_rendered.connect(_template_done, app, weak=False)
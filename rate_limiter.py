@@ -0,0 +1,390 @@
+"""
+OpenAI çağrıları için process geneli adaptif rate limiter.
+
+- requests/min ve tokens/min için iki token bucket
+- AIMD eşzamanlılık sınırı: 429 gelince yarıya iner, başarılı çağrılarla +1 artar
+- 429'da tüm çağıranlar ortak bir bekleme süresine girer (Retry-After'a uyulur),
+  böylece provider'a retry fırtınası gitmez
+- jitter'lı exponential backoff ile retry; başarısız denemenin ayırdığı token'lar iade edilir
+- call() / stream() thread'ler, acall() / astream() asyncio için; hepsi aynı limit ve
+  sayaçları paylaşır. Stream'ler slotu son parça okunana (ya da kapatılana) kadar tutar.
+  Slot bekleyen coroutine'ler event loop başına bir asyncio.Condition'da uyur.
+"""
+import asyncio
+import logging
+import random
+import threading
+import time
+import weakref
+
+logger = logging.getLogger(__name__)
+
+_END = object()  # stream(): hiç parça gelmedi
+
+
+class TokenBucket:
+    def __init__(self, per_minute: float, capacity: float = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity if capacity is not None else per_minute
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+
+    def reserve(self, amount: float) -> float:
+        """
+        amount kadar token ayırır; beklenmesi gereken süreyi döner (bucket borca girebilir).
+        """
+        amount = min(amount, self.capacity)
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self._tokens -= amount
+            if self._tokens >= 0:
+                return 0.0
+            return -self._tokens / self.rate
+
+    def adjust(self, delta: float):
+        # tahmin ile gerçek kullanım arasındaki farkı düzelt (negatif = iade)
+        with self._lock:
+            self._refill(time.monotonic())
+            self._tokens = min(self.capacity, self._tokens - delta)
+
+
+class AdaptiveRateLimiter:
+    def __init__(
+        self,
+        rpm: float,
+        tpm: float,
+        max_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_retries: int = 5,
+        base_delay: float = 0.5,
+        max_delay: float = 30.0,
+        increase_every: int = 5,
+    ):
+        self.requests = TokenBucket(rpm)
+        self.tokens = TokenBucket(tpm)
+        self.max_concurrency = max(1, max_concurrency)
+        self.min_concurrency = max(1, min(min_concurrency, self.max_concurrency))
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.increase_every = increase_every
+
+        self._cond = threading.Condition()
+        self._aconds = weakref.WeakKeyDictionary()  # event loop -> asyncio.Condition
+        self._awaiting = 0  # slot bekleyen coroutine sayısı
+        self._limit = float(self.max_concurrency)
+        self._in_flight = 0
+        self._successes = 0
+        self._cooldown_until = 0.0
+        self._stats = {
+            "calls": 0,
+            "rate_limited": 0,
+            "retries": 0,
+            "failures": 0,
+            "throttle_wait_seconds": 0.0,
+        }
+
+    # --- concurrency (AIMD) ---
+    def _enter(self):
+        with self._cond:
+            while self._in_flight >= int(self._limit):
+                self._cond.wait()
+            self._in_flight += 1
+
+    def _exit(self):
+        with self._cond:
+            self._in_flight -= 1
+            self._notify_all()
+
+    def _notify_all(self):
+        # self._cond tutulurken çağrılır: thread'leri ve (varsa) bekleyen coroutine'leri uyandırır
+        self._cond.notify_all()
+        if not self._awaiting:
+            return
+        for loop, acond in list(self._aconds.items()):
+            try:
+                asyncio.run_coroutine_threadsafe(self._anotify(acond), loop)
+            except RuntimeError:  # loop kapanmış
+                self._aconds.pop(loop, None)
+
+    def _on_success(self):
+        with self._cond:
+            self._successes += 1
+            if self._successes >= self.increase_every and self._limit < self.max_concurrency:
+                self._limit = min(self.max_concurrency, self._limit + 1)
+                self._successes = 0
+                self._notify_all()
+
+    def _on_rate_limited(self, retry_after: float):
+        with self._cond:
+            self._stats["rate_limited"] += 1
+            self._successes = 0
+            self._limit = max(self.min_concurrency, self._limit / 2)
+            self._cooldown_until = max(self._cooldown_until, time.monotonic() + retry_after)
+
+    def _capacity_wait(self, est_tokens: int) -> float:
+        wait = max(self.requests.reserve(1), self.tokens.reserve(est_tokens))
+        with self._cond:
+            wait = max(wait, self._cooldown_until - time.monotonic())
+            if wait > 0:
+                self._stats["throttle_wait_seconds"] += wait
+        return wait
+
+    def _wait_for_capacity(self, est_tokens: int):
+        wait = self._capacity_wait(est_tokens)
+        if wait > 0:
+            time.sleep(wait)
+
+    def _refund(self, est_tokens: int):
+        # başarısız deneme (429, bağlantı hatası) token harcamadı; retry yeniden ayıracak
+        self.tokens.adjust(-min(est_tokens, self.tokens.capacity))
+
+    def _backoff(self, attempt: int) -> float:
+        # full jitter
+        return random.uniform(0, min(self.max_delay, self.base_delay * (2 ** attempt)))
+
+    def _retry_delay(self, e: Exception, attempt: int, classify):
+        """
+        Hata retry edilecekse çağıranın uyuması gereken süre (429'da 0: ortak bekleme
+        _capacity_wait'te yapılır); edilmeyecekse None.
+        """
+        kind, retry_after = classify(e)
+        if kind is None or attempt >= self.max_retries:
+            with self._cond:
+                self._stats["failures"] += 1
+            return None
+
+        delay = self._backoff(attempt)
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        if kind == "rate_limited":
+            self._on_rate_limited(delay)
+
+        with self._cond:
+            self._stats["retries"] += 1
+        logger.info("llm call %s, retry %d in %.2fs", kind, attempt + 1, delay)
+        return 0.0 if kind == "rate_limited" else delay
+
+    def call(self, fn, est_tokens: int, classify):
+        """
+        fn() çağrısını limitlerden geçirerek yapar.
+        classify(exc) -> (kind, retry_after): kind = "rate_limited" | "retryable" | None
+        Gerçek token kullanımı bilinince record_usage ile bucket düzeltilir.
+        """
+        with self._cond:
+            self._stats["calls"] += 1
+
+        attempt = 0
+        while True:
+            self._wait_for_capacity(est_tokens)
+            self._enter()
+            try:
+                result = fn()
+            except Exception as e:
+                self._refund(est_tokens)
+                delay = self._retry_delay(e, attempt, classify)
+                if delay is None:
+                    raise
+                attempt += 1
+                if delay:
+                    time.sleep(delay)
+                continue
+            finally:
+                self._exit()
+
+            self._on_success()
+            return result
+
+    def stream(self, open_fn, est_tokens: int, classify, usage: dict = None):
+        """
+        Streaming çağrı (generator): open_fn() -> iterator[str].
+        Eşzamanlılık slotu iterator tükenene ya da kapatılana kadar tutulur. İlk parçaya
+        kadarki hatalar (bağlantı, 429) call() gibi retry edilir; sonrakiler çağırana gider.
+        usage verildiyse stream bitince gerçek token kullanımı bucket'a işlenir.
+        """
+        with self._cond:
+            self._stats["calls"] += 1
+
+        attempt = 0
+        while True:
+            self._wait_for_capacity(est_tokens)
+            self._enter()
+            try:
+                it = iter(open_fn())
+                first = next(it, _END)
+                break
+            except Exception as e:
+                self._exit()
+                self._refund(est_tokens)
+                delay = self._retry_delay(e, attempt, classify)
+                if delay is None:
+                    raise
+                attempt += 1
+                if delay:
+                    time.sleep(delay)
+
+        try:
+            if first is not _END:
+                yield first
+                yield from it
+        except Exception:
+            with self._cond:
+                self._stats["failures"] += 1
+            raise
+        finally:
+            self._exit()
+            close = getattr(it, "close", None)
+            if close:
+                close()
+
+        self._on_success()
+        if usage:
+            self.record_usage(est_tokens, usage.get("total_tokens"))
+
+    # --- asyncio ---
+    def _try_enter(self) -> bool:
+        with self._cond:
+            if self._in_flight >= int(self._limit):
+                return False
+            self._in_flight += 1
+            return True
+
+    async def _aenter(self):
+        # threading.Condition await edilemez; slot bırakan (herhangi bir thread'deki) _exit
+        # bu loop'un Condition'ını run_coroutine_threadsafe ile uyandırır
+        if self._try_enter():
+            return
+        loop = asyncio.get_running_loop()
+        with self._cond:
+            acond = self._aconds.get(loop)
+            if acond is None:
+                acond = self._aconds[loop] = asyncio.Condition()
+            self._awaiting += 1
+        try:
+            async with acond:
+                await acond.wait_for(self._try_enter)
+        finally:
+            with self._cond:
+                self._awaiting -= 1
+
+    @staticmethod
+    async def _anotify(acond: asyncio.Condition):
+        async with acond:
+            acond.notify_all()
+
+    async def acall(self, fn, est_tokens: int, classify):
+        """
+        call()'ın asyncio hali: fn() coroutine döndürür; beklemeler event loop'u bloklamaz.
+        """
+        with self._cond:
+            self._stats["calls"] += 1
+
+        attempt = 0
+        while True:
+            wait = self._capacity_wait(est_tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._aenter()
+            try:
+                result = await fn()
+            except Exception as e:
+                self._refund(est_tokens)
+                delay = self._retry_delay(e, attempt, classify)
+                if delay is None:
+                    raise
+                attempt += 1
+                if delay:
+                    await asyncio.sleep(delay)
+                continue
+            finally:
+                self._exit()
+
+            self._on_success()
+            return result
+
+    async def astream(self, open_fn, est_tokens: int, classify, usage: dict = None):
+        """
+        stream()'in asyncio hali (async generator): open_fn() coroutine'i async iterator döndürür.
+        """
+        with self._cond:
+            self._stats["calls"] += 1
+
+        attempt = 0
+        while True:
+            wait = self._capacity_wait(est_tokens)
+            if wait > 0:
+                await asyncio.sleep(wait)
+            await self._aenter()
+            try:
+                it = (await open_fn()).__aiter__()
+                first = await anext(it, _END)
+                break
+            except Exception as e:
+                self._exit()
+                self._refund(est_tokens)
+                delay = self._retry_delay(e, attempt, classify)
+                if delay is None:
+                    raise
+                attempt += 1
+                if delay:
+                    await asyncio.sleep(delay)
+
+        try:
+            if first is not _END:
+                yield first
+                async for delta in it:
+                    yield delta
+        except Exception:
+            with self._cond:
+                self._stats["failures"] += 1
+            raise
+        finally:
+            self._exit()
+            aclose = getattr(it, "aclose", None)
+            if aclose:
+                await aclose()
+
+        self._on_success()
+        if usage:
+            self.record_usage(est_tokens, usage.get("total_tokens"))
+
+    def record_usage(self, est_tokens: int, actual_tokens: int):
+        if actual_tokens:
+            self.tokens.adjust(actual_tokens - est_tokens)
+
+    def stats(self) -> dict:
+        with self._cond:
+            out = dict(self._stats)
+            out.update(
+                concurrency_limit=int(self._limit),
+                in_flight=self._in_flight,
+                cooldown_remaining=max(0.0, self._cooldown_until - time.monotonic()),
+            )
+        return out
+
+
+def retry_after_seconds(headers) -> float:
+    """
+    Retry-After / retry-after-ms başlıklarını saniyeye çevirir (yoksa None).
+    """
+    if not headers:
+        return None
+    ms = headers.get("retry-after-ms")
+    if ms:
+        try:
+            return float(ms) / 1000.0
+        except ValueError:
+            pass
+    ra = headers.get("retry-after")
+    if ra:
+        try:
+            return float(ra)
+        except ValueError:
+            return None
+    return None
@@ -0,0 +1,315 @@
+"""
+Aynı üretimin eşzamanlı tekrarlarını birleştirme (single-flight).
+
+Çift tıklanan "çalıştır" ya da aynı projeyi açan birkaç kişi, aynı (proje, action, girdi)
+için aynı anda project_run / project_stream çağırdığında yalnızca biri (lider) LLM'i çağırıp
+project_ai_outputs'a yazar; diğerleri bekler ve onun satırını paylaşır.
+
+  - process içi: key -> Flight (threading.Event)
+  - process'ler arası (SINGLEFLIGHT=db): generation_leases tablosunda süreli kira; kirayı
+    alamayan istek satır DONE / ERROR olana kadar SINGLEFLIGHT_POLL_INTERVAL ile yoklar
+
+    with singleflight.flight(generation_key(p, action_key, upstream, force)) as f:
+        if f.result is None:          # lider: üret, yaz
+            ...
+            f.result = {"out_id": ..., "output_text": ..., "prompt_text": ..., "model": ...}
+    f.result                          # lider ya da paylaşılan sonuç
+
+Anahtar input_fingerprint içerir: proje / upstream değiştiyse yeni istek eskisini beklemez.
+Lider hata verirse bekleyenler aynı hatayı alır (SingleFlightError); lider bıraktıysa (stream
+istemcisi koptu) ya da kirası dolduysa (process öldü) bekleyenlerden biri yeni lider olur.
+SINGLEFLIGHT_WAIT_TIMEOUT aşılırsa ya da kira tablosuna erişilemezse istek kendi üretimini yapar.
+"""
+import asyncio
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+from contextlib import asynccontextmanager, contextmanager
+
+import db
+from ai_processor import input_fingerprint
+
+SINGLEFLIGHT = os.getenv("SINGLEFLIGHT", "db")                                  # db | local | none
+SINGLEFLIGHT_LEASE_TTL = int(os.getenv("SINGLEFLIGHT_LEASE_TTL", "300"))        # saniye: en uzun LLM çağrısından uzun
+SINGLEFLIGHT_WAIT_TIMEOUT = float(os.getenv("SINGLEFLIGHT_WAIT_TIMEOUT", "300"))  # saniye: sonra kendi üretimini yapar
+SINGLEFLIGHT_POLL_INTERVAL = float(os.getenv("SINGLEFLIGHT_POLL_INTERVAL", "0.5"))  # saniye: kira yoklama aralığı
+
+_LOCAL_POLL_INTERVAL = 0.05  # async bekleyen: aynı process'teki liderin Event'i
+
+logger = logging.getLogger(__name__)
+
+
+class SingleFlightError(RuntimeError):
+    pass
+
+
+class Flight:
+    def __init__(self, key: str):
+        self.key = key
+        self.result = None      # lider doldurur; bekleyen için paylaşılan sonuç
+        self.shared = False     # sonuç başka bir istekten geldi
+        self.leader = False     # process içinde kayıtlı lider
+        self.lease = False      # generation_leases kirası bizde
+        self.owner = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self.error = None
+        self.abandoned = False
+        self._done = threading.Event()
+
+
+_flights = {}
+_lock = threading.Lock()
+_stats = {"leaders": 0, "shared_local": 0, "shared_remote": 0, "failed": 0, "abandoned": 0,
+          "wait_timeouts": 0, "lease_errors": 0}
+
+
+def generation_key(p: dict, action_key: str, upstream: dict = None, force: bool = False) -> str:
+    mode = "force" if force else "cache"
+    return f"{p['id']}:{action_key}:{mode}:{input_fingerprint(p, action_key, upstream, 0.2)}"
+
+
+def stats() -> dict:
+    with _lock:
+        return {**_stats, "in_flight": len(_flights)}
+
+
+def _count(name: str):
+    with _lock:
+        _stats[name] += 1
+
+
+def _join(key: str):
+    """
+    Returns: (flight, lider mi)
+    """
+    with _lock:
+        f = _flights.get(key)
+        if f is not None:
+            return f, False
+        f = _flights[key] = Flight(key)
+        f.leader = True
+        _stats["leaders"] += 1
+        return f, True
+
+
+def _shared(key: str, result: dict, stat: str) -> Flight:
+    _count(stat)
+    out = Flight(key)
+    out.result = dict(result)
+    out.shared = True
+    return out
+
+
+def _from_local(f: Flight) -> Flight:
+    if f.error is not None:
+        raise SingleFlightError(str(f.error))
+    return _shared(f.key, f.result, "shared_local")
+
+
+def _timed_out(key: str) -> Flight:
+    # koordinasyonsuz üretim: beklemekten iyidir
+    _count("wait_timeouts")
+    logger.warning("singleflight key=%s: %.0fs beklendi, ayrı üretiliyor", key, SINGLEFLIGHT_WAIT_TIMEOUT)
+    return Flight(key)
+
+
+def _load_result(output_id: int) -> dict:
+    row = db.get_project_output(output_id)
+    if not row:
+        raise SingleFlightError(f"Paylaşılan çıktı bulunamadı (ID={output_id}).")
+    return {
+        "out_id": row["id"],
+        "output_text": row["output_text"],
+        "prompt_text": db.get_project_output_prompt(row["id"]),
+        "model": row["model"],
+    }
+
+
+def _remote_step(f: Flight, first: bool):
+    """
+    Kira için bir adım. Returns: True (lider bizde) | sonuç dict (başka process üretti) | None (sürüyor)
+    """
+    try:
+        if not first:
+            lease = db.get_generation_lease(f.key)
+            if lease and (lease["status"] != "RUNNING" or not lease["expired"]):
+                if lease["status"] == "DONE":
+                    return _load_result(lease["output_id"])
+                if lease["status"] == "ERROR":
+                    raise SingleFlightError(lease["error_message"] or "Üretim başarısız.")
+                return None
+            # kira yok ya da süresi geçti (lider bıraktı / öldü): devral
+        f.lease = db.acquire_generation_lease(f.key, f.owner, SINGLEFLIGHT_LEASE_TTL)
+        return True if f.lease else None
+    except SingleFlightError:
+        raise
+    except Exception:
+        _count("lease_errors")
+        logger.warning("singleflight key=%s: kira tablosuna erişilemedi, kirasız üretiliyor", f.key, exc_info=True)
+        return True
+
+
+def _close_lease(f: Flight, result: dict = None, error: BaseException = None, abandoned: bool = False):
+    if not f.lease:
+        return
+    f.lease = False
+    try:
+        if abandoned:
+            db.release_generation_lease(f.key, f.owner)
+        elif error is not None:
+            db.finish_generation_lease(f.key, f.owner, "ERROR", error_message=str(error)[:2000])
+        else:
+            db.finish_generation_lease(f.key, f.owner, "DONE", output_id=result["out_id"])
+    except Exception:
+        _count("lease_errors")
+        logger.warning("singleflight key=%s: kira kapatılamadı", f.key, exc_info=True)
+
+
+def _release_local(f: Flight, result: dict = None, error: BaseException = None, abandoned: bool = False):
+    # I/O yok: process içi bekleyenleri uyandırır
+    with _lock:
+        if _flights.get(f.key) is f:
+            del _flights[f.key]
+        if error is not None:
+            _stats["failed"] += 1
+        elif abandoned:
+            _stats["abandoned"] += 1
+    f.result, f.error, f.abandoned = result, error, abandoned
+    f._done.set()
+
+
+def _end(f: Flight, result: dict = None, error: BaseException = None, abandoned: bool = False):
+    _close_lease(f, result, error, abandoned)
+    _release_local(f, result, error, abandoned)
+
+
+def _abandon_nowait(f: Flight):
+    """
+    Async iptal yolu (CancelledError): event loop'ta DB I/O yapmadan bırakır. Kira arka planda
+    (executor) bırakılır; o da olmazsa (loop kapanıyor) SINGLEFLIGHT_LEASE_TTL dolunca düşer.
+    """
+    if f.lease:
+        try:
+            asyncio.get_running_loop().run_in_executor(None, _close_lease, f, None, None, True)
+        except RuntimeError:
+            f.lease = False
+    _release_local(f, abandoned=True)
+
+
+def _settle(f: Flight, state) -> Flight:
+    # process içi lider, kira adımının sonucuna göre: üret (f) ya da paylaşılan sonucu döndür
+    if isinstance(state, dict):
+        _end(f, result=state)
+        return _shared(f.key, state, "shared_remote")
+    return f
+
+
+# =========================
+# Sync (Flask, jobs worker)
+# =========================
+def _begin(key: str) -> Flight:
+    if SINGLEFLIGHT == "none":
+        return Flight(key)
+    deadline = time.monotonic() + SINGLEFLIGHT_WAIT_TIMEOUT
+    while True:
+        f, leader = _join(key)
+        if leader:
+            break
+        if not f._done.wait(max(0.0, deadline - time.monotonic())):
+            return _timed_out(key)
+        if not f.abandoned:
+            return _from_local(f)
+
+    if SINGLEFLIGHT != "db":
+        return f
+    try:
+        state = _remote_step(f, first=True)
+        while state is None:
+            if time.monotonic() >= deadline:
+                _count("wait_timeouts")
+                return f  # kirasız lider
+            time.sleep(SINGLEFLIGHT_POLL_INTERVAL)
+            state = _remote_step(f, first=False)
+    except BaseException as e:
+        _end(f, error=e)
+        raise
+    return _settle(f, state)
+
+
+@contextmanager
+def flight(key: str):
+    f = _begin(key)
+    if not f.leader:
+        yield f
+        return
+    try:
+        yield f
+    except Exception as e:
+        _end(f, error=e)
+        raise
+    except BaseException:
+        _end(f, abandoned=True)  # GeneratorExit: stream istemcisi koptu
+        raise
+    if f.result is None:
+        _end(f, abandoned=True)
+    else:
+        _end(f, result=f.result)
+
+
+# =========================
+# Async (asgi.py)
+# =========================
+async def _abegin(key: str) -> Flight:
+    if SINGLEFLIGHT == "none":
+        return Flight(key)
+    deadline = time.monotonic() + SINGLEFLIGHT_WAIT_TIMEOUT
+    while True:
+        f, leader = _join(key)
+        if leader:
+            break
+        while not f._done.is_set():
+            if time.monotonic() >= deadline:
+                return _timed_out(key)
+            await asyncio.sleep(_LOCAL_POLL_INTERVAL)
+        if not f.abandoned:
+            return _from_local(f)
+
+    if SINGLEFLIGHT != "db":
+        return f
+    try:
+        state = await asyncio.to_thread(_remote_step, f, True)
+        while state is None:
+            if time.monotonic() >= deadline:
+                _count("wait_timeouts")
+                return f
+            await asyncio.sleep(SINGLEFLIGHT_POLL_INTERVAL)
+            state = await asyncio.to_thread(_remote_step, f, False)
+    except Exception as e:
+        await asyncio.to_thread(_end, f, error=e)
+        raise
+    except BaseException:
+        _abandon_nowait(f)
+        raise
+    return await asyncio.to_thread(_settle, f, state)
+
+
+@asynccontextmanager
+async def aflight(key: str):
+    f = await _abegin(key)
+    if not f.leader:
+        yield f
+        return
+    try:
+        yield f
+    except Exception as e:
+        await asyncio.to_thread(_end, f, error=e)
+        raise
+    except BaseException:
+        _abandon_nowait(f)  # iptal (istemci koptu): await etmeden, loop'u bloklamadan kapat
+        raise
+    if f.result is None:
+        await asyncio.to_thread(_end, f, abandoned=True)
+    else:
+        await asyncio.to_thread(_end, f, result=f.result)
@@ -0,0 +1,130 @@
+"""
+Testler OpenAI'sız çalışır (LLM_BACKEND=fake). MySQL gerektirenler (mysql_db fixture)
+yalnızca TEST_DB_HOST verilirse koşar, yoksa skip edilir:
+
+    docker compose -f bench/docker-compose.yml up -d
+    TEST_DB_HOST=127.0.0.1 TEST_DB_PORT=3307 TEST_DB_PASSWORD=bench python -m pytest -q
+
+Oturum başına geçici bir veritabanı açılır, migrations/ sırasıyla uygulanır ve sonda silinir;
+her test boş tablolarla başlar.
+"""
+import os
+import pathlib
+import uuid
+
+import pytest
+
+# proje modülleri import edilmeden önce
+os.environ.update(
+    LLM_BACKEND="fake",
+    LLM_CACHE="0",
+    LLM_FAKE_LATENCY_MS="20",
+    LLM_FAKE_TTFT_MS="5",
+    LLM_RPM="1000000",
+    LLM_TPM="1000000000",
+    PREFETCH="0",
+)
+
+MIGRATIONS_DIR = pathlib.Path(__file__).resolve().parent.parent / "migrations"
+
+
+@pytest.fixture(scope="session")
+def mysql_server():
+    host = os.getenv("TEST_DB_HOST")
+    if not host:
+        pytest.skip("TEST_DB_HOST verilmedi (MySQL gerektiren test)")
+
+    import pymysql
+    from pymysql.constants import CLIENT
+
+    params = {
+        "host": host,
+        "port": int(os.getenv("TEST_DB_PORT", "3306")),
+        "user": os.getenv("TEST_DB_USER", "root"),
+        "password": os.getenv("TEST_DB_PASSWORD", ""),
+    }
+    name = f"ai_docs_test_{uuid.uuid4().hex[:8]}"
+    conn = pymysql.connect(**params, charset="utf8mb4", autocommit=True, client_flag=CLIENT.MULTI_STATEMENTS)
+    try:
+        with conn.cursor() as cur:
+            cur.execute(f"CREATE DATABASE `{name}` CHARACTER SET utf8mb4 COLLATE utf8mb4_unicode_ci")
+            cur.execute(f"USE `{name}`")
+            for path in sorted(MIGRATIONS_DIR.glob("*.sql")):
+                cur.execute(path.read_text(encoding="utf-8"))
+                while cur.nextset():
+                    pass
+        yield dict(params, database=name)
+    finally:
+        with conn.cursor() as cur:
+            cur.execute(f"DROP DATABASE IF EXISTS `{name}`")
+        conn.close()
+
+
+@pytest.fixture
+def mysql_db(mysql_server, monkeypatch):
+    """
+    db modülü test veritabanına bağlı; tablolar boş, okuma cache'i temiz.
+    """
+    import db
+
+    monkeypatch.setenv("DB_HOST", mysql_server["host"])
+    monkeypatch.setenv("DB_PORT", str(mysql_server["port"]))
+    monkeypatch.setenv("DB_USER", mysql_server["user"])
+    monkeypatch.setenv("DB_PASSWORD", mysql_server["password"])
+    monkeypatch.setenv("DB_NAME", mysql_server["database"])
+    db.reset_pool_after_fork()
+    db._cache.clear()
+    monkeypatch.setitem(db._sync_state, "last_id", None)
+    monkeypatch.setitem(db._sync_state, "checked_at", 0.0)
+    monkeypatch.setitem(db._sync_state, "failures", 0)
+    monkeypatch.setitem(db._sync_state, "stale_since", None)
+
+    with db.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SHOW TABLES")
+            tables = [next(iter(r.values())) for r in cur.fetchall()]
+            cur.execute("SET FOREIGN_KEY_CHECKS=0")
+            for table in tables:
+                cur.execute(f"TRUNCATE TABLE `{table}`")
+            cur.execute("SET FOREIGN_KEY_CHECKS=1")
+
+    yield db
+
+    db._get_pool().close_all()
+    db.reset_pool_after_fork()
+    db._cache.clear()
+
+
+PROJECT = {
+    "title": "Kütüphane",
+    "domain": "Eğitim",
+    "primary_entity": "Kitap",
+    "constraints_text": "Bir üye en fazla 3 kitap ödünç alabilir.",
+    "advanced_feature": "Rezervasyon kuyruğu",
+    "security_access": "Görevli / üye rolleri",
+    "reporting_requirement": "Aylık ödünç raporu",
+    "common_tasks": "Ödünç verme, iade",
+}
+
+
+@pytest.fixture
+def project_data():
+    return dict(PROJECT, title=f"{PROJECT['title']} {uuid.uuid4().hex[:6]}")
+
+
+@pytest.fixture
+def llm_calls(monkeypatch) -> list:
+    """
+    FakeBackend.complete çağrılarını sayar (her çağrı bir eleman).
+    """
+    import ai_processor
+
+    backend = ai_processor.get_backend()
+    calls, complete = [], backend.complete
+
+    def counted(*args, **kw):
+        calls.append(1)
+        return complete(*args, **kw)
+
+    monkeypatch.setattr(backend, "complete", counted)
+    return calls
@@ -0,0 +1,39 @@
+import json
+
+import pytest
+
+from app import app
+
+
+@pytest.fixture
+def client():
+    return app.test_client()
+
+
+@pytest.mark.parametrize("path", ["/project/1/live/business_rules", "/project/1/stream/business_rules?force=1"])
+def test_generation_routes_reject_get(client, path):
+    # crawler / prefetch GET'i LLM çağrısı tetiklememeli
+    assert client.get(path).status_code == 405
+
+
+def sse_events(body: str) -> list:
+    events = []
+    for frame in body.strip().split("\n\n"):
+        lines = dict(line.split(": ", 1) for line in frame.splitlines())
+        events.append((lines["event"], json.loads(lines["data"])))
+    return events
+
+
+def test_live_page_posts_to_stream(mysql_db, project_data, client):
+    project_id = mysql_db.insert_project(project_data)
+
+    page = client.post(f"/project/{project_id}/live/business_rules", data={"force": "1"})
+    assert page.status_code == 200
+    assert f"/project/{project_id}/stream/business_rules?force=1".encode() in page.data
+
+    resp = client.post(f"/project/{project_id}/stream/business_rules?force=1")
+    events = sse_events(resp.get_data(as_text=True))
+    assert events[-1][0] == "done"
+    done = events[-1][1]
+    assert "".join(data for name, data in events if name == "token").strip() == done["output_text"]
+    assert mysql_db.get_latest_project_output(project_id, "business_rules")["id"] == done["out_id"]
@@ -0,0 +1,45 @@
+import json
+
+import pytest
+
+import bulk_import
+
+
+def write_jsonl(path, rows):
+    path.write_text("".join(json.dumps(row, ensure_ascii=False) + "\n" for row in rows), encoding="utf-8")
+
+
+def test_resume_after_crash_between_insert_and_checkpoint(mysql_db, project_data, tmp_path, monkeypatch):
+    src = tmp_path / "projects.jsonl"
+    rows = [dict(project_data, title=f"{project_data['title']} {i}") for i in range(3)]
+    write_jsonl(src, rows + [dict(project_data, title="")])
+    real_insert = mysql_db.insert_projects_bulk
+
+    def insert_then_crash(batch):
+        real_insert(batch)
+        raise KeyboardInterrupt  # insert oldu, checkpoint yazılmadı
+
+    monkeypatch.setattr(mysql_db, "insert_projects_bulk", insert_then_crash)
+    cp = bulk_import.load_checkpoint(str(src), resume=False)
+    with pytest.raises(KeyboardInterrupt):
+        bulk_import.import_projects(str(src), cp, batch_size=10)
+    monkeypatch.setattr(mysql_db, "insert_projects_bulk", real_insert)
+
+    cp = bulk_import.load_checkpoint(str(src), resume=True)
+    assert cp["rows_done"] == 0 and cp["project_ids"] == []
+    bulk_import.import_projects(str(src), cp, batch_size=10)
+
+    expected = [mysql_db.get_project_by_title(row["title"])["id"] for row in rows]
+    assert sorted(cp["project_ids"]) == sorted(expected)  # üretim kuyruğunda
+    assert (cp["rows_done"], cp["skipped"], cp["invalid"], cp["pending_titles"]) == (4, 0, 1, [])
+
+
+def test_titles_created_elsewhere_are_skipped(mysql_db, project_data, tmp_path):
+    src = tmp_path / "projects.jsonl"
+    mysql_db.insert_project(project_data)
+    write_jsonl(src, [project_data, dict(project_data, title=project_data["title"] + " yeni")])
+
+    cp = bulk_import.load_checkpoint(str(src), resume=False)
+    bulk_import.import_projects(str(src), cp, batch_size=10)
+
+    assert len(cp["project_ids"]) == 1 and cp["skipped"] == 1
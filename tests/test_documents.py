@@ -0,0 +1,39 @@
+import threading
+import time
+
+import pytest
+
+import documents
+
+
+def test_map_chunks_keeps_order(monkeypatch):
+    monkeypatch.setattr(documents, "DOC_MAP_WORKERS", 3)
+    monkeypatch.setattr(documents, "extract_document_notes",
+                        lambda chunk, index: time.sleep(0.01 * (5 - index % 5)) or f"not {chunk}")
+
+    assert documents._map_chunks(str(i) for i in range(12)) == [f"not {i}" for i in range(12)]
+
+
+def test_map_chunk_error_cancels_queued_calls(monkeypatch):
+    monkeypatch.setattr(documents, "DOC_MAP_WORKERS", 2)
+    started, release = [], threading.Event()
+
+    def extract(chunk, index):
+        started.append(index)
+        if index == 1:
+            raise RuntimeError("parça 1 başarısız")
+        release.wait(5)  # yavaş LLM çağrısı
+        return chunk
+
+    monkeypatch.setattr(documents, "extract_document_notes", extract)
+
+    t0 = time.monotonic()
+    with pytest.raises(RuntimeError, match="parça 1"):
+        documents._map_chunks(str(i) for i in range(20))
+    elapsed = time.monotonic() - t0
+    release.set()
+
+    # hata çalışan çağrıları beklemeden döner; kuyruktakiler hiç başlamaz
+    assert elapsed < 1.0
+    time.sleep(0.1)
+    assert len(started) <= 3
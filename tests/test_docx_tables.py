@@ -0,0 +1,44 @@
+"""
+docx_export: tek XML parçasıyla yazılan tablo, eski hücre hücre python-docx yoluyla
+aynı document.xml'i üretmeli.
+"""
+import pytest
+
+pytest.importorskip("docx")
+
+from docx import Document  # noqa: E402
+
+from bench.docx_tables import legacy_add_md_table, make_md_table  # noqa: E402
+from docx_export import docx_add_md_table, docx_add_table  # noqa: E402
+
+
+def document_xml(fill) -> str:
+    doc = Document()
+    fill(doc)
+    return doc.element.xml
+
+
+@pytest.mark.parametrize("rows", [0, 1, 50])
+def test_md_table_document_xml_matches_legacy(rows):
+    md = make_md_table(rows, 5, seed=rows)
+    legacy = document_xml(lambda doc: legacy_add_md_table(doc, "Tablo", md))
+    bulk = document_xml(lambda doc: docx_add_md_table(doc, "Tablo", md))
+    assert bulk == legacy
+
+
+def test_special_cell_text_matches_legacy():
+    rows = [
+        ["Kolon", "Değer", "Boş"],
+        ["a & b", "<fk> > 0", ""],
+        [" baştaki boşluk", "sekme\tiçinde", "iki\nsatır"],
+        ["çğıöşü ÇĞİÖŞÜ", "x\r\ny", "son "],
+    ]
+
+    def legacy(doc):
+        table = doc.add_table(rows=0, cols=len(rows[0]))
+        table.style = "Table Grid"
+        for r in rows:
+            for cell, val in zip(table.add_row().cells, r):
+                cell.text = val
+
+    assert document_xml(lambda doc: docx_add_table(doc, rows)) == document_xml(legacy)
@@ -0,0 +1,75 @@
+"""
+İndirmeler: ETag / 304 ve export cache anahtarı.
+"""
+import pytest
+
+import app as app_module
+import generation
+from app import app, send_download
+
+
+@pytest.fixture
+def output_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(app_module, "OUTPUT_DIR", tmp_path)
+    path = tmp_path / "project_1_all.docx"
+    path.write_bytes(b"PK\x03\x04 docx")
+    return path
+
+
+def download(path, headers=None, **kw):
+    with app.test_request_context(headers=headers or {}):
+        return send_download(path, **kw)
+
+
+@pytest.mark.parametrize("offload", ["none", "accel"])
+def test_send_download_if_none_match_returns_304(output_file, monkeypatch, offload):
+    monkeypatch.setattr(app_module, "DOWNLOAD_OFFLOAD", offload)
+
+    first = download(output_file)
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert "no-cache" in first.headers["Cache-Control"]
+    if offload == "accel":
+        assert first.headers["X-Accel-Redirect"] == "/_outputs/project_1_all.docx"
+
+    again = download(output_file, headers={"If-None-Match": etag})
+    assert again.status_code == 304
+    assert download(output_file, headers={"If-None-Match": '"baska"'}).status_code == 200
+
+
+def test_send_download_uses_given_etag(output_file):
+    resp = download(output_file, etag="abc123", download_name="project_1.docx")
+    assert resp.headers["ETag"] == '"abc123"'
+    assert "project_1.docx" in resp.headers["Content-Disposition"]
+    assert download(output_file, headers={"If-None-Match": '"abc123"'}, etag="abc123").status_code == 304
+
+
+def test_export_key_changes_with_outputs():
+    p = {"id": 1, "title": "Kütüphane", "domain": "Eğitim", "primary_entity": "Kitap"}
+    latest = {"er_tables": {"id": 10}, "report": {"id": 11}, "sql_script": None}
+    key = generation.export_key(p, latest)
+
+    assert generation.export_key(p, dict(latest)) == key
+    assert generation.export_key(p, dict(latest, report={"id": 12})) != key
+    assert generation.export_key(p, dict(latest, sql_script={"id": 13})) != key
+    assert generation.export_key(dict(p, title="Kütüphane 2"), latest) != key
+
+
+def test_export_route_revalidates_after_new_output(mysql_db, project_data, tmp_path, monkeypatch):
+    monkeypatch.setattr(generation, "EXPORT_DIR", tmp_path / "exports")
+    project_id = mysql_db.insert_project(project_data)
+    mysql_db.insert_project_output(project_id=project_id, action_key="er_tables", prompt_text="p",
+                                   output_text="| A |\n|---|\n| 1 |", model="fake", temperature=0.2)
+    client = app.test_client()
+
+    first = client.get(f"/project/{project_id}/export")
+    assert first.status_code == 200
+    etag = first.headers["ETag"]
+    assert client.get(f"/project/{project_id}/export", headers={"If-None-Match": etag}).status_code == 304
+
+    mysql_db.insert_project_output(project_id=project_id, action_key="report", prompt_text="p",
+                                   output_text="Aylık rapor", model="fake", temperature=0.2)
+    changed = client.get(f"/project/{project_id}/export", headers={"If-None-Match": etag})
+    assert changed.status_code == 200
+    assert changed.headers["ETag"] != etag
+    assert len(list((tmp_path / "exports").glob("*.docx"))) == 1  # eski export silindi
@@ -0,0 +1,15 @@
+from file_utils import chunk_paragraphs, extract_text, iter_paragraphs
+
+
+def test_txt_lines_are_kept_verbatim(tmp_path):
+    path = tmp_path / "notlar.txt"
+    path.write_bytes("  Başlık\r\n\n    girintili satır  \n\n\nson\n\n".encode("utf-8"))
+
+    assert list(iter_paragraphs(path)) == ["  Başlık", "", "    girintili satır  ", "", "", "son", ""]
+    assert extract_text(path) == path.read_text(encoding="utf-8").strip()
+
+
+def test_chunks_stay_within_budget():
+    words = lambda text: len(text.split())
+    chunks = list(chunk_paragraphs(["a b c", "d e", "f g h i j k l"], 4, words))
+    assert chunks == ["a b c", "d e", "f g h i", "j k l"]
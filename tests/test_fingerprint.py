@@ -0,0 +1,51 @@
+from ai_processor import ACTION_DEPENDENCIES, PROJECT_FIELDS, action_output_deps, input_fingerprint
+from generation import ALL_ACTIONS
+
+ACTIONS = [key for key, _ in ALL_ACTIONS]
+
+
+def changed_actions(before: dict, after: dict) -> set:
+    return {a for a in ACTIONS if input_fingerprint(before, a) != input_fingerprint(after, a)}
+
+
+def test_field_edit_changes_only_dependent_fingerprints(project_data):
+    base = dict(project_data, id=1)
+    for field, _ in PROJECT_FIELDS:
+        edited = dict(base, **{field: base[field] + " (değişti)"})
+        expected = {a for a in ACTIONS if field in ACTION_DEPENDENCIES[a]["fields"]}
+        assert changed_actions(base, edited) == expected, field
+
+
+def test_reporting_requirement_edit_changes_only_report(project_data):
+    base = dict(project_data, id=1)
+    edited = dict(base, reporting_requirement="Haftalık gecikme raporu")
+    assert changed_actions(base, edited) == {"report"}
+
+
+def test_upstream_output_changes_dependent_fingerprint(project_data):
+    p = dict(project_data, id=1)
+    for action in ACTIONS:
+        for dep in action_output_deps(action):
+            assert input_fingerprint(p, action, {dep: "v1"}) != input_fingerprint(p, action, {dep: "v2"})
+    assert input_fingerprint(p, "business_rules", {"er_tables": "v1"}) == input_fingerprint(p, "business_rules")
+
+
+def test_reporting_requirement_edit_regenerates_only_report(mysql_db, project_data):
+    import generation
+
+    project_id = mysql_db.insert_project(project_data)
+
+    def run():
+        states = {}
+        p = mysql_db.get_project(project_id)
+        results = generation.generate_project_outputs(p, on_progress=lambda k, s: states.__setitem__(k, s))
+        assert all(ok for ok, _ in results.values())
+        return states
+
+    assert set(run().values()) == {"DONE"}
+    assert set(run().values()) == {"REUSED"}
+
+    mysql_db.update_project(project_id, dict(project_data, reporting_requirement="Haftalık gecikme raporu"))
+    states = run()
+    assert {k for k, s in states.items() if s == "DONE"} == {"report"}
+    assert {k for k, s in states.items() if s == "REUSED"} == set(ACTIONS) - {"report"}
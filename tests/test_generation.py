@@ -0,0 +1,18 @@
+"""
+Uçtan uca üretim: FakeBackend + test veritabanı (TEST_DB_HOST).
+"""
+import ai_processor
+import generation
+
+
+def test_generation_goes_through_limiter(mysql_db, project_data):
+    p = mysql_db.get_project(mysql_db.insert_project(project_data))
+    limiter = ai_processor._process_state()[1]
+    before = limiter.stats()["calls"]
+
+    results = generation.generate_project_outputs(p, force=True)
+
+    assert all(ok for ok, _ in results.values())
+    stats = limiter.stats()
+    assert stats["calls"] - before == len(generation.ALL_ACTIONS)
+    assert stats["in_flight"] == 0
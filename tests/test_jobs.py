@@ -0,0 +1,65 @@
+"""
+generation_jobs kuyruğu: test veritabanı (TEST_DB_HOST).
+"""
+import threading
+
+import jobs
+
+
+def queued_job(db, project_data):
+    project_id = db.insert_project(project_data)
+    file_id = db.insert_file("out.docx", "application/octet-stream", "")
+    job_id = db.insert_generation_job(project_id, file_id, {"business_rules": "QUEUED"})
+    return job_id, file_id
+
+
+def test_generation_job_claimed_once(mysql_db, project_data):
+    job_id, file_id = queued_job(mysql_db, project_data)
+
+    claimed = []
+    threads = [threading.Thread(target=lambda: claimed.append(mysql_db.claim_generation_job("w", 900, 3)))
+               for _ in range(4)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    got = [j for j in claimed if j]
+    assert [j["id"] for j in got] == [job_id]
+    assert got[0]["progress"] == {"business_rules": "QUEUED"}
+    assert mysql_db.get_file(file_id)["status"] == "PROCESSING"
+
+
+def test_finished_job_is_not_claimed_again(mysql_db, project_data):
+    job_id, file_id = queued_job(mysql_db, project_data)
+    assert mysql_db.claim_generation_job("w", 900, 3)["id"] == job_id
+
+    mysql_db.finish_generation_job(job_id, file_id, "DONE", output_path="out.docx")
+
+    assert mysql_db.get_file(file_id)["status"] == "DONE"
+    assert mysql_db.claim_generation_job("w", -1, 3) is None  # bitmiş iş takılı sayılmaz
+
+
+def test_stale_job_is_reclaimed_until_max_attempts(mysql_db, project_data):
+    job_id, file_id = queued_job(mysql_db, project_data)
+
+    # lock_timeout=-1: her kilit takılı sayılır (worker işi bitirmeden öldü)
+    for attempt in range(3):
+        assert mysql_db.claim_generation_job(f"w{attempt}", -1, 3)["id"] == job_id
+
+    assert mysql_db.claim_generation_job("w3", -1, 3) is None
+    row = mysql_db.get_file(file_id)
+    assert row["status"] == "ERROR"
+    assert "3 denemede" in row["error_message"]
+    assert mysql_db.get_generation_job_by_file(file_id)["attempts"] == 3
+
+
+def test_worker_once_marks_job_done(mysql_db, project_data, monkeypatch, tmp_path):
+    monkeypatch.setattr(jobs, "process_job", lambda job: mysql_db.finish_generation_job(
+        job["id"], job["file_id"], "DONE", output_path=str(tmp_path / "out.docx")))
+    _, file_id = queued_job(mysql_db, project_data)
+
+    jobs.run_worker(once=True)
+
+    assert mysql_db.get_file(file_id)["status"] == "DONE"
+    assert mysql_db.claim_generation_job("w", -1, 3) is None
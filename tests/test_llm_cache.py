@@ -0,0 +1,62 @@
+import pytest
+
+import llm_cache
+
+
+def test_cache_key_covers_all_inputs():
+    key = llm_cache.cache_key("m", "sys", "prompt", 0.2)
+    assert key == llm_cache.cache_key("m", "sys", "prompt", 0.2)
+    assert len({key, llm_cache.cache_key("m2", "sys", "prompt", 0.2), llm_cache.cache_key("m", "sys2", "prompt", 0.2),
+                llm_cache.cache_key("m", "sys", "prompt2", 0.2), llm_cache.cache_key("m", "sys", "prompt", 0.7)}) == 5
+
+
+def test_lru_evicts_by_bytes():
+    cache = llm_cache.LRUCache(max_bytes=10)
+    cache.put("a", "1234")
+    cache.put("b", "ğğ")  # 4 bayt
+    assert cache.get("a") == "1234"  # a en son kullanılan
+    cache.put("c", "12345")
+    assert cache.get("b") is None and cache.get("a") == "1234" and cache.get("c") == "12345"
+    assert cache.size_bytes == 9 and cache.evictions == 1
+    cache.put("big", "x" * 11)  # sınırdan büyük hiç tutulmaz
+    assert cache.get("big") is None and len(cache) == 2
+
+
+@pytest.fixture
+def persistent_cache(mysql_db, monkeypatch):
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_ENABLED", True)
+    monkeypatch.setattr(llm_cache, "LLM_CACHE_PERSIST", "db")
+    monkeypatch.setattr(llm_cache, "_memory", llm_cache.LRUCache(1024 * 1024))
+    monkeypatch.setitem(llm_cache._prune_state, "at", 0.0)
+    return mysql_db
+
+
+def test_persistent_hit_after_memory_loss(persistent_cache, monkeypatch):
+    llm_cache.put("k1", "fake", "yanıt")
+    monkeypatch.setattr(llm_cache, "_memory", llm_cache.LRUCache(1024 * 1024))  # yeni process
+    before = llm_cache.stats()["hits_persistent"]
+    assert llm_cache.get("k1") == "yanıt"
+    assert llm_cache.stats()["hits_persistent"] == before + 1
+
+
+def test_expired_rows_are_not_read_and_are_pruned(persistent_cache, monkeypatch):
+    db = persistent_cache
+    db.put_llm_cache_entry("old", "fake", "eski", -1)
+    db.put_llm_cache_entry("fresh", "fake", "yeni", 3600)
+    assert db.get_llm_cache_entry("old") is None
+    assert db.get_llm_cache_entry("fresh")["output_text"] == "yeni"
+
+    llm_cache.put("k2", "fake", "yanıt")  # ilk put budar
+    assert db.prune_llm_cache(100) == 0
+    with db.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT cache_key FROM llm_cache ORDER BY cache_key")
+            assert [r["cache_key"] for r in cur.fetchall()] == ["fresh", "k2"]
+
+
+def test_prune_runs_at_most_once_per_interval(persistent_cache, monkeypatch):
+    calls = []
+    monkeypatch.setattr(llm_cache.db, "prune_llm_cache", lambda limit: calls.append(limit) or 0)
+    for i in range(5):
+        llm_cache.put(f"k{i}", "fake", "yanıt")
+    assert calls == [llm_cache.LLM_CACHE_PRUNE_BATCH]
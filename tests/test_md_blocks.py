@@ -0,0 +1,70 @@
+import md_blocks
+from docx_export import parse_md_table
+
+
+def kinds(text):
+    return [b.kind for b in md_blocks.tokenize(text)]
+
+
+def tables(text):
+    return [b.rows for b in md_blocks.tokenize(text) if b.kind == "table"]
+
+
+def test_multiple_tables_in_one_output():
+    text = "\n".join([
+        "## Tablolar",
+        "| A | B |",
+        "|---|---|",
+        "| 1 | 2 |",
+        "arada metin",
+        "| C |",
+        "|:-:|",
+        "| 3 |",
+    ])
+    assert kinds(text) == ["heading", "table", "paragraph", "table"]
+    assert tables(text) == [[["A", "B"], ["1", "2"]], [["C"], ["3"]]]
+
+
+def test_escaped_pipe_stays_in_cell():
+    text = "| Kural | Örnek |\n|---|---|\n| VEYA | a \\| b |\n| son | x\\| |"
+    assert tables(text) == [[["Kural", "Örnek"], ["VEYA", "a | b"], ["son", "x|"]]]
+
+
+def test_short_and_ragged_rows_fit_header():
+    text = "| A | B | C |\n|---|---|---|\n| 1 |\n| 1 | 2 | 3 | 4 |\n|  | 2 |"
+    assert tables(text) == [[["A", "B", "C"], ["1", "", ""], ["1", "2", "3"], ["", "2", ""]]]
+
+
+def test_fenced_code_with_pipes_is_not_a_table():
+    text = "```sql\nSELECT a | b FROM t;\n| x | y |\n|---|---|\n```\n| A |\n|---|\n| 1 |"
+    blocks = list(md_blocks.tokenize(text))
+    assert [b.kind for b in blocks] == ["code", "table"]
+    assert blocks[0].lang == "sql"
+    assert blocks[0].text == "SELECT a | b FROM t;\n| x | y |\n|---|---|"
+    assert blocks[1].rows == [["A"], ["1"]]
+
+
+def test_pipe_lines_without_separator_are_paragraphs():
+    text = "| yalnız | satır |\n| ikinci | satır |\ndevam"
+    blocks = list(md_blocks.tokenize(text))
+    assert [(b.kind, b.text) for b in blocks] == [
+        ("paragraph", "| yalnız | satır |"),
+        ("paragraph", "| ikinci | satır |"),
+        ("paragraph", "devam"),
+    ]
+    assert parse_md_table(text) is None
+
+
+def test_separator_alone_is_not_a_table_header():
+    # ayırıcıya benzeyen satır tablo satırı değilse (| ile başlamıyorsa) tablo açılmaz
+    assert kinds("| A |\n---\n| 1 |") == ["paragraph", "paragraph", "paragraph"]
+
+
+def test_line_iterable_and_crlf_input():
+    lines = ["| A | B |\r\n", "|---|---|\r\n", "| 1 | 2 |\r\n"]
+    assert tables(lines) == tables("".join(lines)) == [[["A", "B"], ["1", "2"]]]
+
+
+def test_parse_md_table_returns_first_table():
+    text = "| A |\n|---|\n| 1 |\n\n| B |\n|---|\n| 2 |"
+    assert parse_md_table(text) == (["A"], [["1"]])
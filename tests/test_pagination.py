@@ -0,0 +1,16 @@
+def test_keyset_pagination(mysql_db, project_data):
+    ids = [mysql_db.insert_project(dict(project_data, title=f"{project_data['title']} {i}")) for i in range(7)]
+
+    first = mysql_db.list_projects_page(limit=3)
+    assert [r["id"] for r in first["rows"]] == ids[::-1][:3]
+    assert first["prev_after"] is None
+
+    second = mysql_db.list_projects_page(limit=3, before_id=first["next_before"])
+    assert [r["id"] for r in second["rows"]] == ids[::-1][3:6]
+
+    last = mysql_db.list_projects_page(limit=3, before_id=second["next_before"])
+    assert [r["id"] for r in last["rows"]] == [ids[0]]
+    assert last["next_before"] is None
+
+    back = mysql_db.list_projects_page(limit=3, after_id=second["prev_after"])
+    assert [r["id"] for r in back["rows"]] == ids[::-1][:3]
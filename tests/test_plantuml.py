@@ -0,0 +1,33 @@
+import random
+import zlib
+
+from plantuml_utils import _plantuml_encode64, plantuml_image_url
+
+
+def legacy_encode64(data: bytes) -> str:
+    """Eski karakter karakter döngü (karşılaştırma için)."""
+    alphabet = "0123456789ABCDEFGHIJKLMNOPQRSTUVWXYZabcdefghijklmnopqrstuvwxyz-_"
+    res = []
+    i = 0
+    while i < len(data):
+        b1 = data[i]; i += 1  # noqa: E702
+        b2 = data[i] if i < len(data) else 0; i += 1  # noqa: E702
+        b3 = data[i] if i < len(data) else 0; i += 1  # noqa: E702
+        res.append(alphabet[(b1 >> 2) & 0x3F])
+        res.append(alphabet[(((b1 & 0x3) << 4) | (b2 >> 4)) & 0x3F])
+        res.append(alphabet[(((b2 & 0xF) << 2) | (b3 >> 6)) & 0x3F])
+        res.append(alphabet[b3 & 0x3F])
+    return "".join(res)
+
+
+def test_encoder_matches_legacy_loop():
+    rnd = random.Random(0)
+    for n in list(range(0, 10)) + [255, 256, 257, 4096]:
+        data = bytes(rnd.randrange(256) for _ in range(n))
+        assert _plantuml_encode64(data) == legacy_encode64(data)
+
+
+def test_image_url_matches_legacy_encoding():
+    code = "@startuml\nentity Öğrenci {\n  * id : INT\n}\nÖğrenci ||--o{ Ders\n@enduml"
+    expected = legacy_encode64(zlib.compress(code.encode("utf-8"))[2:-4])
+    assert plantuml_image_url(code, fmt="svg").endswith(f"/svg/{expected}")
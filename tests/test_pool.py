@@ -0,0 +1,57 @@
+import threading
+import time
+
+import pytest
+
+import db
+
+
+class FakeConn:
+    def __init__(self):
+        self.open = True
+        self.pings = 0
+
+    def ping(self, reconnect=False):
+        self.pings += 1
+
+    def close(self):
+        self.open = False
+
+
+def test_pool_reuses_released_connection():
+    pool = db.ConnectionPool(size=2, timeout=1, max_idle=60, ping_after=30, connect=FakeConn)
+    c1 = pool.acquire()
+    pool.release(c1)
+    assert pool.acquire() is c1
+    assert pool.stats()["created"] == 1
+
+
+def test_pool_is_bounded_and_times_out():
+    pool = db.ConnectionPool(size=1, timeout=0.1, max_idle=60, ping_after=30, connect=FakeConn)
+    pool.acquire()
+    with pytest.raises(db.PoolTimeout):
+        pool.acquire()
+    assert pool.stats()["timeouts"] == 1
+
+
+def test_pool_waiter_gets_released_connection():
+    pool = db.ConnectionPool(size=1, timeout=2, max_idle=60, ping_after=30, connect=FakeConn)
+    c1 = pool.acquire()
+    threading.Timer(0.05, pool.release, (c1,)).start()
+    assert pool.acquire() is c1
+    assert pool.stats()["waits"] == 1
+
+
+def test_pool_discards_broken_and_recycles_idle():
+    pool = db.ConnectionPool(size=1, timeout=1, max_idle=0.01, ping_after=30, connect=FakeConn)
+    c1 = pool.acquire()
+    pool.release(c1, broken=True)
+    assert not c1.open
+    c2 = pool.acquire()
+    assert c2 is not c1
+    pool.release(c2)
+    time.sleep(0.02)
+    c3 = pool.acquire()
+    assert c3 is not c2 and not c2.open
+    stats = pool.stats()
+    assert (stats["discarded"], stats["recycled"], stats["open"]) == (1, 1, 1)
@@ -0,0 +1,103 @@
+"""
+Spekülatif ön üretim: FakeBackend + test veritabanı (TEST_DB_HOST).
+"""
+import time
+
+import generation
+import prefetch
+
+
+def enable(monkeypatch, actions=("report",)):
+    monkeypatch.setattr(prefetch, "PREFETCH_ENABLED", True)
+    monkeypatch.setattr(prefetch, "PREFETCH_ACTIONS", list(actions))
+
+
+def scheduled(db, project_data):
+    p = db.get_project(db.insert_project(project_data))
+    job_id = prefetch.schedule(p["id"])
+    job = db.claim_prefetch_job("test-worker", 300)
+    assert job["id"] == job_id
+    return p, job
+
+
+def test_schedule_queues_actions_with_dependencies(mysql_db, project_data, monkeypatch):
+    enable(monkeypatch)
+    p = mysql_db.get_project(mysql_db.insert_project(project_data))
+
+    prefetch.schedule(p["id"])
+
+    job = mysql_db.get_latest_prefetch_job(p["id"])
+    assert job["status"] == "QUEUED"
+    assert sorted(job["action_keys"]) == ["er_tables", "report"]
+    assert prefetch.job_summary(p["id"]) == {"status": "QUEUED", "ready": 0, "total": 2}
+
+
+def test_schedule_disabled(mysql_db, project_data):
+    p = mysql_db.get_project(mysql_db.insert_project(project_data))
+    assert prefetch.schedule(p["id"]) is None
+    assert mysql_db.get_latest_prefetch_job(p["id"]) is None
+
+
+def test_ready_output_serves_prefetched_row(mysql_db, project_data, monkeypatch):
+    enable(monkeypatch)
+    p, job = scheduled(mysql_db, project_data)
+
+    prefetch.process_prefetch_job(job)
+
+    assert mysql_db.get_prefetch_job(job["id"])["status"] == "DONE"
+    row, upstream = prefetch.ready_output(p, "report")
+    assert row["output_text"] == mysql_db.get_latest_project_output(p["id"], "report")["output_text"]
+    assert set(upstream) == {"er_tables"}
+
+    # girdisi değişen action ön üretimden sunulmaz
+    mysql_db.update_project(p["id"], dict(project_data, reporting_requirement="Haftalık gecikme raporu"))
+    assert prefetch.ready_output(mysql_db.get_project(p["id"]), "report") is None
+
+
+def test_ready_output_does_not_wait_for_running_action(mysql_db, project_data, monkeypatch):
+    enable(monkeypatch)
+    p, job = scheduled(mysql_db, project_data)
+    mysql_db.update_prefetch_job(job["id"], progress={"er_tables": "DONE", "report": "RUNNING"})
+
+    started = time.monotonic()
+    assert prefetch.ready_output(p, "report") is None
+    assert time.monotonic() - started < 1.0
+
+
+def test_cancel_before_start_skips_generation(mysql_db, project_data, monkeypatch, llm_calls):
+    enable(monkeypatch)
+    p, job = scheduled(mysql_db, project_data)
+
+    assert prefetch.cancel(p["id"]) == 1
+    prefetch.process_prefetch_job(job)
+
+    assert llm_calls == []
+    assert mysql_db.get_prefetch_job(job["id"])["status"] == "CANCELLED"
+    assert mysql_db.list_project_outputs(p["id"]) == []
+
+
+def test_cancel_after_last_action_is_not_overwritten(mysql_db, project_data, monkeypatch):
+    enable(monkeypatch)
+    p, job = scheduled(mysql_db, project_data)
+
+    def generate_then_cancel(*args, **kw):
+        results = generation.generate_project_outputs(*args, **kw)
+        prefetch.cancel(p["id"])  # son should_continue'dan sonra gelen iptal
+        return results
+
+    monkeypatch.setattr(prefetch, "generate_project_outputs", generate_then_cancel)
+    prefetch.process_prefetch_job(job)
+
+    assert mysql_db.get_prefetch_job(job["id"])["status"] == "CANCELLED"
+
+
+def test_abandoned_job_stops(mysql_db, project_data, monkeypatch, llm_calls):
+    enable(monkeypatch)
+    monkeypatch.setattr(prefetch, "PREFETCH_IDLE_TIMEOUT", -1)  # sayfa hiç açılmadı sayılır
+    p, job = scheduled(mysql_db, project_data)
+
+    prefetch.process_prefetch_job(job)
+
+    assert llm_calls == []
+    assert mysql_db.get_prefetch_job(job["id"])["status"] == "CANCELLED"
+    assert prefetch.job_summary(p["id"])["ready"] == 0
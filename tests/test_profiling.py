@@ -0,0 +1,37 @@
+from flask import Flask
+
+import profiling
+
+
+def test_phase_is_noop_outside_request():
+    with profiling.phase("db"):
+        pass
+    profiling.add("llm", 1.0)  # istek yok: hata vermez, bir şey yazmaz
+
+
+def test_phases_sum_per_name():
+    token = profiling.begin()
+    profiling.add("db", 0.010)
+    profiling.add("db", 0.005)
+    with profiling.phase("llm"):
+        pass
+    timings = profiling.end(token)
+    assert timings["db"] == (0.015, 2)
+    assert timings["llm"][1] == 1
+    header = profiling.server_timing(timings, 0.5)
+    assert 'db;dur=15.0;desc="n=2"' in header
+    assert header.endswith("total;dur=500.0")
+
+
+def test_server_timing_header():
+    app = Flask(__name__)
+    profiling.init_app(app)
+
+    @app.get("/x")
+    def x():
+        profiling.add("db", 0.002)
+        return "ok"
+
+    resp = app.test_client().get("/x")
+    assert resp.status_code == 200
+    assert resp.headers["Server-Timing"].startswith('db;dur=2.0;desc="n=1"')
@@ -0,0 +1,25 @@
+from ai_processor import PROJECT_SYSTEM_PROMPT, _prompt_prefix, build_project_prompt, chat_messages
+from generation import ALL_ACTIONS
+
+ACTIONS = [key for key, _ in ALL_ACTIONS]
+PROVIDER_MIN_CACHED_PREFIX = 1024  # token: provider otomatik prompt cache eşiği
+
+
+def shared_prefix(messages: list) -> str:
+    # provider prefix'i mesaj sırasıyla eşler: system + kullanıcı mesajının başı
+    return messages[0]["content"] + "\n" + messages[1]["content"]
+
+
+def test_prefix_is_byte_identical_across_actions(project_data):
+    p = dict(project_data, id=1)
+    prefix = PROJECT_SYSTEM_PROMPT + "\n" + _prompt_prefix(p)
+    for action in ACTIONS:
+        messages = chat_messages(build_project_prompt(p, action, {"er_tables": "| a |\n|---|\n| b |"}))
+        assert shared_prefix(messages).startswith(prefix), action
+
+
+def test_system_prompt_is_project_independent_and_cacheable(project_data):
+    other = dict(project_data, id=2, title="Otopark", domain="Ulaşım")
+    assert chat_messages(build_project_prompt(other, "report"))[0]["content"] == PROJECT_SYSTEM_PROMPT
+    # ~4 karakter / token kaba tahmini Türkçe metinde gerçek sayıdan düşüktür
+    assert len(PROJECT_SYSTEM_PROMPT) // 4 >= PROVIDER_MIN_CACHED_PREFIX
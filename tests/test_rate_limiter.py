@@ -0,0 +1,316 @@
+"""
+AdaptiveRateLimiter + OpenAIBackend, yerel sahte bir OpenAI endpoint'ine karşı
+(OPENAI_BASE_URL): 429 / Retry-After, backoff, AIMD ve stream'lerde slot tutma.
+"""
+import json
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+import ai_processor
+from llm_backends import OpenAIBackend
+from rate_limiter import AdaptiveRateLimiter
+
+MESSAGES = [{"role": "user", "content": "merhaba"}]
+USAGE = {"prompt_tokens": 10, "completion_tokens": 5, "total_tokens": 15}
+
+
+def completion(text: str) -> dict:
+    return {
+        "id": "chatcmpl-test", "object": "chat.completion", "created": 0, "model": "gpt-test",
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": text}, "finish_reason": "stop"}],
+        "usage": USAGE,
+    }
+
+
+def chunk(delta: str = None, usage: dict = None) -> dict:
+    choices = [{"index": 0, "delta": {"content": delta}, "finish_reason": None}] if delta is not None else []
+    return {"id": "chatcmpl-test", "object": "chat.completion.chunk", "created": 0, "model": "gpt-test",
+            "choices": choices, "usage": usage}
+
+
+class FakeOpenAI:
+    """
+    Sıradaki yanıtı script'ten verir; son yanıt tekrarlanır.
+    Yanıt: (status, headers, body dict) ya da ("stream", [chunk, ...], parça arası gecikme)
+    """
+
+    def __init__(self, script):
+        self.script = list(script)
+        self.requests = []  # monotonic varış zamanları
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def do_POST(self):
+                self.rfile.read(int(self.headers.get("content-length", 0)))
+                fake.requests.append(time.monotonic())
+                item = fake.script.pop(0) if len(fake.script) > 1 else fake.script[0]
+                if item[0] == "stream":
+                    _, chunks, gap = item
+                    self.send_response(200)
+                    self.send_header("content-type", "text/event-stream")
+                    self.end_headers()
+                    for c in chunks:
+                        self.wfile.write(f"data: {json.dumps(c)}\n\n".encode())
+                        self.wfile.flush()
+                        time.sleep(gap)
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    return
+                status, headers, body = item
+                payload = json.dumps(body).encode()
+                self.send_response(status)
+                self.send_header("content-type", "application/json")
+                self.send_header("content-length", str(len(payload)))
+                for k, v in headers.items():
+                    self.send_header(k, v)
+                self.end_headers()
+                self.wfile.write(payload)
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    @property
+    def base_url(self) -> str:
+        return f"http://127.0.0.1:{self.server.server_address[1]}/v1"
+
+    def close(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+
+def rate_limited(headers: dict) -> tuple:
+    return 429, headers, {"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}}
+
+
+@pytest.fixture
+def fake_openai(monkeypatch):
+    servers = []
+
+    def start(*script):
+        server = FakeOpenAI(script)
+        servers.append(server)
+        monkeypatch.setenv("OPENAI_BASE_URL", server.base_url)
+        return server, OpenAIBackend("gpt-test", "sk-test")
+
+    yield start
+    for server in servers:
+        server.close()
+
+
+def make_limiter(**kw) -> AdaptiveRateLimiter:
+    return AdaptiveRateLimiter(**dict(dict(rpm=1e6, tpm=1e9, max_concurrency=8, base_delay=0.01), **kw))
+
+
+def test_retry_after_is_honoured(fake_openai):
+    server, backend = fake_openai(
+        rate_limited({"retry-after": "0.3"}),
+        rate_limited({"retry-after-ms": "200"}),
+        (200, {}, completion("tamam")),
+    )
+    limiter = make_limiter()
+
+    text, usage = limiter.call(lambda: backend.complete(MESSAGES, 0.2), est_tokens=10,
+                               classify=backend.classify_error)
+
+    assert text == "tamam" and usage["total_tokens"] == 15
+    assert len(server.requests) == 3
+    gaps = [b - a for a, b in zip(server.requests, server.requests[1:])]
+    assert gaps[0] >= 0.3 and gaps[1] >= 0.2
+    stats = limiter.stats()
+    assert (stats["rate_limited"], stats["retries"], stats["failures"]) == (2, 2, 0)
+    assert stats["concurrency_limit"] == 2  # 8 -> 4 -> 2 (AIMD)
+
+
+def test_concurrency_recovers_after_successes(fake_openai):
+    _, backend = fake_openai(rate_limited({"retry-after": "0"}), (200, {}, completion("ok")))
+    limiter = make_limiter(increase_every=2)
+
+    for _ in range(3):
+        limiter.call(lambda: backend.complete(MESSAGES, 0.2), est_tokens=10, classify=backend.classify_error)
+
+    assert limiter.stats()["concurrency_limit"] == 5  # 429: 8 -> 4, sonra 2 başarıda +1
+
+
+def test_server_errors_back_off_then_fail(fake_openai):
+    import openai
+
+    server, backend = fake_openai((500, {}, {"error": {"message": "boom"}}))
+    limiter = make_limiter(max_retries=2, base_delay=0.05)
+
+    with pytest.raises(openai.InternalServerError):
+        limiter.call(lambda: backend.complete(MESSAGES, 0.2), est_tokens=10, classify=backend.classify_error)
+
+    assert len(server.requests) == 3
+    stats = limiter.stats()
+    assert (stats["retries"], stats["failures"], stats["rate_limited"]) == (2, 1, 0)
+    assert stats["concurrency_limit"] == 8  # 5xx eşzamanlılığı düşürmez
+
+
+def test_client_errors_are_not_retried(fake_openai):
+    import openai
+
+    server, backend = fake_openai((400, {}, {"error": {"message": "bad request"}}))
+    limiter = make_limiter()
+
+    with pytest.raises(openai.BadRequestError):
+        limiter.call(lambda: backend.complete(MESSAGES, 0.2), est_tokens=10, classify=backend.classify_error)
+    assert len(server.requests) == 1
+
+
+# =========================
+# Streaming (ai_processor._chat_stream)
+# =========================
+STREAM = ("stream", [chunk("Mer"), chunk("ha"), chunk("ba"), chunk(usage=USAGE)], 0.05)
+
+
+@pytest.fixture
+def stream_state(monkeypatch):
+    def install(backend, limiter):
+        monkeypatch.setattr(ai_processor, "_state", (backend, limiter))
+        monkeypatch.setattr(ai_processor, "_state_pid", os.getpid())
+    return install
+
+
+def test_stream_holds_slot_until_exhausted_and_records_usage(fake_openai, stream_state, monkeypatch):
+    _, backend = fake_openai(STREAM)
+    limiter = make_limiter(max_concurrency=1)
+    stream_state(backend, limiter)
+    recorded = []
+    monkeypatch.setattr(limiter, "record_usage", lambda est, actual: recorded.append((est, actual)))
+
+    usage = {}
+    parts, in_flight = [], []
+    for delta in ai_processor._chat_stream(MESSAGES, 0.2, action_key="business_rules", usage=usage):
+        parts.append(delta)
+        in_flight.append(limiter.stats()["in_flight"])
+
+    assert "".join(parts) == "Merhaba"
+    assert in_flight == [1, 1, 1]
+    assert limiter.stats()["in_flight"] == 0
+    assert usage["total_tokens"] == 15 and "latency_ms" in usage
+    assert recorded == [(ai_processor._estimate_tokens(MESSAGES), 15)]
+
+
+def test_stream_blocks_other_calls_while_open(fake_openai, stream_state):
+    _, backend = fake_openai(STREAM)
+    limiter = make_limiter(max_concurrency=1)
+    stream_state(backend, limiter)
+
+    stream = ai_processor._chat_stream(MESSAGES, 0.2)
+    next(stream)
+    done = threading.Event()
+    threading.Thread(target=lambda: (limiter.call(lambda: None, 1, backend.classify_error), done.set())).start()
+    assert not done.wait(0.1)  # tek slot stream'de
+    stream.close()
+    assert done.wait(1)
+
+
+def test_stream_rate_limited_on_open_is_retried(fake_openai, stream_state):
+    server, backend = fake_openai(rate_limited({"retry-after": "0.1"}), STREAM)
+    limiter = make_limiter()
+    stream_state(backend, limiter)
+
+    assert "".join(ai_processor._chat_stream(MESSAGES, 0.2)) == "Merhaba"
+    assert len(server.requests) == 2
+    assert limiter.stats()["rate_limited"] == 1
+
+
+def test_async_stream_holds_slot(fake_openai, stream_state):
+    import asyncio
+
+    _, backend = fake_openai(STREAM)
+    limiter = make_limiter(max_concurrency=1)
+    stream_state(backend, limiter)
+
+    async def run():
+        usage, in_flight = {}, []
+        stream = await ai_processor._achat_stream(MESSAGES, 0.2, usage=usage)
+        async for _ in stream:
+            in_flight.append(limiter.stats()["in_flight"])
+        return usage, in_flight
+
+    usage, in_flight = asyncio.run(run())
+    assert in_flight == [1, 1, 1]
+    assert limiter.stats()["in_flight"] == 0
+    assert usage["total_tokens"] == 15
+
+
+# =========================
+# Token iadesi, asyncio bekleme, profiling
+# =========================
+def test_failed_attempts_refund_reserved_tokens(fake_openai):
+    _, backend = fake_openai(rate_limited({"retry-after": "0"}), rate_limited({"retry-after": "0"}),
+                             (200, {}, completion("tamam")))
+    limiter = make_limiter(tpm=6000)  # 100 token/s dolum: 1000 tokenlık borç 10 s bekletirdi
+
+    started = time.monotonic()
+    limiter.call(lambda: backend.complete(MESSAGES, 0.2), est_tokens=4000, classify=backend.classify_error)
+
+    # üç deneme ama yalnızca başarılı olanın 4000 token'ı düşülür
+    assert time.monotonic() - started < 2.0
+    assert 1900 <= limiter.tokens._tokens <= 2200
+
+
+def test_async_waiter_is_woken_by_thread_release():
+    import asyncio
+
+    limiter = make_limiter(max_concurrency=1)
+    limiter._enter()  # slot bir thread'de
+    tries = []
+    try_enter = limiter._try_enter
+    limiter._try_enter = lambda: tries.append(1) or try_enter()
+
+    async def run():
+        threading.Timer(0.3, limiter._exit).start()
+        started = time.monotonic()
+        await limiter._aenter()
+        return time.monotonic() - started
+
+    waited = asyncio.run(run())
+    limiter._exit()
+
+    assert 0.25 <= waited < 1.0
+    assert len(tries) <= 3  # yoklama yok: ilk deneme + uyandırılınca
+    assert limiter.stats()["in_flight"] == 0 and limiter._awaiting == 0
+
+
+def test_async_waiters_share_slots():
+    import asyncio
+
+    limiter = make_limiter(max_concurrency=2)
+    peak = []
+
+    async def job():
+        async def fn():
+            peak.append(limiter.stats()["in_flight"])
+            await asyncio.sleep(0.02)
+        await limiter.acall(fn, est_tokens=1, classify=lambda e: (None, None))
+
+    async def run():
+        await asyncio.gather(*(job() for _ in range(10)))
+
+    asyncio.run(run())
+    assert len(peak) == 10 and max(peak) == 2
+    assert limiter.stats()["in_flight"] == 0
+
+
+def test_async_call_is_profiled(fake_openai, stream_state):
+    import asyncio
+
+    import profiling
+
+    _, backend = fake_openai((200, {}, completion("tamam")))
+    stream_state(backend, make_limiter())
+
+    async def run():
+        token = profiling.begin()
+        await ai_processor._achat_create(MESSAGES, 0.2)
+        return profiling.end(token)
+
+    assert asyncio.run(run())["llm"][1] == 1
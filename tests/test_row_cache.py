@@ -0,0 +1,113 @@
+import time
+from contextlib import contextmanager
+
+import pymysql
+import pytest
+
+import db
+
+
+def test_row_cache_ttl_and_lru():
+    cache = db.RowCache(max_entries=2, ttl=0.05)
+    for key in ("a", "b", "c"):
+        _, version = cache.get(key)
+        cache.put(key, key.upper(), version)
+    assert cache.get("a")[0] is db.RowCache.MISSING  # en eski atıldı
+    assert cache.get("c")[0] == "C"
+    time.sleep(0.06)
+    assert cache.get("c")[0] is db.RowCache.MISSING
+    assert cache.stats["evictions"] == 1 and cache.stats["expired"] == 1
+
+
+def test_row_cache_skips_put_after_concurrent_invalidate():
+    cache = db.RowCache(max_entries=10, ttl=60)
+    _, version = cache.get("k")
+    cache.invalidate(["k"])  # okuma sürerken yazıldı: okunan satır eski olabilir
+    cache.put("k", "stale", version)
+    assert cache.get("k")[0] is db.RowCache.MISSING
+
+
+def test_update_project_invalidates_cached_row(mysql_db, project_data):
+    project_id = mysql_db.insert_project(project_data)
+    assert mysql_db.get_project(project_id)["domain"] == project_data["domain"]
+    mysql_db.update_project(project_id, dict(project_data, domain="Sağlık"))
+    assert mysql_db.get_project(project_id)["domain"] == "Sağlık"
+
+
+# =========================
+# Process'ler arası invalidation sync'i
+# =========================
+def fake_get_conn(calls: list, rows=None):
+    """
+    rows=None: bağlantı hatası; liste: cache_invalidations sorgusunun dönüşü.
+    """
+    class Cursor:
+        def __enter__(self):
+            return self
+
+        def __exit__(self, *exc):
+            return False
+
+        def execute(self, *args):
+            pass
+
+        def fetchall(self):
+            return rows
+
+    class Conn:
+        def cursor(self):
+            return Cursor()
+
+    @contextmanager
+    def get_conn():
+        calls.append(time.monotonic())
+        if rows is None:
+            raise pymysql.err.OperationalError(2003, "Can't connect to MySQL server")
+        yield Conn()
+    return get_conn
+
+
+@pytest.fixture
+def sync_state(monkeypatch):
+    monkeypatch.setattr(db, "DB_CACHE_SYNC", "db")
+    monkeypatch.setattr(db, "DB_CACHE_SYNC_INTERVAL", 0.01)
+    for key, value in {"last_id": 0, "checked_at": 0.0, "failures": 0, "stale_since": None}.items():
+        monkeypatch.setitem(db._sync_state, key, value)
+    yield
+    db._cache.clear()
+
+
+def test_sync_failure_marks_cache_stale_and_backs_off(sync_state, monkeypatch, caplog):
+    _, version = db._cache.get(("project", 1))
+    db._cache.put(("project", 1), {"id": 1}, version)
+    calls = []
+    monkeypatch.setattr(db, "get_conn", fake_get_conn(calls))
+
+    for _ in range(20):
+        assert db._cache_get(("project", 1))[0] is db.RowCache.MISSING  # bayat olabilir: okunmaz
+        time.sleep(0.005)
+
+    assert len(calls) < 6  # 0.02, 0.04, 0.08 ... aralıkla
+    assert caplog.text.count("sync başarısız") == 1
+    assert len(db._cache) == 1  # her hatada silinmez
+    assert db.cache_stats()["sync_stale"]
+
+    monkeypatch.setattr(db, "get_conn", fake_get_conn(calls, rows=[]))
+    monkeypatch.setitem(db._sync_state, "checked_at", 0.0)
+    assert db._cache_get(("project", 1))[0] == {"id": 1}
+    assert not db.cache_stats()["sync_stale"]
+
+
+def test_check_cache_sync_fails_without_table(mysql_db, monkeypatch):
+    monkeypatch.setattr(mysql_db, "DB_CACHE_SYNC", "db")
+    mysql_db.check_cache_sync()
+    with mysql_db.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("RENAME TABLE cache_invalidations TO cache_invalidations_off")
+    try:
+        with pytest.raises(RuntimeError, match="cache_invalidations"):
+            mysql_db.check_cache_sync()
+    finally:
+        with mysql_db.get_conn() as conn:
+            with conn.cursor() as cur:
+                cur.execute("RENAME TABLE cache_invalidations_off TO cache_invalidations")
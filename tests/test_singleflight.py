@@ -0,0 +1,184 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+import generation
+import singleflight
+
+
+@pytest.fixture
+def local_mode(monkeypatch):
+    monkeypatch.setattr(singleflight, "SINGLEFLIGHT", "local")
+    monkeypatch.setattr(singleflight, "SINGLEFLIGHT_WAIT_TIMEOUT", 5)
+
+
+def run_many(n: int, target):
+    results, errors = [], []
+
+    def worker():
+        try:
+            results.append(target())
+        except Exception as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=worker) for _ in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results, errors
+
+
+# =========================
+# Process içi
+# =========================
+def test_concurrent_identical_requests_run_once(local_mode):
+    calls = []
+
+    def request():
+        with singleflight.flight("k-once") as f:
+            if f.result is None:
+                calls.append(1)
+                time.sleep(0.1)
+                f.result = {"out_id": 1, "output_text": "metin"}
+        return f.result["output_text"], f.shared
+
+    results, errors = run_many(10, request)
+    assert not errors and len(calls) == 1
+    assert [r[0] for r in results] == ["metin"] * 10
+    assert sum(shared for _, shared in results) == 9
+    assert singleflight.stats()["in_flight"] == 0
+
+
+def test_leader_error_is_shared(local_mode):
+    def request():
+        with singleflight.flight("k-error") as f:
+            if f.result is None:
+                time.sleep(0.1)
+                raise ValueError("LLM hatası")
+        return f.result
+
+    results, errors = run_many(4, request)
+    assert not results
+    assert sum(isinstance(e, ValueError) for e in errors) == 1
+    assert sum(isinstance(e, singleflight.SingleFlightError) for e in errors) == 3
+
+
+def test_abandoned_leader_is_taken_over(local_mode):
+    started, leaders = threading.Event(), []
+
+    def leader():
+        with singleflight.flight("k-abandon") as f:
+            started.set()
+            time.sleep(0.1)  # sonuç yazmadan çıkar (stream istemcisi koptu)
+
+    def waiter():
+        started.wait()
+        with singleflight.flight("k-abandon") as f:
+            if f.result is None:
+                leaders.append(1)
+                time.sleep(0.1)
+                f.result = {"out_id": 2, "output_text": "yeni"}
+        return f.result["output_text"]
+
+    t = threading.Thread(target=leader)
+    t.start()
+    results, errors = run_many(3, waiter)
+    t.join()
+    assert not errors and results == ["yeni"] * 3 and len(leaders) == 1
+
+
+def test_async_cancel_releases_lease_off_the_event_loop(monkeypatch):
+    monkeypatch.setattr(singleflight, "SINGLEFLIGHT", "db")
+    monkeypatch.setattr(singleflight.db, "acquire_generation_lease", lambda key, owner, ttl: True)
+    released = []
+
+    def slow_release(key, owner):
+        time.sleep(0.3)
+        released.append(threading.current_thread())
+
+    monkeypatch.setattr(singleflight.db, "release_generation_lease", slow_release)
+
+    async def leader(entered):
+        async with singleflight.aflight("k-cancel") as f:
+            entered.set()
+            await asyncio.sleep(10)
+
+    async def run():
+        entered = asyncio.Event()
+        task = asyncio.create_task(leader(entered))
+        await entered.wait()
+        task.cancel()
+        t0 = time.monotonic()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+        cancel_s = time.monotonic() - t0
+        assert "k-cancel" not in singleflight._flights  # yerel kayıt hemen bırakıldı
+        await asyncio.sleep(0.5)
+        return cancel_s, threading.current_thread()
+
+    cancel_s, loop_thread = asyncio.run(run())
+    assert cancel_s < 0.2  # release loop'u bloklamadı
+    assert len(released) == 1 and released[0] is not loop_thread
+
+
+# =========================
+# MySQL: generation_leases (process'ler arası)
+# =========================
+def test_lease_shared_across_processes(mysql_db, project_data):
+    project_id = mysql_db.insert_project(project_data)
+    key = f"{project_id}:business_rules:cache:test"
+    leader, other = singleflight.Flight(key), singleflight.Flight(key)  # iki ayrı process gibi
+
+    assert singleflight._remote_step(leader, first=True) is True
+    assert singleflight._remote_step(other, first=True) is None
+    assert singleflight._remote_step(other, first=False) is None  # RUNNING
+
+    out_id = mysql_db.insert_project_output(project_id, "business_rules", "prompt", "kurallar", "gpt-test")
+    singleflight._close_lease(leader, result={"out_id": out_id})
+
+    shared = singleflight._remote_step(other, first=False)
+    assert shared["out_id"] == out_id and shared["output_text"] == "kurallar"
+
+
+def test_released_lease_can_be_taken_over(mysql_db):
+    key = "1:er_tables:cache:test"
+    leader, other = singleflight.Flight(key), singleflight.Flight(key)
+
+    assert singleflight._remote_step(leader, first=True) is True
+    singleflight._close_lease(leader, abandoned=True)
+    assert singleflight._remote_step(other, first=False) is True
+    assert mysql_db.get_generation_lease(key)["status"] == "RUNNING"
+
+
+def test_lease_error_is_shared(mysql_db):
+    key = "1:report:cache:test"
+    leader, other = singleflight.Flight(key), singleflight.Flight(key)
+
+    assert singleflight._remote_step(leader, first=True) is True
+    singleflight._close_lease(leader, error=RuntimeError("LLM hatası"))
+    with pytest.raises(singleflight.SingleFlightError, match="LLM hatası"):
+        singleflight._remote_step(other, first=False)
+
+
+# =========================
+# generate_and_store: FakeBackend + test veritabanı (TEST_DB_HOST), SINGLEFLIGHT=db
+# =========================
+def test_concurrent_generation_calls_llm_once(mysql_db, project_data, monkeypatch, llm_calls):
+    monkeypatch.setattr(singleflight, "SINGLEFLIGHT", "db")
+    p = mysql_db.get_project(mysql_db.insert_project(project_data))
+
+    texts = []
+    threads = [threading.Thread(target=lambda: texts.append(generation.generate_and_store(p, "er_tables")[0]))
+               for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert len(llm_calls) == 1
+    assert len(texts) == 8 and len(set(texts)) == 1
+    assert len(mysql_db.list_project_outputs(p["id"])) == 1
+    assert mysql_db.get_generation_lease(singleflight.generation_key(p, "er_tables"))["status"] == "DONE"
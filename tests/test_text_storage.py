@@ -0,0 +1,121 @@
+"""
+project_ai_outputs metin saklama: encode_text / decode_text, text_blobs dedup, compact_outputs.
+"""
+import compact_outputs
+import db
+
+TURKISH = "Öğrenci ders kaydı: ÇĞİÖŞÜ çğıöşü — tablo, kısıt ve ilişki açıklaması.\n"
+
+
+def test_short_text_stays_plain():
+    encoding, data = db.encode_text("kısa çıktı")
+    assert (encoding, data) == ("plain", "kısa çıktı")
+    assert db.decode_text(encoding, data) == "kısa çıktı"
+
+
+def test_large_text_is_compressed_and_round_trips():
+    text = TURKISH * 200
+    encoding, data = db.encode_text(text)
+    assert encoding == "zlib"
+    assert isinstance(data, bytes) and len(data) < len(text.encode("utf-8"))
+    assert db.decode_text(encoding, data) == text
+
+
+def test_threshold_counts_utf8_bytes():
+    # karakter sayısı eşiğin altında, UTF-8 bayt sayısı üstünde
+    text = "ğ" * (db.OUTPUT_COMPRESS_MIN_BYTES // 2 + 88)
+    assert len(text) < db.OUTPUT_COMPRESS_MIN_BYTES <= len(text.encode("utf-8"))
+    encoding, data = db.encode_text(text)
+    assert encoding == "zlib"
+    assert db.decode_text(encoding, data) == text
+
+
+def test_decode_plain_bytes_and_empty():
+    assert db.decode_text("plain", TURKISH.encode("utf-8")) == TURKISH
+    assert db.encode_text("") == ("plain", "")
+    assert db.encode_text(None) == ("plain", None)
+
+
+def test_text_blob_rows_deduplicate_prompts():
+    prompt = "=== PROJE ===\n" + TURKISH * 50
+    hashes, rows = db._text_blob_rows([prompt, None, prompt, "kısa"])
+    assert hashes[0] == hashes[2] and hashes[1] is None and hashes[3] != hashes[0]
+    assert len(rows) == 2
+    by_hash = {r[0]: r for r in rows}
+    _, encoding, body, raw_size = by_hash[hashes[0]]
+    assert encoding == "zlib" and raw_size == len(prompt.encode("utf-8"))
+    assert db.decode_text(encoding, body) == prompt
+    assert by_hash[hashes[3]][1:] == ("plain", "kısa".encode("utf-8"), len("kısa".encode("utf-8")))
+
+
+# =========================
+# MySQL
+# =========================
+def insert_output(db_, project_id, prompt, output):
+    return db_.insert_project_output(project_id=project_id, action_key="er_tables", prompt_text=prompt,
+                                     output_text=output, model="fake", temperature=0.2)
+
+
+def count(db_, sql, params=()):
+    with db_.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(sql, params)
+            return next(iter(cur.fetchone().values()))
+
+
+def test_outputs_round_trip_and_prompts_are_deduplicated(mysql_db, project_data):
+    project_id = mysql_db.insert_project(project_data)
+    prompt = "=== PROJE ===\n" + TURKISH * 30
+    big, small = TURKISH * 100, "kısa çıktı"
+
+    first = insert_output(mysql_db, project_id, prompt, big)
+    second = insert_output(mysql_db, project_id, prompt, small)
+
+    assert mysql_db.get_project_output(first)["output_text"] == big
+    assert mysql_db.get_project_output(second)["output_text"] == small
+    assert mysql_db.get_project_output_prompt(first) == mysql_db.get_project_output_prompt(second) == prompt
+    assert count(mysql_db, "SELECT COUNT(*) FROM text_blobs") == 1
+    assert count(mysql_db, "SELECT output_encoding FROM project_ai_outputs WHERE id=%s", (first,)) == "zlib"
+    assert [r["output_text"] for r in mysql_db.list_project_outputs(project_id)] == [small, big]
+
+
+def insert_legacy(db_, project_id, prompt, output):
+    with db_.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute(
+                "INSERT INTO project_ai_outputs (project_id, action_key, prompt_text, output_text, model) "
+                "VALUES (%s,'er_tables',%s,%s,'fake')",
+                (project_id, prompt, output),
+            )
+            return cur.lastrowid
+
+
+def test_legacy_rows_are_readable_and_compacted(mysql_db, project_data):
+    project_id = mysql_db.insert_project(project_data)
+    prompt = "=== PROJE ===\n" + TURKISH * 30
+    ids = [insert_legacy(mysql_db, project_id, prompt, TURKISH * n) for n in (1, 100, 100)]
+    assert mysql_db.get_project_output_prompt(ids[0]) == prompt
+    assert mysql_db.get_project_output(ids[1])["output_text"] == TURKISH * 100
+
+    with mysql_db.get_conn() as conn:
+        with conn.cursor() as cur:
+            cur.execute("SELECT id, prompt_text, output_text FROM project_ai_outputs ORDER BY id")
+            rows = cur.fetchall()
+    stored_before = count(mysql_db, "SELECT SUM(LENGTH(prompt_text)) + SUM(LENGTH(output_text)) "
+                                    "FROM project_ai_outputs")
+
+    # dry-run: tablo değişmez, tahmini boyut gerçek taşımayla aynı çıkar
+    p_bytes, before, after, blob_bytes = compact_outputs.compact_batch(rows, True, set())
+    assert count(mysql_db, "SELECT COUNT(*) FROM text_blobs") == 0
+    projected = stored_before - p_bytes - before + after + blob_bytes
+    assert 0 < projected < stored_before
+
+    assert compact_outputs.compact_batch(rows, False, set()) == (p_bytes, before, after, blob_bytes)
+    stats = mysql_db.output_storage_stats()
+    assert (stats["legacy_prompt_bytes"] + stats["plain_output_bytes"]
+            + stats["compressed_output_bytes"] + stats["blob_bytes"]) == projected
+    assert stats["blobs"] == 1 and stats["compressed_rows"] == 2
+
+    for oid, n in zip(ids, (1, 100, 100)):
+        assert mysql_db.get_project_output(oid)["output_text"] == TURKISH * n
+        assert mysql_db.get_project_output_prompt(oid) == prompt
@@ -0,0 +1,23 @@
+"""
+Production giriş noktası:
+
+    gunicorn -c gunicorn.conf.py wsgi:app
+
+Master process uygulamayı bir kez yükler (preload_app); worker'lar fork ile
+bu belleği paylaşır. Master'da ağ bağlantısı açılmaz: DB pool'u ve OpenAI
+client'ı her worker'da ilk kullanımda kurulur.
+"""
+import importlib
+import os
+
+from app import app  # noqa: F401
+
+# Ağır ama bağlantı açmayan modülleri master'da yükle; her worker ayrıca import etmesin
+PRELOAD_MODULES = ("docx", "openai")
+
+if os.getenv("PRELOAD_HEAVY_IMPORTS", "1") == "1":
+    for name in PRELOAD_MODULES:
+        try:
+            importlib.import_module(name)
+        except ImportError:
+            pass